@@ -0,0 +1,92 @@
+"""
+    Decoding speed of JSON decoders (ruz.decoders) on realistic payloads.
+
+    Payloads are received from local RUZ stand-in: lecturers() of the
+    whole university and person_lessons() for a semester. Each installed
+    decoder is compared with decoding to str and stdlib json.loads,
+    then get() is timed end-to-end with each decoder.
+
+    Usage
+    -----
+    python -m benchmarks.bench_decoders [lecturers] [scale]
+"""
+
+import json
+import logging
+import sys
+import timeit
+
+import ruz
+from benchmarks.data import make_routes
+from ruz import decoders
+from ruz.cache import Cache, set_cache
+from ruz.transport import Transport, set_transport
+from tests.server import RUZServer
+
+SEMESTER = {'fromDate': "2018.09.01", 'toDate': "2018.12.31"}
+
+
+def _best(func: object, repeat: int=5) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main(lecturers: int=6000, scale: int=2, repeat: int=5) -> dict:
+    """
+        Print and return {payload: {decoder: seconds}}
+
+        :param lecturers - number of lecturers in response.
+        :param scale - multiplier of lessons per day.
+        :param repeat - number of runs (the best one is taken).
+    """
+    level = logging.root.level
+    logging.root.setLevel(logging.WARNING)  # tests enable DEBUG logging
+    routes = make_routes(scale=scale, size=lecturers)
+    results = {}
+    with RUZServer(routes) as server:
+        previous = set_transport(Transport(compression=""))
+        previous_cache = set_cache(Cache())
+        previous_url, ruz.utils.API_URL = ruz.utils.API_URL, server.url
+        try:
+            requests = {
+                'lecturers': ("lecturers", {}),
+                'person_lessons': ("schedule", dict(studentOid=1,
+                                                    **SEMESTER))
+            }
+            for name, (endpoint, params) in requests.items():
+                url = ruz.utils.make_url(endpoint, **params)
+                body = ruz.utils.get_transport().request(url)
+                timings = results[name] = {
+                    'str+json': _best(lambda: json.loads(
+                        body.decode("utf-8")), repeat)
+                }
+                for decoder, loads in decoders.DECODERS.items():
+                    timings[decoder] = _best(lambda: loads(body, "utf-8"),
+                                             repeat)
+                print("{} ({:.1f} Mb)".format(name, len(body) / 2 ** 20))
+                for decoder, seconds in timings.items():
+                    print("  {:<10}{:>9.2f} ms{:>8.2f}x".format(
+                        decoder, seconds * 1e3,
+                        timings['str+json'] / seconds))
+
+                get_timings = results[name + " get()"] = {}
+                for decoder in decoders.DECODERS:
+                    previous_decoder = decoders.set_decoder(decoder)
+                    try:
+                        get_timings[decoder] = _best(
+                            lambda: ruz.utils.get(endpoint, use_cache=False,
+                                                  **params), repeat)
+                    finally:
+                        decoders.set_decoder(previous_decoder)
+                print("  get():   " + ", ".join(
+                    "{} {:.2f} ms".format(decoder, seconds * 1e3)
+                    for decoder, seconds in get_timings.items()))
+        finally:
+            ruz.utils.API_URL = previous_url
+            set_cache(previous_cache)
+            set_transport(previous).close()
+            logging.root.setLevel(level)
+    return results
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""
+    Client-side overhead of get() vs prepared requests.
+
+    Transport is replaced with one returning canned response, so only
+    work done by the library (params checks, URL and cache key building,
+    decoding) is measured.
+
+    Usage
+    -----
+    python -m benchmarks.bench_prepare [number of calls]
+"""
+
+import sys
+import timeit
+
+from ruz.transport import set_transport
+from ruz.utils import get, prepare
+
+RESPONSE = b"[]"
+
+
+class CannedTransport:
+    """ Transport returning the same response for any URL """
+
+    def request(self, url: str) -> bytes:
+        return RESPONSE
+
+    def close(self) -> None:
+        pass
+
+
+def main(number: int=20000) -> dict:
+    previous = set_transport(CannedTransport())
+    params = {'fromDate': "2018.06.01", 'toDate': "2018.06.07"}
+    prepared = prepare("schedule", use_cache=False, **params)
+    ids = list(range(number))
+    cases = {
+        'get': lambda: [get("schedule", use_cache=False, studentOid=oid,
+                            **params) for oid in ids],
+        'prepare': lambda: [prepared(studentOid=oid) for oid in ids]
+    }
+    results = {}
+    try:
+        for name, func in cases.items():
+            seconds = min(timeit.repeat(func, number=1, repeat=5))
+            results[name] = seconds / number * 1e6
+            print("{:<10}{:>8.2f} us/call".format(name, results[name]))
+    finally:
+        set_transport(previous)
+    print("speedup   {:>8.2f}x".format(results['get'] / results['prepare']))
+    return results
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
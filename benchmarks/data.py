@@ -0,0 +1,156 @@
+"""
+    Synthetic RUZ data for benchmarks.
+
+    Responses follow RESPONSE_SCHEMA. Schedules repeat the week pattern
+    of tests.fixtures.SAMPLE_SCHEDULE (lessons per day of week) `scale`
+    times, collections have `size` elements.
+
+    Usage
+    -----
+    from benchmarks.data import make_routes
+    from tests.server import RUZServer
+    with RUZServer(make_routes(scale=10, size=1000)) as server:
+        ...
+"""
+
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from ruz.schema import API_ENDPOINTS, RESPONSE_SCHEMA
+from tests.fixtures import (SAMPLE_SCHEDULE, TRUSTED_GROUP_ID,
+                            TRUSTED_LECTURER_ID)
+
+SURNAMES = ("Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов",
+            "Лебедев", "Козлов", "Новиков", "Морозов", "Волков", "Зайцев")
+NAMES = ("Александр", "Дмитрий", "Сергей", "Андрей", "Алексей", "Михаил",
+         "Иван", "Николай", "Павел", "Роман", "Олег", "Евгений")
+PATRONYMICS = ("Александрович", "Дмитриевич", "Сергеевич", "Андреевич",
+               "Иванович", "Петрович", "Николаевич", "Павлович")
+DISCIPLINES = ("Математический анализ", "Линейная алгебра",
+               "Дискретная математика", "Алгоритмы и структуры данных",
+               "Теория вероятностей", "Базы данных", "Экономика",
+               "Английский язык", "Философия", "Машинное обучение")
+BUILDINGS = ("Покровский бульвар, д.11", "Мясницкая ул., д.20",
+             "Старая Басманная ул., д.21/4", "Кочновский пр-д, д.3",
+             "Таллинская ул., д.34", "Шаболовка ул., д.26")
+KINDS_OF_WORK = ("Лекция", "Семинар", "Практическое занятие",
+                 "Лабораторная работа", "Экзамен")
+SLOTS = (("09:00", "10:20"), ("10:30", "11:50"), ("12:10", "13:30"),
+         ("13:40", "15:00"), ("15:10", "16:30"), ("16:40", "18:00"),
+         ("18:10", "19:30"))
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+# lessons per day of week (1 - Monday) in fixtures
+DAY_PATTERN = Counter(lesson['dayOfWeek'] for lesson in SAMPLE_SCHEDULE)
+
+
+def _fio(rnd: random.Random) -> tuple:
+    surname, name, patronymic = (rnd.choice(SURNAMES), rnd.choice(NAMES),
+                                 rnd.choice(PATRONYMICS))
+    return ("{} {} {}".format(surname, name, patronymic),
+            "{} {}.{}.".format(surname, name[0], patronymic[0]))
+
+
+def _value(field: str, kind: type or tuple, idx: int,
+           rnd: random.Random) -> object:
+    """ Return synthetic value for field of schema """
+    kind = kind[0] if isinstance(kind, tuple) else kind
+    if kind is int:
+        if field.endswith(("Oid", "Gid")):
+            return idx + 1
+        return rnd.randint(1, 6)
+    if kind is bool:
+        return False
+    lowered = field.lower()
+    if lowered == "fio":
+        return _fio(rnd)[0]
+    if lowered == "shortfio":
+        return _fio(rnd)[1]
+    if lowered in ("building", "address"):
+        return rnd.choice(BUILDINGS)
+    if lowered in ("name", "discipline", "speciality"):
+        return "{} {}".format(rnd.choice(DISCIPLINES), idx)
+    if lowered in ("number", "auditorium"):
+        return str(100 + idx)
+    return "{} {}".format(field, idx % 100)
+
+
+def make_collection(endpoint: str, size: int, seed: int=0) -> list:
+    """ Return list of `size` synthetic elements for endpoint """
+    schema = RESPONSE_SCHEMA[endpoint][0]
+    rnd = random.Random(seed)
+    return [{field: _value(field, kind, idx, rnd)
+             for field, kind in schema.items()} for idx in range(size)]
+
+
+def _parse(date: str) -> datetime:
+    return datetime.strptime(date, "%Y.%m.%d")
+
+
+def make_schedule(receiver: int, from_date: str, to_date: str,
+                  scale: int=1) -> list:
+    """
+        Return synthetic lessons of receiver for period
+
+        :param receiver - Oid of receiver (seeds generator).
+        :param from_date - start of period YYYY.MM.DD.
+        :param to_date - end of period YYYY.MM.DD.
+        :param scale - multiplier of lessons per day from fixtures.
+    """
+    rnd = random.Random(receiver)
+    schema = RESPONSE_SCHEMA['schedule'][0]
+    lessons = []
+    day, last = _parse(from_date), _parse(to_date)
+    while day <= last:
+        day_of_week = day.isoweekday()
+        for number in range(DAY_PATTERN[day_of_week] * scale):
+            begin, end = SLOTS[number % len(SLOTS)]
+            lesson = {field: _value(field, kind, rnd.randint(0, 999), rnd)
+                      for field, kind in schema.items()}
+            lesson.update(
+                date=day.strftime("%Y.%m.%d"),
+                dayOfWeek=day_of_week,
+                dayOfWeekString=WEEKDAYS[day_of_week - 1],
+                beginLesson=begin,
+                endLesson=end,
+                discipline=rnd.choice(DISCIPLINES),
+                kindOfWork=rnd.choice(KINDS_OF_WORK),
+                lecturer=_fio(rnd)[1],
+                lecturerOid=TRUSTED_LECTURER_ID + rnd.randint(0, 50),
+                groupOid=TRUSTED_GROUP_ID + rnd.randint(0, 50),
+                group=None,
+                subGroup=None
+            )
+            lessons.append(lesson)
+        day += timedelta(days=1)
+    return lessons
+
+
+def make_routes(scale: int=10, size: int=1000, seed: int=0) -> dict:
+    """
+        Return routes for tests.server.RUZServer serving all endpoints
+
+        :param scale - multiplier of lessons per day from fixtures.
+        :param size - number of elements in collections.
+        :param seed - seed for collections.
+    """
+    def person_lessons(params: dict) -> bytes:
+        receiver = next((int(params[key]) for key in (
+            "studentOid", "lecturerOid", "auditoriumOid", "groupOid"
+        ) if key in params), 0)
+        today = datetime.now().strftime("%Y.%m.%d")
+        return json.dumps(make_schedule(
+            receiver, params.get("fromDate", today),
+            params.get("toDate", today), scale
+        )).encode("utf-8")
+
+    routes = {}
+    for path in set(API_ENDPOINTS.values()):
+        if path == API_ENDPOINTS['schedule']:
+            routes[path.rsplit("/", 1)[-1]] = person_lessons
+        elif path in RESPONSE_SCHEMA:
+            routes[path] = json.dumps(
+                make_collection(path, size, seed)).encode("utf-8")
+    return routes
@@ -0,0 +1,239 @@
+"""
+    Benchmark suite against local RUZ stand-in server.
+
+    Each case is run for given time, latency of every operation is
+    measured, throughput and p50/p99 latency are reported and compared
+    with stored baseline (benchmarks/baseline.json).
+
+    Usage
+    -----
+    python -m benchmarks                       # run and compare
+    python -m benchmarks --save                # store new baseline
+    python -m benchmarks get find_by_str --latency 0.005 --error-rate 0.01
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import count
+
+import ruz
+from benchmarks.data import make_routes, make_schedule
+from ruz.cache import Cache, set_cache
+from ruz.transport import Transport, set_transport
+from ruz.utils import get, prepare, split_schedule_by_days
+from ruz.validators import validate
+from tests.server import RUZServer
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+TOLERANCE = 0.25  # allowed slowdown of p50 against baseline
+
+
+def _period(days: int) -> dict:
+    start = datetime(2018, 6, 4)
+    return {'fromDate': start.strftime("%Y.%m.%d"),
+            'toDate': (start + timedelta(days=days)).strftime("%Y.%m.%d")}
+
+
+def case_get(options: argparse.Namespace) -> object:
+    """ get() of collection, no cache """
+    return lambda: get("lecturers", use_cache=False)
+
+
+def case_get_schedule(options: argparse.Namespace) -> object:
+    """ get() of week schedule for different students, no cache """
+    ids, period = count(), _period(6)
+    return lambda: get("schedule", use_cache=False, studentOid=next(ids),
+                       **period)
+
+
+def case_get_cached(options: argparse.Namespace) -> object:
+    """ get() of collection from cache """
+    get("lecturers")
+    return lambda: get("lecturers")
+
+
+def case_prepare(options: argparse.Namespace) -> object:
+    """ prepared schedule request, no cache """
+    ids, lessons = count(), prepare("schedule", use_cache=False,
+                                    **_period(6))
+    return lambda: lessons(studentOid=next(ids))
+
+
+def case_schedules(options: argparse.Namespace) -> object:
+    """ schedules() of 32 students in parallel, no cache """
+    period = _period(6)
+
+    def run() -> None:
+        for _ in ruz.schedules(student_ids=range(1, 33), use_cache=False,
+                               max_workers=options.workers,
+                               from_date=period['fromDate'],
+                               to_date=period['toDate']):
+            pass
+    return run
+
+
+def case_find_by_str(options: argparse.Namespace) -> object:
+    """ find_by_str() over lecturers (index is built once) """
+    queries = ("иванов", "петр", "серге", "волков", "ович")
+    ids = count()
+    return lambda: ruz.find_by_str("lecturers",
+                                   queries[next(ids) % len(queries)],
+                                   by="fio")
+
+
+def case_split_schedule_by_days(options: argparse.Namespace) -> object:
+    """ split_schedule_by_days() of semester schedule """
+    lessons = make_schedule(1, "2018.02.01", "2018.06.30", options.scale)
+    return lambda: split_schedule_by_days(lessons)
+
+
+def case_validation(options: argparse.Namespace) -> object:
+    """ full validation of semester schedule """
+    lessons = make_schedule(1, "2018.02.01", "2018.06.30", options.scale)
+    return lambda: validate("schedule", lessons, "full")
+
+
+CASES = {name[5:]: func for name, func in sorted(globals().items())
+         if name.startswith("case_")}
+
+
+def percentile(values: list, share: float) -> float:
+    """ Return percentile of sorted values (nearest rank) """
+    idx = min(len(values) - 1, max(0, int(round(share * len(values))) - 1))
+    return values[idx]
+
+
+def measure(func: object, duration: float, warmup: int=3) -> dict:
+    """
+        Call func repeatedly for duration seconds
+
+        Return {'ops', 'throughput', 'p50', 'p99'}, latency in seconds.
+    """
+    for _ in range(warmup):
+        func()
+    timer, timings = time.perf_counter, []
+    started = timer()
+    deadline = started + duration
+    while True:
+        start = timer()
+        func()
+        end = timer()
+        timings.append(end - start)
+        if end >= deadline:
+            break
+    timings.sort()
+    return {
+        'ops': len(timings),
+        'throughput': len(timings) / (end - started),
+        'p50': percentile(timings, 0.5),
+        'p99': percentile(timings, 0.99)
+    }
+
+
+def compare(results: dict, baseline: dict,
+            tolerance: float=TOLERANCE) -> list:
+    """ Return names of cases which p50 is worse than baseline """
+    return [name for name, result in results.items()
+            if name in baseline and
+            result['p50'] > baseline[name]['p50'] * (1 + tolerance)]
+
+
+def report(results: dict, baseline: dict, regressions: list) -> str:
+    lines = ["{:<24}{:>8}{:>12}{:>10}{:>10}{:>10}".format(
+        "case", "ops", "ops/s", "p50 ms", "p99 ms", "vs base")]
+    for name, result in results.items():
+        ratio = ""
+        if name in baseline:
+            ratio = "{:.2f}x".format(result['p50'] / baseline[name]['p50'])
+            if name in regressions:
+                ratio += " !"
+        lines.append("{:<24}{:>8}{:>12.1f}{:>10.3f}{:>10.3f}{:>10}".format(
+            name, result['ops'], result['throughput'],
+            result['p50'] * 1000, result['p99'] * 1000, ratio))
+    return "\n".join(lines)
+
+
+def run(options: argparse.Namespace) -> dict:
+    """ Run selected cases against fresh server, return results """
+    level = logging.root.level
+    logging.root.setLevel(logging.WARNING)  # tests enable DEBUG logging
+    routes = make_routes(scale=options.scale, size=options.size)
+    results = {}
+    with RUZServer(routes, latency=options.latency, jitter=options.jitter,
+                   error_rate=options.error_rate, seed=0) as server:
+        api_url = ruz.utils.API_URL
+        ruz.utils.API_URL = server.url
+        previous = set_transport(Transport(hedge=options.hedge))
+        previous_cache = set_cache(Cache())
+        try:
+            for name in options.cases or CASES:
+                results[name] = measure(CASES[name](options),
+                                        options.duration)
+        finally:
+            set_cache(previous_cache)
+            set_transport(previous).close()
+            ruz.utils.API_URL = api_url
+            logging.root.setLevel(level)
+    return results
+
+
+def parse_args(args: list=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description=__doc__.split("\n")[1])
+    parser.add_argument("cases", nargs="*", choices=[[]] + list(CASES),
+                        help="cases to run (all by default)")
+    parser.add_argument("--duration", type=float, default=1,
+                        help="seconds to run each case")
+    parser.add_argument("--scale", type=int, default=10,
+                        help="multiplier of lessons per day from fixtures")
+    parser.add_argument("--size", type=int, default=1000,
+                        help="number of elements in collections")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="threads for schedules()")
+    parser.add_argument("--latency", type=float, default=0,
+                        help="server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0,
+                        help="max deviation of server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0,
+                        help="share of failed (503) responses")
+    parser.add_argument("--hedge", type=float, default=0,
+                        help="latency percentile to hedge requests after")
+    parser.add_argument("--baseline", default=BASELINE,
+                        help="path to baseline results")
+    parser.add_argument("--save", action="store_true",
+                        help="store results as new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown of p50 against baseline")
+    return parser.parse_args(args)
+
+
+def main(args: list=None) -> int:
+    """ Run suite, return 1 if there are regressions """
+    options = parse_args(args)
+    results = run(options)
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+    regressions = compare(results, baseline, options.tolerance)
+    print(report(results, baseline, regressions))
+    if options.save:
+        baseline.update(results)
+        with open(options.baseline, "w") as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+            file.write("\n")
+        return 0
+    if regressions:
+        print("Regressions (p50 > {:.0%} of baseline): {}".format(
+            1 + options.tolerance, ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
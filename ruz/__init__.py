@@ -8,9 +8,11 @@
 """
 
 from ruz.api import (auditoriums, buildings, chairs, faculties, find_by_str,
-                     groups, kind_of_works, lecturers, person_lessons,
-                     schedules, staff_of_group, streams, sub_groups,
-                     type_of_auditoriums)
+                     groups, iter_auditoriums, iter_groups, iter_lecturers,
+                     iter_person_lessons, kind_of_works, lecturers,
+                     person_lessons, schedules, staff_of_group, streams,
+                     sub_groups, type_of_auditoriums)
+from ruz.utils import prepare
 
 __author__ = "Dmitriy Pchelkin | hell03end"
 __version__ = (2, 1, 2)
@@ -0,0 +1,5 @@
+import sys
+
+from ruz.cli import main
+
+sys.exit(main())
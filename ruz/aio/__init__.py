@@ -0,0 +1,17 @@
+"""
+    Asyncio version of HSE RUZ API wrapper.
+
+    Usage
+    -----
+    import ruz.aio
+    lessons = await ruz.aio.person_lessons("mymail@edu.hse.ru")
+    async for email, lessons in ruz.aio.schedules(emails=emails):
+        ...
+"""
+
+from ruz.aio.api import (AsCompleted, auditoriums, buildings, chairs,
+                         faculties, find_by_str, groups, kind_of_works,
+                         lecturers, person_lessons, schedules,
+                         staff_of_group, streams, sub_groups,
+                         type_of_auditoriums)
+from ruz.aio.utils import get
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from collections.abc import Callable, Iterable
+
+from ruz.aio.transport import get_transport
+from ruz.aio.utils import get
+from ruz.api import lessons_params
+from ruz.search import search
+from ruz.utils import get_formated_date
+
+
+class AsCompleted:
+    """
+        Async iterator over (key, result) pairs in order of completion
+
+        Keep at most `window` requests scheduled at once, so huge inputs
+        don't create a task per key upfront. Failed requests are logged
+        and yield empty list (as ruz.utils.get does).
+
+        :param func - coroutine function to call for each key.
+        :param keys - keys to pass to func.
+        :param window - max number of scheduled requests.
+    """
+
+    def __init__(self, func: Callable, keys: Iterable, window: int):
+        self._func = func
+        self._keys = iter(keys)
+        self._window = max(1, window)
+        self._pending = {}
+        self._done = []
+
+    def _fill(self) -> None:
+        while len(self._pending) < self._window:
+            try:
+                key = next(self._keys)
+            except StopIteration:
+                return
+            task = asyncio.ensure_future(self._func(key))
+            self._pending[task] = key
+
+    def __aiter__(self) -> 'AsCompleted':
+        return self
+
+    async def __anext__(self) -> tuple:
+        if not self._done:
+            self._fill()
+            if not self._pending:
+                raise StopAsyncIteration
+            done, _ = await asyncio.wait(
+                self._pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                key = self._pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as err:
+                    logging.warning("Request for '%s' failed: %r", key, err)
+                    result = []
+                self._done.append((key, result))
+        return self._done.pop()
+
+    def cancel(self) -> None:
+        """ Cancel scheduled requests """
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+
+
+def schedules(emails: Iterable=None,
+              lecturer_ids: Iterable=None,
+              auditorium_ids: Iterable=None,
+              student_ids: Iterable=None,
+              window: int=None,
+              **params) -> AsCompleted:
+    """
+        Classes schedule for multiply students/lecturers
+
+        Return async iterator over (key, schedule) pairs in order
+        requests are finished:
+
+            async for email, lessons in ruz.aio.schedules(emails=emails):
+                ...
+
+        See ruz.schedules for more details.
+
+        :param window - max number of scheduled requests
+            (transport limit by default).
+    """
+    def get_handler(key: str) -> Callable:
+        async def func(val: object) -> list or dict:
+            return await person_lessons(**{key: val}, **params)
+        return func
+
+    if window is None:
+        window = getattr(get_transport(), "limit", 100)
+
+    if emails:
+        return AsCompleted(get_handler("email"), emails, window)
+    elif lecturer_ids:
+        return AsCompleted(get_handler("lecturer_id"), lecturer_ids, window)
+    elif auditorium_ids:
+        return AsCompleted(get_handler("auditorium_id"), auditorium_ids,
+                           window)
+    elif student_ids:
+        return AsCompleted(get_handler("student_id"), student_ids, window)
+
+    raise ValueError("One of the followed required: lecturer_ids, "
+                     "auditorium_ids, student_ids, emails")
+
+
+async def person_lessons(email: str=None,
+                         from_date: str=get_formated_date(),
+                         to_date: str=get_formated_date(6),  # one week
+                         receiver_type: int=None,
+                         lecturer_id: int=None,
+                         auditorium_id: int=None,
+                         student_id: int=None,
+                         **params) -> list:
+    """ Return classes schedule, see ruz.person_lessons """
+    return await get("schedule", **lessons_params(
+        email=email,
+        from_date=from_date,
+        to_date=to_date,
+        receiver_type=receiver_type,
+        lecturer_id=lecturer_id,
+        auditorium_id=auditorium_id,
+        student_id=student_id,
+        **params
+    ))
+
+
+async def groups(faculty_id: int=None) -> list:
+    """ Return collection of groups, see ruz.groups """
+    return await get("groups", facultyOid=faculty_id)
+
+
+async def staff_of_group(group_id: int) -> list:
+    """ Return collection of students in group, see ruz.staff_of_group """
+    return await get("staffOfGroup", groupOid=group_id)
+
+
+async def streams() -> list:
+    """ Return collection of study streams, see ruz.streams """
+    return await get("streams")
+
+
+async def lecturers(chair_id: int=None) -> list:
+    """ Return collection of teachers, see ruz.lecturers """
+    return await get("lecturers", chairOid=chair_id)
+
+
+async def auditoriums(building_id: int=None) -> list:
+    """ Return collection of auditoriums, see ruz.auditoriums """
+    return await get("auditoriums", buildingOid=building_id)
+
+
+async def type_of_auditoriums() -> list:
+    """ Return collection of auditoriums' types """
+    return await get("typeOfAuditoriums")
+
+
+async def kind_of_works() -> list:
+    """ Return collection of classes' types, see ruz.kind_of_works """
+    return await get("kindOfWorks")
+
+
+async def buildings() -> list:
+    """ Return collection of buildings, see ruz.buildings """
+    return await get("buildings")
+
+
+async def faculties() -> list:
+    """ Return collection of learning programs, see ruz.faculties """
+    return await get("faculties")
+
+
+async def chairs(faculty_id: int=None) -> list:
+    """ Return collection of departments, see ruz.chairs """
+    return await get("chairs", facultyOid=faculty_id)
+
+
+async def sub_groups() -> list:
+    """ Return collection of subgroups, see ruz.sub_groups """
+    return await get("subGroups")
+
+
+async def find_by_str(subject: str or Callable,
+                      query: str,
+                      by: str="name",
+                      **params) -> list:
+    """
+        Search for subject by given text field (as query)
+
+        See ruz.find_by_str for more details.
+    """
+    SUBJECTS = {
+        buildings.__name__: buildings,
+        faculties.__name__: faculties,
+        sub_groups.__name__: sub_groups,
+        streams.__name__: streams,
+        type_of_auditoriums.__name__: type_of_auditoriums,
+        kind_of_works.__name__: kind_of_works,
+        chairs.__name__: chairs,
+        auditoriums.__name__: auditoriums,
+        lecturers.__name__: lecturers,
+        groups.__name__: groups,
+        staff_of_group.__name__: staff_of_group,
+        person_lessons.__name__: person_lessons
+    }
+
+    if not isinstance(subject, Callable):
+        subject = SUBJECTS[subject]
+    elif SUBJECTS.get(subject.__name__) is not subject:
+        raise NotImplementedError(subject.__name__)
+
+    return search(await subject(**params), query, by,
+                  name=subject.__name__, params=params)
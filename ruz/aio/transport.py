@@ -0,0 +1,336 @@
+"""
+    Asyncio HTTP/1.1 transport with keep-alive connections.
+
+    Number of requests in flight is limited by `limit` (per transport).
+    Responses are requested compressed (see ruz.transport.COMPRESSION).
+    Timeouts and retries of failed requests are the same as of
+    ruz.transport.Transport.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import ssl
+import zlib
+from collections import deque
+from urllib import error, parse
+
+from ruz import metrics
+from ruz.transport import (BACKOFF, COMPRESSION, CONNECT_TIMEOUT,
+                           READ_TIMEOUT, RETRIES, RETRY_BUDGET, RetryBudget,
+                           _retryable, decompress)
+
+LIMIT = int(os.environ.get("HSE_RUZ_AIO_LIMIT", 100))
+POOL_SIZE = int(os.environ.get("HSE_RUZ_POOL_SIZE", 10))
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class AsyncResponse:
+    """ Completely read HTTP response """
+
+    def __init__(self, status: int, reason: str, headers: dict,
+                 body: bytes):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> dict:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if not size:
+                await _read_headers(reader)  # trailer
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)  # CRLF
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    headers["connection"] = "close"
+    return await reader.read()
+
+
+async def read_response(reader: asyncio.StreamReader) -> AsyncResponse:
+    """ Read HTTP response (status line, headers and body) """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Connection closed by server")
+    version, status, *reason = status_line.decode("latin-1").split(None, 2)
+    headers = await _read_headers(reader)
+    if version == "HTTP/1.0" and \
+            headers.get("connection", "").lower() != "keep-alive":
+        headers["connection"] = "close"
+    body = await _read_body(reader, headers)
+    return AsyncResponse(int(status), "".join(reason).strip(), headers, body)
+
+
+def _close(writer: asyncio.StreamWriter) -> None:
+    """ Close connection (even if its event loop is already closed) """
+    try:
+        writer.close()
+    except RuntimeError:
+        # loop is closed, shut connection down (descriptor is closed
+        # when transport is collected)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class AsyncConnectionPool:
+    """
+        Pool of idle keep-alive connections to a single host
+
+        :param scheme - 'http' or 'https'.
+        :param host - host name.
+        :param port - port number.
+        :param size - max number of idle connections to keep.
+    """
+
+    def __init__(self, scheme: str, host: str, port: int,
+                 size: int=POOL_SIZE):
+        if scheme not in _DEFAULT_PORTS:
+            raise ValueError("Unsupported scheme: '{}'".format(scheme))
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self._idle = deque()
+
+    async def acquire(self, timeout: float=None) -> tuple:
+        """
+            Return (reader, writer, reused)
+
+            :param timeout - timeout of new connection in seconds.
+        """
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            self.host, self.port,
+            ssl=ssl.create_default_context() if self.scheme == "https"
+            else None
+        ), timeout)
+        return reader, writer, False
+
+    def release(self, reader: asyncio.StreamReader,
+                writer: asyncio.StreamWriter) -> None:
+        if len(self._idle) < self.size:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def clear(self) -> None:
+        while self._idle:
+            _close(self._idle.pop()[1])
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+
+class AsyncTransport:
+    """
+        Asyncio HTTP client reusing connections per host
+
+        Transport is bound to the event loop it was first used in,
+        connections are dropped if it's used in another loop.
+
+        :param limit - max number of requests in flight.
+        :param pool_size - max number of idle connections per host.
+        :param timeout - connect and read timeout in seconds (shortcut).
+        :param headers - extra headers to send with each request.
+        :param compression - value of Accept-Encoding header, empty to
+            request uncompressed responses.
+        :param connect_timeout - timeout of connection in seconds.
+        :param read_timeout - timeout of reading response in seconds.
+        :param retries - max number of retries of failed request.
+        :param backoff - base delay before retry in seconds.
+        :param retry_budget - RetryBudget shared by requests (or share
+            of requests which may be retried).
+    """
+
+    def __init__(self, limit: int=LIMIT, pool_size: int=POOL_SIZE,
+                 timeout: float=None, headers: dict=None,
+                 compression: str=COMPRESSION,
+                 connect_timeout: float=CONNECT_TIMEOUT,
+                 read_timeout: float=READ_TIMEOUT,
+                 retries: int=RETRIES,
+                 backoff: float=BACKOFF,
+                 retry_budget: RetryBudget or float=RETRY_BUDGET):
+        if timeout is not None:
+            connect_timeout = read_timeout = timeout
+        self.limit = limit
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        if not isinstance(retry_budget, RetryBudget):
+            retry_budget = RetryBudget(retry_budget)
+        self.retry_budget = retry_budget
+        self.headers = dict(headers or {})
+        if compression:
+            self.headers.setdefault("Accept-Encoding", compression)
+        self.compression = compression
+        self._loop = None
+        self._semaphore = None
+        self._pools = {}
+
+    def _bind(self) -> None:
+        loop = asyncio.get_event_loop()
+        if loop is not self._loop:
+            # connections of other loop can't be used, close them
+            self.close()
+            self._pools = {}
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+
+    def pool(self, scheme: str, netloc: str) -> AsyncConnectionPool:
+        """ Return connection pool for the host (create if not exists) """
+        key = (scheme, netloc)
+        if key not in self._pools:
+            host, _, port = netloc.rpartition(":")
+            if not host or not port.isdigit():
+                host, port = netloc, _DEFAULT_PORTS.get(scheme)
+            self._pools[key] = AsyncConnectionPool(
+                scheme, host, int(port), self.pool_size
+            )
+        return self._pools[key]
+
+    def _make_request(self, netloc: str, path: str) -> bytes:
+        lines = ["GET {} HTTP/1.1".format(path), "Host: {}".format(netloc)]
+        lines.extend("{}: {}".format(key, value)
+                     for key, value in self.headers.items())
+        lines.append("\r\n")
+        return "\r\n".join(lines).encode("latin-1")
+
+    async def _roundtrip(self, pool: AsyncConnectionPool,
+                         data: bytes) -> AsyncResponse:
+        # stale keep-alive connection may be closed by server at any time,
+        # so retry once with fresh connection if reused one is reset
+        for attempt in range(2):
+            reader, writer, reused = await pool.acquire(self.connect_timeout)
+            try:
+                writer.write(data)
+                response = await asyncio.wait_for(read_response(reader),
+                                                  self.read_timeout)
+            except (ConnectionError, EOFError) as err:
+                _close(writer)
+                if reused and attempt == 0:
+                    logging.debug("Reconnect to '%s': %s", pool.host, err)
+                    continue
+                raise
+            except BaseException:
+                # timeout or cancellation: response may be read partly
+                _close(writer)
+                raise
+            if response.keep_alive:
+                pool.release(reader, writer)
+            else:
+                writer.close()
+            return response
+
+    def backoff_delay(self, attempt: int) -> float:
+        """ Return delay before retry (exponential with full jitter) """
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def request(self, url: str) -> bytes:
+        """
+            Make GET request and return response body
+
+            Raise urllib.error.HTTPError for error status codes and
+            urllib.error.URLError for connection problems. Failed
+            requests are retried (see ruz.transport.Transport).
+
+            :param url - full URL to request.
+        """
+        self._bind()
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return await self._request(url)
+            except error.URLError as err:
+                if attempt >= self.retries or not _retryable(err) or \
+                        not self.retry_budget.withdraw():
+                    raise
+                logging.debug("Retry '%s' (%d): %s", url, attempt + 1, err)
+                if metrics.ENABLED:
+                    metrics.inc("ruz_retries_total")
+            await asyncio.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    async def _request(self, url: str) -> bytes:
+        """ Make single request attempt (see request) """
+        parts = parse.urlsplit(url)
+        pool = self.pool(parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = "?".join((path, parts.query))
+        data = self._make_request(parts.netloc, path)
+
+        async with self._semaphore:
+            try:
+                response = await self._roundtrip(pool, data)
+            except (OSError, EOFError, ValueError,
+                    asyncio.TimeoutError) as err:
+                raise error.URLError(err)
+
+        if response.status >= 400:
+            raise error.HTTPError(url, response.status, response.reason,
+                                  response.headers, None)
+        encoding = response.headers.get("content-encoding")
+        try:
+            body = decompress(response.body, encoding)
+        except (ValueError, zlib.error) as err:
+            raise error.URLError(err)
+        if metrics.ENABLED:
+            metrics.record_transfer(encoding, len(response.body), len(body))
+        return body
+
+    def close(self) -> None:
+        """ Close all idle connections """
+        for pool in self._pools.values():
+            pool.clear()
+
+
+_transport = AsyncTransport()
+
+
+def get_transport() -> AsyncTransport:
+    """ Return transport used by ruz.aio.get """
+    return _transport
+
+
+def set_transport(transport: AsyncTransport) -> AsyncTransport:
+    """
+        Replace transport used by ruz.aio.get, return the previous one
+
+        :param transport - object with coroutine `request(url)`.
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
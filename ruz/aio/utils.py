@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from urllib import error
+
+from ruz import decoders, metrics
+from ruz.aio.transport import get_transport
+from ruz.cache import (Cache, get_cache, key_endpoint, make_key,
+                       variant_key)
+from ruz.records import to_records
+from ruz.singleflight import get_group
+from ruz.utils import (is_valid_schema, make_converter, make_url, none_safe,
+                       url_endpoint)
+from ruz.validators import VALIDATION
+
+
+@none_safe
+async def get(endpoint: str,
+              encoding: str="utf-8",
+              use_cache: bool=True,
+              records: bool=False,
+              validate: str=VALIDATION,
+              **params) -> (list, dict, None):
+    """
+        Return requested data in JSON (empty list on fallback)
+
+        Coroutine version of ruz.utils.get (shares the same cache).
+
+        :param endpoint - endpoint for request.
+        :param encoding - encoding for received data.
+        :param use_cache - look up response in cache first.
+        :param records - return compact records instead of dicts.
+        :param validate - validation mode: 'off', 'sampled' or 'full'.
+        :param params - requested params
+    """
+    if not is_valid_schema(endpoint, **params):
+        return []
+
+    convert = make_converter(endpoint, validate, records)
+    response_cache = get_cache() if use_cache else None
+    url = make_url(endpoint, **params)
+    key = variant_key(make_key(endpoint, **params), records, validate)
+    if response_cache is not None:
+        entry = response_cache.get(key)
+        if metrics.ENABLED:
+            metrics.record_cache(key_endpoint(key), entry is not None)
+        if entry is not None:
+            if entry.expired() and response_cache.begin_refresh(key):
+                asyncio.ensure_future(revalidate(response_cache, key, url,
+                                                 encoding, convert))
+            return to_records(endpoint, entry.value) if records \
+                else entry.value
+
+    group = get_group()
+    if group is None:
+        return await fetch_and_store(response_cache, key, url, encoding,
+                                     convert)
+    return await group.do_async(key, fetch_and_store, response_cache, key,
+                                url, encoding, convert)
+
+
+async def fetch_and_store(response_cache: Cache or None, key: str, url: str,
+                          encoding: str="utf-8",
+                          convert: Callable=None) -> object:
+    """ Coroutine version of ruz.utils.fetch_and_store """
+    data, failed = await fetch(url, encoding, convert)
+    if response_cache is not None:
+        response_cache.set(key, data, failed)
+    return data
+
+
+async def fetch(url: str, encoding: str="utf-8",
+                convert: Callable=None) -> tuple:
+    """ Coroutine version of ruz.utils.fetch """
+    started = time.perf_counter() if metrics.ENABLED else None
+    try:
+        response = await get_transport().request(url)
+        data = decoders.loads(response, encoding)
+        if convert is not None:
+            data = convert(data)
+    except (error.HTTPError, error.URLError) as err:
+        logging.debug("Can't get '%s'.\n%s", url, err)
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started, error=err)
+        return [], True
+    except Exception as err:
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started, error=err)
+        raise
+    if started is not None:
+        metrics.record_request(url_endpoint(url), started, len(response),
+                               metrics.count_records(data))
+    return data, False
+
+
+async def revalidate(response_cache: Cache, key: str, url: str,
+                     encoding: str="utf-8",
+                     convert: Callable=None) -> None:
+    """ Coroutine version of ruz.utils.revalidate """
+    try:
+        data, failed = await fetch(url, encoding, convert)
+        if not failed:
+            response_cache.set(key, data)
+    finally:
+        response_cache.end_refresh(key)
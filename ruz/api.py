@@ -1,40 +1,53 @@
 import logging
-from collections import Callable, Iterable
-from functools import lru_cache
+from collections.abc import Callable, Iterable, Iterator
 
-from ruz.utils import get, get_formated_date, is_student
+from ruz.cache import invalidate
+from ruz.search import search
+from ruz.utils import get, get_formated_date, is_student, parallel_map
 
 
 def schedules(emails: Iterable=None,
               lecturer_ids: Iterable=None,
               auditorium_ids: Iterable=None,
               student_ids: Iterable=None,
-              **params) -> map:
+              max_workers: int=None,
+              ordered: bool=True,
+              **params) -> Iterator:
     """
         Classes schedule for multiply students/lecturers as generator
 
         See RUZ::person_lessons for more details.
         One of the followed required: lecturer_ids, auditorium_ids,
             student_ids, emails. Throw an exception.
+        Requests are made one by one (lazy map) unless max_workers is set
+            or ordered is False (see ruz.utils.parallel_map).
 
         :param emails - emails on hse.ru (edu.hse.ru for students).
         :param lecturer_ids - IDs of teacher.
         :param auditorium_ids - IDs of auditorium.
         :param student_ids - IDs of student.
+        :param max_workers - number of threads to make requests in.
+        :param ordered - if False, yield (key, schedule) pairs in order
+            requests are finished.
     """
     def get_handler(key: str) -> Callable:
         def func(val: dict) -> list or dict:
             return person_lessons(**{key: val}, **params)
         return func
 
+    def fetch(key: str, values: Iterable) -> Iterator:
+        if max_workers is None and ordered:
+            return map(get_handler(key), values)
+        return parallel_map(get_handler(key), values, max_workers, ordered)
+
     if emails:
-        return map(get_handler("email"), emails)
+        return fetch("email", emails)
     elif lecturer_ids:
-        return map(get_handler("lecturer_id"), lecturer_ids)
+        return fetch("lecturer_id", lecturer_ids)
     elif auditorium_ids:
-        return map(get_handler("auditorium_id"), auditorium_ids)
+        return fetch("auditorium_id", auditorium_ids)
     elif student_ids:
-        return map(get_handler("student_id"), student_ids)
+        return fetch("student_id", student_ids)
 
     raise ValueError("One of the followed required: lecturer_ids, "
                      "auditorium_ids, student_ids, emails")
@@ -69,6 +82,57 @@ def person_lessons(email: str=None,
         :param check_online :type bool - online verification for email.
         :param safe :type bool - return something even if no data received.
     """
+    return get("schedule", **lessons_params(
+        email=email,
+        from_date=from_date,
+        to_date=to_date,
+        receiver_type=receiver_type,
+        lecturer_id=lecturer_id,
+        auditorium_id=auditorium_id,
+        student_id=student_id,
+        **params
+    ))
+
+
+def iter_person_lessons(email: str=None,
+                        from_date: str=get_formated_date(),
+                        to_date: str=get_formated_date(6),  # one week
+                        receiver_type: int=None,
+                        lecturer_id: int=None,
+                        auditorium_id: int=None,
+                        student_id: int=None,
+                        **params) -> Iterator:
+    """
+        Yield lessons one by one while response is received
+
+        See person_lessons for params.
+    """
+    return get("schedule", stream=True, **lessons_params(
+        email=email,
+        from_date=from_date,
+        to_date=to_date,
+        receiver_type=receiver_type,
+        lecturer_id=lecturer_id,
+        auditorium_id=auditorium_id,
+        student_id=student_id,
+        **params
+    ))
+
+
+def lessons_params(email: str=None,
+                   from_date: str=None,
+                   to_date: str=None,
+                   receiver_type: int=None,
+                   lecturer_id: int=None,
+                   auditorium_id: int=None,
+                   student_id: int=None,
+                   **params) -> dict:
+    """
+        Return request params for schedule endpoint
+
+        Detect receiver type (see person_lessons) and map arguments
+        to RUZ API param names.
+    """
     if receiver_type is None:
         if email is not None and not is_student(email):
             logging.debug("Detect lecturer email: '%s'.", email)
@@ -82,8 +146,7 @@ def person_lessons(email: str=None,
     elif receiver_type == 3:
         receiver_type = None
 
-    return get(
-        "schedule",
+    return dict(
         fromDate=from_date,
         toDate=to_date,
         email=email,
@@ -104,6 +167,15 @@ def groups(faculty_id: int=None) -> list:
     return get("groups", facultyOid=faculty_id)
 
 
+def iter_groups(faculty_id: int=None) -> Iterator:
+    """
+        Yield groups one by one while response is received
+
+        :param faculty_id - course ID.
+    """
+    return get("groups", stream=True, facultyOid=faculty_id)
+
+
 def staff_of_group(group_id: int) -> list:
     """
         Return collection of students in group
@@ -113,14 +185,15 @@ def staff_of_group(group_id: int) -> list:
     return get("staffOfGroup", groupOid=group_id)
 
 
-@lru_cache(maxsize=1)
 def streams(reset_cache: bool=False) -> list:
     """
         Return collection of study streams
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("streams")
     return get("streams")
 
 
@@ -133,6 +206,15 @@ def lecturers(chair_id: int=None) -> list:
     return get("lecturers", chairOid=chair_id)
 
 
+def iter_lecturers(chair_id: int=None) -> Iterator:
+    """
+        Yield teachers one by one while response is received
+
+        :param chair_id - ID of department.
+    """
+    return get("lecturers", stream=True, chairOid=chair_id)
+
+
 def auditoriums(building_id: int=None) -> list:
     """
         Return collection of auditoriums
@@ -142,47 +224,60 @@ def auditoriums(building_id: int=None) -> list:
     return get("auditoriums", buildingOid=building_id)
 
 
-@lru_cache(maxsize=1)
+def iter_auditoriums(building_id: int=None) -> Iterator:
+    """
+        Yield auditoriums one by one while response is received
+
+        :param building_id - ID of building.
+    """
+    return get("auditoriums", stream=True, buildingOid=building_id)
+
+
 def type_of_auditoriums(reset_cache: bool=False) -> list:
     """
         Return collection of auditoriums' types
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("typeOfAuditoriums")
     return get("typeOfAuditoriums")
 
 
-@lru_cache(maxsize=1)
 def kind_of_works(reset_cache: bool=False) -> list:
     """
         Return collection of classes' types
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("kindOfWorks")
     return get("kindOfWorks")
 
 
-@lru_cache(maxsize=1)
 def buildings(reset_cache: bool=False) -> list:
     """
         Return collection of buildings
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("buildings")
     return get("buildings")
 
 
-@lru_cache(maxsize=1)
 def faculties(reset_cache: bool=False) -> list:
     """
         Return collection of learning programs
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("faculties")
     return get("faculties")
 
 
@@ -195,14 +290,15 @@ def chairs(faculty_id: int=None) -> list:
     return get("chairs", facultyOid=faculty_id)
 
 
-@lru_cache(maxsize=1)
 def sub_groups(reset_cache: bool=False) -> list:
     """
         Return collection of subgroups
 
         Cache requested values.
-        :param reset - use to reset cached value.
+        :param reset_cache - use to reset cached value.
     """
+    if reset_cache:
+        invalidate("subGroups")
     return get("subGroups")
 
 
@@ -211,10 +307,12 @@ def find_by_str(subject: str or Callable,
                 by: str="name",
                 **params) -> list:
     """
-        Linear search for subject by given text field (as query)
+        Search for subject by given text field (as query)
 
-        Search method is very straightforward. For more complex searches
-        use custom implementation.
+        Search is substring search (case insensitive) with n-gram index,
+        which is built once per subject and rebuilt when data is
+        refreshed (see ruz.search). For more complex searches use
+        custom implementation.
         Throws an exception:
             * KeyError if no subject found.
             * NotImplementedError if method is not implemented for subject.
@@ -258,6 +356,5 @@ def find_by_str(subject: str or Callable,
     elif subject.__name__ not in SUBJECTS.keys():
         raise NotImplementedError(subject.__name__)
 
-    query = query.strip().lower()
-    return [el for el in subject(**params)
-            if query in (el[by].lower().strip() if el[by] else "")]
+    return search(subject(**params), query, by,
+                  name=subject.__name__, params=params)
@@ -0,0 +1,302 @@
+"""
+    Persistent storages for ruz.cache.
+
+    Values are stored as JSON (records are stored as plain objects).
+
+    Usage
+    -----
+    from ruz.backends import SQLiteBackend
+    from ruz.cache import Cache, set_cache
+    set_cache(Cache(backend=SQLiteBackend("ruz.db"), stale_ttl=60 * 60))
+
+    Or set HSE_RUZ_CACHE_URL environment variable to one of:
+    * sqlite:///path/to/ruz.db
+    * file:///path/to/cache/dir
+    * redis://host:port/db
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import socket
+import sqlite3
+import tempfile
+import threading
+from urllib import parse
+
+from ruz.cache import CacheBackend, Entry
+
+
+def _dumps(entry: Entry) -> bytes:
+    return json.dumps(entry.to_dict(), ensure_ascii=False,
+                      default=dict).encode("utf-8")
+
+
+def _loads(data: bytes) -> Entry:
+    return Entry.from_dict(json.loads(data.decode("utf-8")))
+
+
+class SQLiteBackend(CacheBackend):
+    """
+        Store entries in SQLite database
+
+        :param path - path to database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ruz_cache ("
+                "key TEXT PRIMARY KEY, value BLOB, "
+                "fetched_at REAL, ttl REAL)"
+            )
+
+    def get(self, key: str) -> Entry or None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, fetched_at, ttl FROM ruz_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, fetched_at, ttl = row
+        return Entry(json.loads(value.decode("utf-8")), fetched_at, ttl)
+
+    def set(self, key: str, entry: Entry) -> None:
+        value = json.dumps(entry.value, ensure_ascii=False,
+                           default=dict).encode("utf-8")
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ruz_cache VALUES (?, ?, ?, ?)",
+                (key, value, entry.fetched_at, entry.ttl)
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM ruz_cache WHERE key = ?", (key,))
+
+    def keys(self) -> list:
+        with self._lock:
+            return [row[0] for row in
+                    self._db.execute("SELECT key FROM ruz_cache")]
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM ruz_cache")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class FileBackend(CacheBackend):
+    """
+        Store each entry in separate gzip-compressed file
+
+        File names are hashes of keys, files are replaced atomically,
+        so directory can be shared between processes.
+
+        :param path - path to directory (created if not exists).
+        :param compresslevel - gzip compression level.
+    """
+
+    SUFFIX = ".json.gz"
+
+    def __init__(self, path: str, compresslevel: int=6):
+        self.path = path
+        self.compresslevel = compresslevel
+        os.makedirs(path, exist_ok=True)
+
+    def _filename(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + self.SUFFIX)
+
+    @staticmethod
+    def _read(filename: str) -> dict or None:
+        try:
+            with gzip.open(filename, "rb") as file:
+                return json.loads(file.read().decode("utf-8"))
+        except (OSError, EOFError, ValueError):
+            return None
+
+    def get(self, key: str) -> Entry or None:
+        data = self._read(self._filename(key))
+        if data is None or data.get('key') != key:
+            return None
+        return Entry.from_dict(data)
+
+    def set(self, key: str, entry: Entry) -> None:
+        data = entry.to_dict()
+        data['key'] = key
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                    fileobj=raw, mode="wb",
+                    compresslevel=self.compresslevel) as file:
+                file.write(json.dumps(data, ensure_ascii=False,
+                                      default=dict).encode("utf-8"))
+            os.replace(tmp, self._filename(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._filename(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self) -> list:
+        keys = []
+        for filename in glob.glob(os.path.join(self.path,
+                                               "*" + self.SUFFIX)):
+            data = self._read(filename)
+            if data is not None:
+                keys.append(data['key'])
+        return keys
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """
+        Store entries in Redis (or any server speaking Redis protocol)
+
+        Minimal RESP client, no extra dependencies. Redis drops entries
+        `extra_ttl` seconds after they expire (keep them for stale reads).
+
+        :param host - server host.
+        :param port - server port.
+        :param db - database number.
+        :param prefix - prefix for all keys.
+        :param extra_ttl - seconds to keep expired entries.
+        :param timeout - socket timeout in seconds.
+    """
+
+    def __init__(self, host: str="localhost", port: int=6379, db: int=0,
+                 prefix: str="ruz:", extra_ttl: float=24 * 60 * 60,
+                 timeout: float=5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.prefix = prefix
+        self.extra_ttl = extra_ttl
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port),
+                                              self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.db:
+            self._send("SELECT", str(self.db))
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+        self._sock = self._file = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b"*" + str(len(args)).encode() + b"\r\n"]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            parts.append(b"$" + str(len(arg)).encode() + b"\r\n" +
+                         arg + b"\r\n")
+        return b"".join(parts)
+
+    def _reply(self) -> object:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8")
+        if kind == b"-":
+            raise RedisError(rest.decode("utf-8"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            size = int(rest)
+            if size < 0:
+                return None
+            return self._file.read(size + 2)[:-2]
+        if kind == b"*":
+            size = int(rest)
+            return None if size < 0 else [self._reply() for _ in range(size)]
+        raise RedisError("Unknown reply: {!r}".format(line))
+
+    def _send(self, *args) -> object:
+        self._sock.sendall(self._encode(*args))
+        return self._reply()
+
+    def command(self, *args) -> object:
+        """ Send command and return reply (reconnect once on failure) """
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(*args)
+                except OSError:
+                    self._disconnect()
+                    if attempt:
+                        raise
+
+    def get(self, key: str) -> Entry or None:
+        data = self.command("GET", self.prefix + key)
+        return None if data is None else _loads(data)
+
+    def set(self, key: str, entry: Entry) -> None:
+        expire = int((entry.ttl + self.extra_ttl) * 1000)
+        self.command("SET", self.prefix + key, _dumps(entry),
+                     "PX", str(max(expire, 1)))
+
+    def delete(self, key: str) -> None:
+        self.command("DEL", self.prefix + key)
+
+    def keys(self) -> list:
+        # SCAN doesn't block server as KEYS does on large keyspace
+        size, keys, cursor = len(self.prefix), set(), "0"
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix) + "*"
+        while True:
+            cursor, batch = self.command("SCAN", cursor, "MATCH", pattern,
+                                         "COUNT", "1000")
+            keys.update(key.decode("utf-8")[size:] for key in batch)
+            cursor = cursor.decode("utf-8")
+            if cursor == "0":  # keys may be returned more than once
+                return list(keys)
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+
+def backend_from_url(url: str) -> CacheBackend:
+    """
+        Create backend from URL
+
+        :param url - sqlite:///path, file:///path or redis://host:port/db.
+    """
+    parts = parse.urlsplit(url)
+    if parts.scheme == "sqlite":
+        return SQLiteBackend(parts.path)
+    if parts.scheme == "file":
+        return FileBackend(parts.path)
+    if parts.scheme == "redis":
+        return RedisBackend(host=parts.hostname or "localhost",
+                            port=parts.port or 6379,
+                            db=int(parts.path.strip("/") or 0))
+    raise ValueError("Unsupported cache URL: '{}'".format(url))
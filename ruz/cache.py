@@ -0,0 +1,338 @@
+"""
+    Response cache for ruz.utils.get.
+
+    Entries are keyed on endpoint and normalized params and live for
+    a per-endpoint TTL (see CACHE_TTL). Failed and empty responses are
+    cached for NEGATIVE_TTL seconds. Expired entries may be served for
+    STALE_TTL more seconds while they are refreshed in background.
+
+    Entries are stored in memory by default, persistent backends are
+    in ruz.backends (use HSE_RUZ_CACHE_URL to choose one). Errors of
+    backend on lookup and store are logged, requests are made as if
+    the cache were empty.
+
+    Usage
+    -----
+    from ruz import cache
+    cache.invalidate("lecturers")  # drop all cached lecturers
+    cache.set_cache(cache.Cache(maxsize=10000))
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from urllib import parse
+
+from ruz.schema import API_ENDPOINTS
+from ruz.validators import MODES
+
+CACHE_SIZE = int(os.environ.get("HSE_RUZ_CACHE_SIZE", 1024))
+NEGATIVE_TTL = float(os.environ.get("HSE_RUZ_NEGATIVE_TTL", 60))
+STALE_TTL = float(os.environ.get("HSE_RUZ_STALE_TTL", 0))
+CACHE_URL = os.environ.get("HSE_RUZ_CACHE_URL")
+DEFAULT_TTL = 24 * 60 * 60
+
+# time to live (in seconds) for responses of each endpoint
+CACHE_TTL = {
+    'personLessons': 5 * 60,
+    'timetable/lessons': 5 * 60,
+    'staffOfGroup': 60 * 60,
+    'staffOfStreams': 60 * 60,
+    'groups': DEFAULT_TTL,
+    'streams': DEFAULT_TTL,
+    'lecturers': DEFAULT_TTL,
+    'auditoriums': DEFAULT_TTL,
+    'typeOfAuditoriums': DEFAULT_TTL,
+    'kindOfWorks': DEFAULT_TTL,
+    'buildings': DEFAULT_TTL,
+    'faculties': DEFAULT_TTL,
+    'chairs': DEFAULT_TTL,
+    'subGroups': DEFAULT_TTL
+}
+
+
+class Entry:
+    """
+        Cached value with fetch time and time to live
+
+        :param value - cached response.
+        :param fetched_at - timestamp of fetch (time.time()).
+        :param ttl - time to live in seconds.
+    """
+    __slots__ = ("value", "fetched_at", "ttl")
+
+    def __init__(self, value: object, fetched_at: float, ttl: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    def expired(self, now: float=None, grace: float=0) -> bool:
+        now = time.time() if now is None else now
+        return now - self.fetched_at >= self.ttl + grace
+
+    def to_dict(self) -> dict:
+        return {
+            'value': self.value,
+            'fetched_at': self.fetched_at,
+            'ttl': self.ttl
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Entry':
+        return cls(data['value'], data['fetched_at'], data['ttl'])
+
+
+class CacheBackend:
+    """
+        Interface of storage for cache entries
+
+        Backends store Entry objects by string keys and must be
+        thread-safe. Expiration is handled by Cache, backends only may
+        drop entries earlier (e.g. on eviction).
+    """
+
+    def get(self, key: str) -> Entry or None:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: Entry) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def keys(self) -> list:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        for key in self.keys():
+            self.delete(key)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+        Thread-safe in-process storage with LRU eviction
+
+        :param maxsize - max number of entries to keep.
+    """
+
+    def __init__(self, maxsize: int=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Entry or None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Entry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def make_key(endpoint: str, **params) -> str:
+    """
+        Return cache key for request
+
+        Endpoint alias is resolved, params are sorted, so equal requests
+        have equal keys.
+
+        :param endpoint - endpoint (or its alias) for request.
+        :param params - request params.
+    """
+    endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+    if not params:
+        return endpoint
+    return "?".join((endpoint, parse.urlencode(sorted(params.items()))))
+
+
+def variant_key(key: str, records: bool=False,
+                validate: str="off") -> str:
+    """
+        Return key for response variant of request
+
+        Records and responses checked in each validation mode are
+        stored separately, so response validated in a weaker mode
+        (or not at all) is never returned for a stronger one.
+
+        :param key - key made by make_key.
+        :param records - response is converted to records.
+        :param validate - validation mode (see ruz.validators).
+    """
+    if records:
+        key += "#records"
+    if validate != "off":
+        key = "#".join((key, validate))
+    return key
+
+
+def key_endpoint(key: str) -> str:
+    """ Return endpoint of cache key """
+    return key.split("?", 1)[0].split("#", 1)[0]
+
+
+class Cache:
+    """
+        TTL cache for API responses
+
+        :param backend - storage for entries (MemoryBackend by default).
+        :param ttl - {endpoint: seconds} to override CACHE_TTL.
+        :param negative_ttl - time to live of failed or empty responses.
+        :param stale_ttl - serve expired entries for this number of
+            seconds while they are refreshed (stale-while-revalidate).
+        :param maxsize - max number of entries for default backend.
+    """
+
+    def __init__(self, backend: CacheBackend=None, ttl: dict=None,
+                 negative_ttl: float=NEGATIVE_TTL,
+                 stale_ttl: float=STALE_TTL,
+                 maxsize: int=CACHE_SIZE):
+        self.backend = MemoryBackend(maxsize) if backend is None else backend
+        self.ttl = dict(CACHE_TTL)
+        self.ttl.update(ttl or {})
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Entry or None:
+        """
+            Return entry for the key
+
+            Expired entry is returned only within stale_ttl, check
+            entry.expired() to find out it should be refreshed.
+        """
+        try:
+            entry = self.backend.get(key)
+            if entry is None:
+                return None
+            if entry.expired(grace=self.stale_ttl):
+                self.backend.delete(key)
+                return None
+        except Exception as err:
+            logging.warning("Can't get '%s' from cache: %r", key, err)
+            return None
+        return entry
+
+    def begin_refresh(self, key: str) -> bool:
+        """ Mark key as being refreshed, False if it's already marked """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def set(self, key: str, value: object, failed: bool=False) -> None:
+        """
+            Store response for the key
+
+            :param key - key made by make_key.
+            :param value - response to store.
+            :param failed - request was failed (negative caching).
+        """
+        if failed or not value:
+            ttl = self.negative_ttl
+        else:
+            ttl = self.ttl.get(key_endpoint(key), DEFAULT_TTL)
+        if ttl > 0:
+            try:
+                self.backend.set(key, Entry(value, time.time(), ttl))
+            except Exception as err:
+                logging.warning("Can't store '%s' in cache: %r", key, err)
+
+    def invalidate(self, endpoint: str=None, **params) -> None:
+        """
+            Drop cached responses
+
+            :param endpoint - endpoint to drop (all if not set).
+            :param params - drop only response for these params.
+        """
+        if endpoint is not None:
+            endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+        for listener in list(_listeners):
+            listener(endpoint)
+
+        if endpoint is None:
+            self.backend.clear()
+        elif params:
+            key = make_key(endpoint, **params)
+            for records in (False, True):
+                for mode in MODES:
+                    self.backend.delete(variant_key(key, records, mode))
+        else:
+            for key in self.backend.keys():
+                if key_endpoint(key) == endpoint:
+                    self.backend.delete(key)
+
+
+def _default_cache() -> Cache:
+    if not CACHE_URL:
+        return Cache()
+    from ruz.backends import backend_from_url
+    return Cache(backend=backend_from_url(CACHE_URL))
+
+
+_cache = _default_cache()
+_listeners = []
+
+
+def add_listener(listener: Callable) -> None:
+    """
+        Call listener(endpoint) on each invalidation
+
+        Endpoint is None if whole cache is invalidated.
+        Used to drop data derived from cached responses (indexes).
+    """
+    _listeners.append(listener)
+
+
+def get_cache() -> Cache or None:
+    """ Return cache used by ruz.utils.get """
+    return _cache
+
+
+def set_cache(cache: Cache or None) -> Cache or None:
+    """
+        Replace cache used by ruz.utils.get, return the previous one
+
+        :param cache - new cache (None to disable caching).
+    """
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+def invalidate(endpoint: str=None, **params) -> None:
+    """ Drop cached responses, see Cache.invalidate """
+    if _cache is not None:
+        _cache.invalidate(endpoint, **params)
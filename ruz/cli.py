@@ -0,0 +1,311 @@
+"""
+    Command line tool for bulk export of RUZ data to JSONL or CSV.
+
+    Responses are requested concurrently and written as they arrive,
+    progress and throughput are printed to stderr. Failed requests are
+    counted and reported, exit status is 1 if any request failed.
+
+    Usage
+    -----
+    ruz lecturers -o lecturers.csv
+    ruz auditoriums --building 1 2 3 --workers 8
+    ruz schedules --building 1 --from 2018.09.01 --to 2018.12.31 -o rooms.jsonl
+    ruz schedules --faculty 1 --format csv > faculty.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections.abc import Iterator
+from urllib import error
+
+from ruz.api import lessons_params
+from ruz.crawl import iter_faculty_schedules
+from ruz.schema import API_ENDPOINTS, RESPONSE_SCHEMA
+from ruz.utils import (MAX_WORKERS, fetch_request, get_formated_date,
+                       parallel_map)
+
+FORMATS = ("jsonl", "csv")
+RECEIVER = "receiver"
+
+# subcommand: (endpoint, {option: request param})
+COLLECTIONS = {
+    'lecturers': ("lecturers", {'chair': "chairOid"}),
+    'auditoriums': ("auditoriums", {'building': "buildingOid"}),
+    'groups': ("groups", {'faculty': "facultyOid"}),
+    'chairs': ("chairs", {'faculty': "facultyOid"}),
+    'staff-of-group': ("staffOfGroup", {'group': "groupOid"}),
+    'streams': ("streams", {}),
+    'buildings': ("buildings", {}),
+    'faculties': ("faculties", {}),
+    'kind-of-works': ("kindOfWorks", {}),
+    'type-of-auditoriums': ("typeOfAuditoriums", {}),
+    'sub-groups': ("subGroups", {})
+}
+
+# option of schedules: person_lessons param
+RECEIVERS = {
+    'students': "student_id",
+    'lecturers': "lecturer_id",
+    'auditoriums': "auditorium_id",
+    'emails': "email"
+}
+
+
+class JSONLWriter:
+    """ Write rows as JSON lines """
+
+    def __init__(self, file: object, fields: list):
+        self.file = file
+
+    def write(self, row: dict) -> None:
+        self.file.write(json.dumps(row, ensure_ascii=False))
+        self.file.write("\n")
+
+
+class CSVWriter:
+    """ Write rows as CSV with header (fields not in header are skipped) """
+
+    def __init__(self, file: object, fields: list):
+        self._writer = csv.DictWriter(file, fields, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        self._writer.writerow(row)
+
+
+WRITERS = {'jsonl': JSONLWriter, 'csv': CSVWriter}
+
+
+class Progress:
+    """
+        Print number of finished (and failed) requests, rows and throughput
+
+        :param total - expected number of requests (if known).
+        :param stream - file to print to.
+        :param interval - min seconds between updates.
+    """
+
+    def __init__(self, total: int=None, stream: object=None,
+                 interval: float=0.5):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.requests = 0
+        self.failed = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._printed = 0
+
+    def update(self, rows: int, requests: int=1, failed: int=0) -> None:
+        self.requests += requests
+        self.failed += failed
+        self.rows += rows
+        now = time.perf_counter()
+        if self.stream is not None and now - self._printed >= self.interval:
+            self._printed = now
+            self.stream.write("\r" + self.status())
+            self.stream.flush()
+
+    def status(self) -> str:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        done = str(self.requests) if self.total is None else \
+            "{}/{}".format(self.requests, self.total)
+        if self.failed:
+            done += " ({} failed)".format(self.failed)
+        return "{} requests, {} rows in {:.1f}s ({:.1f} req/s, " \
+            "{:.0f} rows/s)".format(done, self.rows, elapsed,
+                                    self.requests / elapsed,
+                                    self.rows / elapsed)
+
+    def finish(self) -> None:
+        if self.stream is not None:
+            self.stream.write("\r" + self.status() + "\n")
+            self.stream.flush()
+
+
+def _ids(value: str) -> int or str:
+    return int(value) if value.isdigit() else value
+
+
+def collection_rows(options: argparse.Namespace,
+                    progress: Progress) -> Iterator:
+    """ Yield rows of collection (requested for each filter value) """
+    endpoint, filters = COLLECTIONS[options.command]
+    option, param = next(((option, param) for option, param
+                          in filters.items()
+                          if getattr(options, option, None)), (None, None))
+    if option is None:
+        progress.total = 1
+        rows, failed = fetch_request(endpoint)
+        yield from rows
+        progress.update(len(rows), failed=int(failed))
+        return
+
+    values = getattr(options, option)
+    progress.total = len(values)
+
+    def fetch(value: int) -> list or None:
+        rows, failed = fetch_request(endpoint, **{param: value})
+        return None if failed else rows
+
+    for value, rows in parallel_map(fetch, values, options.workers,
+                                    ordered=False, default=None):
+        if rows is None:
+            progress.update(0, failed=1)
+            continue
+        for row in rows:
+            yield row if param in row else dict(row, **{param: value})
+        progress.update(len(rows))
+
+
+def schedule_rows(options: argparse.Namespace,
+                  progress: Progress) -> Iterator:
+    """ Yield lessons of requested schedules with receiver column """
+    period = dict(from_date=options.from_date, to_date=options.to_date)
+    if options.faculty is not None:
+        failed_groups = []
+        try:
+            schedules = iter_faculty_schedules(
+                options.faculty, max_workers=options.workers,
+                failed_groups=failed_groups, **period)
+        except error.URLError:  # groups of faculty
+            progress.update(0, failed=1)
+            return
+        # staff requests of groups which failed
+        progress.update(0, requests=len(failed_groups),
+                        failed=len(failed_groups))
+        for members, lessons in schedules:
+            if lessons is None:
+                progress.update(0, failed=1)
+                continue
+            for member in members:
+                for lesson in lessons:
+                    yield dict(lesson, **{RECEIVER: member})
+            progress.update(len(lessons) * len(members))
+        return
+
+    if options.building is not None:
+        rooms, failed = fetch_request("auditoriums",
+                                      buildingOid=options.building)
+        if failed:
+            progress.total = 1
+            progress.update(0, failed=1)
+            return
+        key, values = "auditorium_id", [
+            room['auditoriumOid'] for room in rooms
+            if room.get('auditoriumOid') is not None]
+    else:
+        key, values = next((param, getattr(options, option))
+                           for option, param in RECEIVERS.items()
+                           if getattr(options, option))
+    progress.total = len(values)
+
+    def fetch(value: int or str) -> list or None:
+        lessons, failed = fetch_request("schedule", **lessons_params(
+            **dict(period, **{key: value})))
+        return None if failed else lessons
+
+    for value, lessons in parallel_map(fetch, values, options.workers,
+                                       ordered=False, default=None):
+        if lessons is None:
+            progress.update(0, failed=1)
+            continue
+        for lesson in lessons:
+            yield dict(lesson, **{RECEIVER: value})
+        progress.update(len(lessons))
+
+
+def fields(options: argparse.Namespace) -> list:
+    """ Return columns of output (from RESPONSE_SCHEMA) """
+    if options.command == "schedules":
+        return [RECEIVER] + list(RESPONSE_SCHEMA['schedule'][0])
+    endpoint, filters = COLLECTIONS[options.command]
+    columns = list(RESPONSE_SCHEMA[API_ENDPOINTS[endpoint]][0])
+    return columns + [param for param in filters.values()
+                      if param not in columns]
+
+
+def parse_args(args: list=None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-o", "--output", default="-",
+                        help="file to write to (stdout by default)")
+    common.add_argument("-f", "--format", choices=FORMATS,
+                        help="output format (by extension of output file, "
+                        "jsonl by default)")
+    common.add_argument("-w", "--workers", type=int, default=MAX_WORKERS,
+                        help="number of concurrent requests")
+    common.add_argument("-q", "--quiet", action="store_true",
+                        help="don't print progress")
+
+    parser = argparse.ArgumentParser(prog="ruz",
+                                     description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    for command, (endpoint, filters) in COLLECTIONS.items():
+        sub = commands.add_parser(command, parents=[common],
+                                  help="export {}".format(endpoint))
+        for option, param in filters.items():
+            sub.add_argument("--" + option, type=int, nargs="+",
+                             required=command == "staff-of-group",
+                             help="{} values (requested concurrently)".format(
+                                 param))
+
+    sub = commands.add_parser("schedules", parents=[common],
+                              help="export schedules of many receivers")
+    receivers = sub.add_mutually_exclusive_group(required=True)
+    for option in RECEIVERS:
+        receivers.add_argument("--" + option, type=_ids, nargs="+",
+                               help="IDs (emails) of {}".format(option))
+    receivers.add_argument("--building", type=int,
+                           help="all auditoriums of building")
+    receivers.add_argument("--faculty", type=int,
+                           help="all students of faculty (one request per "
+                           "group, see ruz.crawl)")
+    sub.add_argument("--from", dest="from_date", default=get_formated_date(),
+                     help="start of the period YYYY.MM.DD (today)")
+    sub.add_argument("--to", dest="to_date", default=get_formated_date(6),
+                     help="end of the period YYYY.MM.DD (in a week)")
+
+    options = parser.parse_args(args)
+    if options.format is None:
+        options.format = "csv" if options.output.endswith(".csv") \
+            else "jsonl"
+    return options
+
+
+def export(options: argparse.Namespace, file: object,
+           progress: Progress) -> int:
+    """ Write rows to file, return number of written rows """
+    writer = WRITERS[options.format](file, fields(options))
+    rows = schedule_rows if options.command == "schedules" \
+        else collection_rows
+    count = 0
+    for row in rows(options, progress):
+        writer.write(row)
+        count += 1
+    return count
+
+
+def main(args: list=None) -> int:
+    """ Entry point of `ruz` command (exit status 1 if requests failed) """
+    options = parse_args(args)
+    progress = Progress(stream=None if options.quiet else sys.stderr)
+    if options.output == "-":
+        export(options, sys.stdout, progress)
+    else:
+        with open(options.output, "w", newline="",
+                  encoding="utf-8") as file:
+            export(options, file, progress)
+    progress.finish()
+    if progress.failed:
+        sys.stderr.write("{} of {} requests failed\n".format(
+            progress.failed, progress.requests))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+    Detection of double-booked auditoriums and lecturers.
+
+    Lessons of each auditorium (lecturer) are sorted by date and time
+    and swept once: lessons which haven't ended yet are kept in a heap,
+    each new lesson conflicts with all of them. It takes O(n log n + k)
+    for n lessons and k conflicts.
+
+    The same lesson of several groups or streams (equal date, time,
+    discipline, kind of work, lecturer and auditorium) is not a conflict.
+
+    Usage
+    -----
+    from ruz.conflicts import find_conflicts, schedule_conflicts
+    for conflict in find_conflicts(lessons):  # by auditorium and lecturer
+        conflict.field, conflict.value, conflict.first, conflict.second
+    # check schedules one by one (only one schedule is kept in memory)
+    schedule_conflicts(ruz.schedules(auditorium_ids=ids, max_workers=8,
+                                     ordered=False), "auditoriumOid")
+"""
+
+import heapq
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+from ruz.grouping import time_minutes
+
+FIELDS = ("auditoriumOid", "lecturerOid")
+# lessons equal by these fields are the same event (e.g. lecture of stream)
+EVENT_FIELDS = ("date", "beginLesson", "endLesson", "discipline",
+                "kindOfWork", "lecturerOid", "auditoriumOid")
+
+
+class Conflict:
+    """
+        Overlapping lessons of the same auditorium or lecturer
+
+        :param field - resource field ('auditoriumOid' or 'lecturerOid').
+        :param value - ID of auditorium or lecturer.
+        :param first - lesson which starts earlier.
+        :param second - overlapping lesson.
+    """
+
+    __slots__ = ("field", "value", "first", "second")
+
+    def __init__(self, field: str, value: int, first: dict, second: dict):
+        self.field = field
+        self.value = value
+        self.first = first
+        self.second = second
+
+    @property
+    def date(self) -> str:
+        return self.first['date']
+
+    def __repr__(self) -> str:
+        return "Conflict({}={}, {} {}-{} / {}-{})".format(
+            self.field, self.value, self.date,
+            self.first['beginLesson'], self.first['endLesson'],
+            self.second['beginLesson'], self.second['endLesson'])
+
+
+def _interval(lesson: dict) -> tuple or None:
+    """ Return (date, begin, end) in minutes (None if time is unknown) """
+    day = lesson.get("date")
+    begin, end = lesson.get("beginLesson"), lesson.get("endLesson")
+    if not day or not begin or not end:
+        return None
+    return day, time_minutes(begin), time_minutes(end)
+
+
+def sweep(lessons: Iterable, field: str, value: int=None) -> Iterator:
+    """
+        Yield Conflict for each pair of overlapping lessons
+
+        :param lessons - lessons of one auditorium (lecturer), any order.
+        :param field - resource field of conflicts.
+        :param value - ID of resource (taken from lessons by default).
+    """
+    items, events = [], set()
+    for lesson in lessons:
+        interval = _interval(lesson)
+        if interval is None:
+            continue
+        event = tuple(lesson.get(key) for key in EVENT_FIELDS)
+        if event in events:
+            continue
+        events.add(event)
+        items.append(interval + (len(items), lesson))
+    items.sort()
+
+    active, current = [], None  # heap of (end, seq, lesson)
+    for day, begin, end, seq, lesson in items:
+        if day != current:
+            active, current = [], day
+        while active and active[0][0] <= begin:
+            heapq.heappop(active)
+        for _, _, other in active:
+            yield Conflict(field, lesson.get(field) if value is None
+                           else value, other, lesson)
+        heapq.heappush(active, (end, seq, lesson))
+
+
+def find_conflicts(lessons: Iterable, fields: tuple=FIELDS,
+                   presorted: bool=False) -> Iterator:
+    """
+        Yield conflicts of lessons grouped by each of fields
+
+        :param lessons - lessons of any receivers (e.g. all schedules).
+        :param fields - resource fields to check.
+        :param presorted - lessons are sorted by date, only lessons of
+            the current date are kept in memory (ValueError is raised
+            if earlier date appears).
+    """
+    groups = {field: defaultdict(list) for field in fields}
+
+    def flush() -> Iterator:
+        for field, by_value in groups.items():
+            for value, group in by_value.items():
+                yield from sweep(group, field, value)
+            by_value.clear()
+
+    current = None
+    for lesson in lessons:
+        if presorted:
+            day = lesson.get("date")
+            if current is not None and day is not None and day != current:
+                if day < current:
+                    raise ValueError("Lessons aren't sorted by date: {} "
+                                     "after {}".format(day, current))
+                yield from flush()
+            current = day or current
+        for field in fields:
+            value = lesson.get(field)
+            if value is not None:
+                groups[field][value].append(lesson)
+    yield from flush()
+
+
+def schedule_conflicts(schedules: Iterable, field: str) -> Iterator:
+    """
+        Yield conflicts within each schedule
+
+        :param schedules - schedules of auditoriums (lecturers): lists of
+            lessons or (ID, lessons) pairs (see ruz.schedules).
+        :param field - 'auditoriumOid' for schedules of auditoriums,
+            'lecturerOid' for schedules of lecturers.
+    """
+    for schedule in schedules:
+        value = None
+        if isinstance(schedule, tuple):
+            value, schedule = schedule
+        yield from sweep(schedule, field, value)
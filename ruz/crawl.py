@@ -0,0 +1,198 @@
+"""
+    Faculty-wide schedule crawl with deduplication by group.
+
+    Students of the same group share the timetable, so it's requested
+    for one representative student per group and fanned out to the
+    other members. RUZ API doesn't tell which subgroup a student belongs
+    to, so groups with subgroups (see sub_groups()) are requested per
+    student. Equal lessons of different students are the same objects.
+
+    Schedules are requested bypassing cache. If request of group (or of
+    its students) fails, the group is reported as failed, not as group
+    without lessons. URLError is raised if groups of faculty can't be
+    received.
+
+    Usage
+    -----
+    from ruz.crawl import faculty_schedules
+    schedules = faculty_schedules(faculty_id, "2018.09.01", "2018.09.07")
+    schedules[student_id]   # lessons (shared, don't modify in place)
+    schedules.requests      # number of schedule requests made
+    schedules.failed        # students whose schedule request failed
+    schedules.failed_groups # groups whose students weren't received
+    for student_ids, lessons in iter_faculty_schedules(faculty_id, ...):
+        ...                 # streamed, lessons is None if request failed
+"""
+
+from collections.abc import Iterable, Iterator
+from urllib import error
+
+from ruz.api import lessons_params
+from ruz.utils import MAX_WORKERS, fetch_request, parallel_map
+
+
+class Schedules(dict):
+    """
+        {studentOid: lessons} with crawl statistics
+
+        :param requests - number of schedule requests made.
+        :param groups - number of crawled groups.
+        :param failed - studentOids whose schedules weren't received
+            (they are not in dict).
+        :param failed_groups - groupOids whose students weren't received.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = 0
+        self.groups = 0
+        self.failed = []
+        self.failed_groups = []
+
+
+class LessonPool:
+    """ Return the same object for equal lessons """
+
+    def __init__(self):
+        self._lessons = {}
+
+    def intern(self, lessons: Iterable) -> list:
+        result = []
+        for lesson in lessons:
+            try:
+                key = tuple(sorted(lesson.items()))
+                lesson = self._lessons.setdefault(key, lesson)
+            except TypeError:  # unhashable values
+                pass
+            result.append(lesson)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._lessons)
+
+
+def group_plan(group_ids: Iterable, staff: dict,
+               split_groups: set=frozenset()) -> list:
+    """
+        Return [(representative studentOid, [member studentOids])]
+
+        :param group_ids - groups to crawl.
+        :param staff - {groupOid: students of group (staff_of_group)}.
+        :param split_groups - groups with subgroups (each student is
+            requested separately).
+    """
+    plan = []
+    for group_id in group_ids:
+        members = [student['studentOid'] for student in staff[group_id]
+                   if student.get('studentOid') is not None]
+        if not members:
+            continue
+        if group_id in split_groups:
+            plan.extend((member, [member]) for member in members)
+        else:
+            plan.append((members[0], members))
+    return plan
+
+
+def _request(endpoint: str, **params) -> list:
+    """ Return collection, raise URLError if request fails """
+    data, failed = fetch_request(endpoint, **params)
+    if failed:
+        raise error.URLError("Can't get '{}' {}".format(endpoint, params))
+    return data
+
+
+def _faculty_plan(faculty_id: int, max_workers: int) -> tuple:
+    """
+        Return (groupOids, {representative: members}, failed groupOids)
+
+        Raise URLError if groups or subgroups can't be received.
+    """
+    group_ids = [group['groupOid']
+                 for group in _request("groups", facultyOid=faculty_id)
+                 if group.get('groupOid') is not None]
+    split_groups = {sub_group.get('groupOid')
+                    for sub_group in _request("subGroups")}
+
+    def fetch(group_id: int) -> list:
+        return _request("staffOfGroup", groupOid=group_id)
+
+    staff = {group_id: students for group_id, students in parallel_map(
+        fetch, group_ids, max_workers, ordered=False, default=None)
+        if students is not None}
+    failed = [group_id for group_id in group_ids if group_id not in staff]
+    received = [group_id for group_id in group_ids if group_id in staff]
+    return group_ids, dict(group_plan(received, staff, split_groups)), \
+        failed
+
+
+def _fetch_plan(plan: dict, from_date: str, to_date: str,
+                max_workers: int, params: dict) -> Iterator:
+    def fetch(student_id: int) -> list or None:
+        lessons, failed = fetch_request("schedule", **lessons_params(
+            student_id=student_id, from_date=from_date, to_date=to_date,
+            **params))
+        return None if failed else lessons
+
+    for student_id, lessons in parallel_map(fetch, plan, max_workers,
+                                            ordered=False, default=None):
+        yield plan[student_id], lessons
+
+
+def iter_faculty_schedules(faculty_id: int,
+                           from_date: str,
+                           to_date: str,
+                           max_workers: int=MAX_WORKERS,
+                           failed_groups: list=None,
+                           **params) -> Iterator:
+    """
+        Yield ([studentOids], lessons) as requests are finished
+
+        Lessons are shared by all students of the pair, nothing is
+        kept after pair is yielded. Lessons are None if request failed.
+        See faculty_schedules for params.
+
+        :param failed_groups - list to add groupOids whose students
+            weren't received to (before the first pair is yielded).
+    """
+    _, plan, failed = _faculty_plan(faculty_id, max_workers)
+    if failed_groups is not None:
+        failed_groups.extend(failed)
+    return _fetch_plan(plan, from_date, to_date, max_workers, params)
+
+
+def faculty_schedules(faculty_id: int,
+                      from_date: str,
+                      to_date: str,
+                      max_workers: int=MAX_WORKERS,
+                      **params) -> Schedules:
+    """
+        Return schedules of all students of faculty
+
+        One schedule is requested per group without subgroups,
+        requests are made concurrently. Students whose schedules
+        weren't received are listed in `failed` of result, groups whose
+        students weren't received are in `failed_groups`. Raise URLError
+        if groups of faculty can't be received.
+
+        :param faculty_id, required - faculty (course) ID.
+        :param from_date, required - start of the period YYYY.MM.DD.
+        :param to_date, required - end of the period YYYY.MM.DD.
+        :param max_workers - number of threads to make requests in.
+        :param params - extra params of request (e.g. records,
+            validate), see ruz.utils.fetch_request.
+    """
+    group_ids, plan, failed_groups = _faculty_plan(faculty_id, max_workers)
+    result, pool = Schedules(), LessonPool()
+    result.groups = len(group_ids)
+    result.failed_groups = failed_groups
+    for members, lessons in _fetch_plan(plan, from_date, to_date,
+                                        max_workers, params):
+        result.requests += 1
+        if lessons is None:
+            result.failed.extend(members)
+            continue
+        lessons = pool.intern(lessons)
+        for member in members:
+            result[member] = lessons
+    return result
@@ -0,0 +1,111 @@
+"""
+    JSON decoders for responses.
+
+    The fastest installed decoder is used: orjson, ujson or stdlib json
+    (HSE_RUZ_JSON=orjson|ujson|json selects one explicitly). UTF-8
+    responses are passed to orjson/ujson as received bytes, without
+    intermediate str.
+
+    Usage
+    -----
+    from ruz import decoders
+    decoders.loads(b'[{"lecturerOid": 1}]')
+    decoders.set_decoder("json")
+    decoders.register_decoder("rapidjson", lambda data, encoding:
+                              rapidjson.loads(data.decode(encoding)))
+"""
+
+import codecs
+import json
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+DECODER = os.environ.get("HSE_RUZ_JSON", "auto")
+
+# name: loads(data: bytes, encoding: str), in order of preference
+DECODERS = OrderedDict()
+
+
+def _is_utf8(encoding: str) -> bool:
+    return encoding == "utf-8" or codecs.lookup(encoding).name == "utf-8"
+
+
+def _bytes_decoder(loads: Callable) -> Callable:
+    """ Wrap loads accepting UTF-8 bytes """
+    def decode(data: bytes, encoding: str="utf-8") -> object:
+        if _is_utf8(encoding):
+            return loads(data)
+        return loads(data.decode(encoding))
+    return decode
+
+
+def _json_loads(data: bytes, encoding: str="utf-8") -> object:
+    return json.loads(data.decode(encoding))
+
+
+def register_decoder(name: str, loads: Callable) -> None:
+    """
+        Add decoder (decoders registered later are less preferred)
+
+        :param name - name of decoder.
+        :param loads - function(data: bytes, encoding: str) -> object.
+    """
+    DECODERS[name] = loads
+
+
+if orjson is not None:
+    register_decoder("orjson", _bytes_decoder(orjson.loads))
+if ujson is not None:
+    register_decoder("ujson", _bytes_decoder(ujson.loads))
+register_decoder("json", _json_loads)
+
+
+def _resolve(decoder: str or Callable) -> Callable:
+    if callable(decoder):
+        return decoder
+    if decoder == "auto":
+        return next(iter(DECODERS.values()))
+    if decoder not in DECODERS:
+        raise ValueError("Unknown JSON decoder '{}', available: {}".format(
+            decoder, ", ".join(DECODERS)))
+    return DECODERS[decoder]
+
+
+_decoder = _resolve(DECODER)
+
+
+def get_decoder() -> Callable:
+    """ Return function used to decode responses """
+    return _decoder
+
+
+def set_decoder(decoder: str or Callable) -> Callable:
+    """
+        Replace function used to decode responses, return the previous one
+
+        :param decoder - name of registered decoder ('auto' for the
+            fastest one) or function(data: bytes, encoding: str).
+    """
+    global _decoder
+    previous, _decoder = _decoder, _resolve(decoder)
+    return previous
+
+
+def loads(data: bytes, encoding: str="utf-8") -> object:
+    """
+        Decode JSON response
+
+        :param data - response body.
+        :param encoding - encoding of body.
+    """
+    return _decoder(data, encoding)
@@ -0,0 +1,227 @@
+"""
+    Schedule snapshots and diffs (for change notifications).
+
+    Each lesson gets identity (date, time, discipline, stream/group Oids)
+    and content hash. Snapshot keeps only hashes and values of lessons
+    (tuples in fixed field order), so comparing with new data hashes
+    only new lessons, unchanged lessons are skipped by hash.
+
+    Lessons which differ only by time (same date, discipline and Oids)
+    are reported as changed, not as removed and added.
+
+    Usage
+    -----
+    from ruz.delta import Snapshot, diff
+    snapshot = Snapshot(ruz.person_lessons(student_id=1))
+    ...
+    delta = diff(snapshot, ruz.person_lessons(student_id=1))
+    for change in delta.changed:
+        print(change.new['discipline'], change.fields)  # {field: (old, new)}
+    snapshot = delta.snapshot
+"""
+
+import hashlib
+from collections import OrderedDict, defaultdict
+from collections.abc import Iterable
+
+from ruz.schema import RESPONSE_SCHEMA
+
+IDENTITY_FIELDS = ("date", "beginLesson", "endLesson", "discipline",
+                   "streamOid", "groupOid", "subGroupOid")
+# identity of lesson moved to other time
+LOOSE_FIELDS = tuple(field for field in IDENTITY_FIELDS
+                     if field not in ("beginLesson", "endLesson"))
+LESSON_FIELDS = tuple(RESPONSE_SCHEMA['schedule'][0])
+
+
+def identity(lesson: dict, fields: tuple=IDENTITY_FIELDS) -> tuple:
+    """ Return identity of lesson """
+    get = lesson.get
+    return tuple(get(field) for field in fields)
+
+
+def content_hash(lesson: dict) -> str:
+    """ Return stable hash of lesson content (None values are ignored) """
+    items = sorted((key, value) for key, value in lesson.items()
+                   if value is not None)
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()[:16]
+
+
+def _keys(lessons: Iterable) -> OrderedDict:
+    """ Return {(identity, occurrence): lesson} """
+    counts, result = defaultdict(int), OrderedDict()
+    for lesson in lessons:
+        ident = identity(lesson)
+        result[(ident, counts[ident])] = lesson
+        counts[ident] += 1
+    return result
+
+
+class Snapshot:
+    """
+        Compact state of schedule
+
+        :param lessons - lessons (dicts or records).
+        :param fields - fields to store (schedule fields and extra
+            fields of lessons by default).
+    """
+
+    def __init__(self, lessons: Iterable=(), fields: tuple=None):
+        lessons = _keys(lessons)
+        if fields is None:
+            extra = {key for lesson in lessons.values() for key in lesson
+                     if key not in LESSON_FIELDS}
+            fields = LESSON_FIELDS + tuple(sorted(extra))
+        self.fields = tuple(fields)
+        # {(identity, occurrence): (hash, values)}
+        self.rows = {key: (content_hash(lesson), self._values(lesson))
+                     for key, lesson in lessons.items()}
+
+    def _values(self, lesson: dict) -> tuple:
+        get = lesson.get
+        return tuple(get(field) for field in self.fields)
+
+    def lesson(self, key: tuple) -> dict:
+        """ Restore lesson (without None values) """
+        return {field: value for field, value in
+                zip(self.fields, self.rows[key][1]) if value is not None}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def to_dict(self) -> dict:
+        """ Return JSON-serializable snapshot """
+        return {
+            'fields': list(self.fields),
+            'rows': [[list(ident), count, digest, list(values)]
+                     for (ident, count), (digest, values)
+                     in self.rows.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Snapshot':
+        snapshot = cls(fields=data['fields'])
+        snapshot.rows = {(tuple(ident), count): (digest, tuple(values))
+                         for ident, count, digest, values in data['rows']}
+        return snapshot
+
+
+class Change:
+    """
+        Changed lesson
+
+        :param old - previous version of lesson.
+        :param new - current version of lesson.
+        :param fields - {field: (old value, new value)}.
+    """
+
+    __slots__ = ("old", "new", "fields")
+
+    def __init__(self, old: dict, new: dict, fields: dict):
+        self.old = old
+        self.new = new
+        self.fields = fields
+
+    def __repr__(self) -> str:
+        return "Change({!r})".format(self.fields)
+
+
+class Delta:
+    """
+        Difference between snapshots
+
+        :param added - new lessons.
+        :param removed - lessons which are not in schedule anymore.
+        :param changed - list of Change.
+        :param snapshot - snapshot of new schedule.
+    """
+
+    def __init__(self, added: list, removed: list, changed: list,
+                 snapshot: Snapshot):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.snapshot = snapshot
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self) -> str:
+        return "Delta(added={}, removed={}, changed={})".format(
+            len(self.added), len(self.removed), len(self.changed))
+
+
+def _field_changes(old: dict, new: dict) -> dict:
+    return {field: (old.get(field), new.get(field))
+            for field in set(old) | set(new)
+            if old.get(field) != new.get(field)}
+
+
+def diff(old: Snapshot, lessons: Iterable) -> Delta:
+    """
+        Compare snapshot with current lessons
+
+        :param old - previous snapshot.
+        :param lessons - current lessons.
+    """
+    lessons = _keys(lessons)
+    known = set(old.fields)
+    extra = {key for lesson in lessons.values() for key in lesson
+             if key not in known}
+    new = Snapshot(fields=old.fields + tuple(sorted(extra)))
+    added, changed = [], []
+    for key, lesson in lessons.items():
+        digest = content_hash(lesson)
+        new.rows[key] = (digest, new._values(lesson))
+        previous = old.rows.get(key)
+        if previous is None:
+            added.append(key)
+        elif previous[0] != digest:
+            old_lesson = old.lesson(key)
+            changed.append(Change(old_lesson, lesson,
+                                  _field_changes(old_lesson, lesson)))
+    removed = [key for key in old.rows if key not in new.rows]
+
+    # pair lessons moved to other time
+    candidates = defaultdict(list)
+    for key in removed:
+        candidates[identity(old.lesson(key), LOOSE_FIELDS)].append(key)
+    moved, still_added = set(), []
+    for key in added:
+        lesson = lessons[key]
+        keys = candidates.get(identity(lesson, LOOSE_FIELDS))
+        if not keys:
+            still_added.append(lesson)
+            continue
+        old_key = keys.pop(0)
+        moved.add(old_key)
+        old_lesson = old.lesson(old_key)
+        changed.append(Change(old_lesson, lesson,
+                              _field_changes(old_lesson, lesson)))
+    return Delta(still_added,
+                 [old.lesson(key) for key in removed if key not in moved],
+                 changed, new)
+
+
+class Tracker:
+    """
+        Keep snapshots of schedules by key (e.g. student ID)
+
+        Usage: delta = tracker.update(student_id, lessons)
+    """
+
+    def __init__(self):
+        self.snapshots = {}
+
+    def update(self, key: object, lessons: Iterable) -> Delta:
+        """
+            Compare lessons with previous snapshot and store new one
+
+            All lessons are added on the first update.
+        """
+        previous = self.snapshots.get(key)
+        if previous is None:
+            previous = Snapshot()
+        delta = diff(previous, lessons)
+        self.snapshots[key] = delta.snapshot
+        return delta
@@ -0,0 +1,278 @@
+"""
+    Columnar storage of lessons for analytics (requires numpy).
+
+    Lessons are stored column by column: dates, times and Oids in numpy
+    arrays, strings as codes into per-column dictionaries. Filters and
+    aggregations are vectorized.
+
+    Usage
+    -----
+    from ruz.frame import ScheduleFrame
+    frame = ScheduleFrame.from_schedules(ruz.schedules(
+        auditorium_ids=ids, max_workers=16, ordered=False
+    ))
+    lectures = frame.where(kindOfWork="Лекция")
+    lectures.count("building")            # {('Building',): lessons}
+    frame.sum_duration("lecturerOid", "kindOfWork")  # minutes
+"""
+
+from array import array
+from collections.abc import Iterable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# string columns (dictionary-encoded)
+STRING_COLUMNS = ("discipline", "kindOfWork", "building", "auditorium",
+                  "lecturer", "group", "stream", "subGroup", "key")
+# integer columns (missing values are -1)
+OID_COLUMNS = ("auditoriumOid", "lecturerOid", "groupOid", "streamOid",
+               "subGroupOid", "dayOfWeek")
+# derived numeric columns
+TIME_COLUMNS = ("date", "begin", "end")
+
+MISSING = -1
+
+
+def _minutes(value: str or None) -> int:
+    """ Convert HH:MM to minutes since midnight """
+    if not value:
+        return MISSING
+    hours, _, minutes = value.partition(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _to_datetime64(value: str) -> object:
+    """ Convert RUZ API date (YYYY.MM.DD) to numpy datetime64 """
+    return np.datetime64(value.replace(".", "-"), "D")
+
+
+class FrameBuilder:
+    """
+        Collect lessons into compact columns, build ScheduleFrame
+
+        Columns are accumulated in array.array, so no lesson dicts have
+        to be kept while schedules are received.
+    """
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("numpy is required for ruz.frame "
+                              "(pip install hse_ruz[frame])")
+        self._ints = {name: array("q") for name in
+                      OID_COLUMNS + TIME_COLUMNS}
+        self._codes = {name: array("q") for name in STRING_COLUMNS}
+        self._categories = {name: {} for name in STRING_COLUMNS}
+        self._dates = {}
+        self._times = {}
+
+    def _encode(self, name: str, value: str or None) -> int:
+        if value is None:
+            return MISSING
+        categories = self._categories[name]
+        code = categories.get(value)
+        if code is None:
+            code = categories[value] = len(categories)
+        return code
+
+    def add(self, lessons: Iterable, key: object=None) -> 'FrameBuilder':
+        """
+            Append lessons
+
+            :param lessons - lessons (dicts or records).
+            :param key - receiver of schedule (stored in 'key' column).
+        """
+        ints, codes, times = self._ints, self._codes, self._times
+        key = self._encode("key", key)
+        for lesson in lessons:
+            get = lesson.get
+            for name in OID_COLUMNS:
+                value = get(name)
+                ints[name].append(MISSING if value is None else value)
+            # dates are encoded as strings, converted once in build()
+            date = get('date')
+            code = self._dates.get(date)
+            if code is None:
+                code = self._dates[date] = len(self._dates)
+            ints['date'].append(code)
+            for name, field in (("begin", "beginLesson"),
+                                ("end", "endLesson")):
+                value = get(field)
+                minutes = times.get(value)
+                if minutes is None:
+                    minutes = times[value] = _minutes(value)
+                ints[name].append(minutes)
+            for name in STRING_COLUMNS[:-1]:
+                codes[name].append(self._encode(name, get(name)))
+            codes['key'].append(key)
+        return self
+
+    def add_schedules(self, schedules: Iterable) -> 'FrameBuilder':
+        """
+            Append output of ruz.schedules
+
+            :param schedules - lists of lessons or (key, lessons) pairs.
+        """
+        for schedule in schedules:
+            if isinstance(schedule, tuple):
+                self.add(schedule[1], schedule[0])
+            else:
+                self.add(schedule)
+        return self
+
+    def build(self) -> 'ScheduleFrame':
+        columns = {name: np.array(values, dtype=np.int64)
+                   for name, values in self._ints.items()}
+        dates = np.array([_to_datetime64(date) if date else
+                          np.datetime64("NaT") for date in self._dates],
+                         dtype="datetime64[D]")
+        columns['date'] = dates.take(columns['date']) if len(dates) else \
+            columns['date'].astype("datetime64[D]")
+        for name, values in self._codes.items():
+            columns[name] = np.array(values, dtype=np.int32)
+        categories = {name: np.array(list(values), dtype=object)
+                      for name, values in self._categories.items()}
+        return ScheduleFrame(columns, categories)
+
+
+class ScheduleFrame:
+    """
+        Lessons stored in columns
+
+        :param columns - {name: numpy array}, arrays of equal length.
+        :param categories - {name: array of values} for string columns.
+    """
+
+    def __init__(self, columns: dict, categories: dict):
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def from_lessons(cls, lessons: Iterable) -> 'ScheduleFrame':
+        return FrameBuilder().add(lessons).build()
+
+    @classmethod
+    def from_schedules(cls, schedules: Iterable) -> 'ScheduleFrame':
+        """ Build frame from ruz.schedules output (lists or pairs) """
+        return FrameBuilder().add_schedules(schedules).build()
+
+    def __len__(self) -> int:
+        return len(self.columns['date'])
+
+    def column(self, name: str) -> object:
+        """
+            Return column values as numpy array
+
+            String columns are decoded ('duration' is end - begin).
+        """
+        if name == "duration":
+            return self.columns['end'] - self.columns['begin']
+        values = self.columns[name]
+        if name not in self.categories:
+            return values
+        decoded = self.categories[name].take(np.maximum(values, 0)) \
+            if len(self.categories[name]) else \
+            np.full(len(values), None, dtype=object)
+        decoded[values == MISSING] = None
+        return decoded
+
+    def _code(self, name: str, value: object) -> int:
+        if name in self.categories:
+            if value is None:
+                return MISSING
+            found = np.flatnonzero(self.categories[name] == value)
+            return int(found[0]) if len(found) else MISSING - 1
+        if name == "date":
+            return _to_datetime64(value)
+        return MISSING if value is None else value
+
+    def mask(self, **conditions) -> object:
+        """
+            Return boolean mask of lessons matching all conditions
+
+            Condition value may be a single value or list/set/tuple
+            of values, e.g. mask(kindOfWork="Лекция", lecturerOid=[1, 2]).
+        """
+        result = np.ones(len(self), dtype=bool)
+        for name, value in conditions.items():
+            column = self.column(name) if name == "duration" \
+                else self.columns[name]
+            if isinstance(value, (list, set, tuple, frozenset)):
+                codes = [self._code(name, val) for val in value]
+                result &= np.isin(column, codes)
+            else:
+                result &= column == self._code(name, value)
+        return result
+
+    def filter(self, mask: object) -> 'ScheduleFrame':
+        """ Return frame with lessons selected by boolean mask """
+        return ScheduleFrame({name: values[mask] for name, values in
+                              self.columns.items()}, self.categories)
+
+    def where(self, **conditions) -> 'ScheduleFrame':
+        """ Return frame with lessons matching all conditions (see mask) """
+        return self.filter(self.mask(**conditions))
+
+    def between(self, from_date: str, to_date: str) -> 'ScheduleFrame':
+        """ Return frame with lessons from from_date to to_date inclusive """
+        dates = self.columns['date']
+        return self.filter((dates >= self._code("date", from_date)) &
+                           (dates <= self._code("date", to_date)))
+
+    def _groups(self, names: tuple) -> tuple:
+        if not names:
+            raise ValueError("At least one column required")
+        columns = [self.columns[name].astype(np.int64) for name in names]
+        # combine columns into single int64 key (mixed radix) to use
+        # fast 1-D unique, fall back to unique rows on overflow
+        lows = [int(column.min()) for column in columns]
+        sizes = [int(column.max()) - low + 1
+                 for column, low in zip(columns, lows)]
+        if np.prod(sizes, dtype=float) < 2 ** 62:
+            combined = np.zeros(len(self), dtype=np.int64)
+            for column, low, size in zip(columns, lows, sizes):
+                combined = combined * size + (column - low)
+            unique, inverse = np.unique(combined, return_inverse=True)
+            rows = np.empty((len(unique), len(columns)), dtype=np.int64)
+            for idx in range(len(columns) - 1, -1, -1):
+                unique, rows[:, idx] = np.divmod(unique, sizes[idx])
+                rows[:, idx] += lows[idx]
+            return rows, inverse.reshape(-1)
+        keys = np.stack(columns, axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        return unique, inverse.reshape(-1)
+
+    def _decode_key(self, names: tuple, row: object) -> tuple:
+        key = []
+        for name, value in zip(names, row.tolist()):
+            if name in self.categories:
+                key.append(None if value == MISSING
+                           else self.categories[name][value])
+            elif name == "date":
+                key.append(str(np.datetime64(value, "D")).replace("-", "."))
+            else:
+                key.append(None if value == MISSING else value)
+        return tuple(key)
+
+    def count(self, *names) -> dict:
+        """ Return {(values of columns): number of lessons} """
+        if not len(self):
+            return {}
+        unique, inverse = self._groups(names)
+        counts = np.bincount(inverse, minlength=len(unique))
+        return {self._decode_key(names, row): int(count)
+                for row, count in zip(unique, counts)}
+
+    def sum_duration(self, *names) -> dict:
+        """ Return {(values of columns): total duration in minutes} """
+        if not len(self):
+            return {}
+        unique, inverse = self._groups(names)
+        duration = np.where(self.columns['begin'] == MISSING, 0,
+                            self.column("duration"))
+        totals = np.bincount(inverse, weights=duration,
+                             minlength=len(unique))
+        return {self._decode_key(names, row): int(total)
+                for row, total in zip(unique, totals)}
@@ -0,0 +1,169 @@
+"""
+    Streaming grouping of schedule lessons by one or several keys.
+
+    Lessons are grouped by named keys (day, week, lecturer, auditorium,
+    discipline...), any lesson field or function of lesson. Count and
+    total duration of lessons are computed in the same pass, lessons
+    themselves may be dropped to keep only totals.
+
+    Unsorted input is grouped with hash map (groups are yielded after
+    input is exhausted, in order of first appearance). Input sorted by
+    the key (e.g. schedule by day) is grouped as a stream, each group
+    is yielded as soon as the next one starts.
+
+    Usage
+    -----
+    from ruz.grouping import group_lessons, totals
+    for group in group_lessons(lessons, "week", "discipline"):
+        (week, discipline), group.count, group.minutes, group.lessons
+    totals(lessons, "lecturer")  # {lecturerOid: (count, minutes)}
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def iso_week(date: str) -> str or None:
+    """ Return ISO week of YYYY.MM.DD date as 'YYYY-Www' """
+    if not date:
+        return None
+    year, week, _ = datetime.strptime(date, "%Y.%m.%d").isocalendar()
+    return "{}-W{:02d}".format(year, week)
+
+
+@lru_cache(maxsize=1024)
+def time_minutes(time: str) -> int:
+    """ Return minutes since midnight of HH:MM time """
+    hours, _, minutes = time.partition(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def lesson_minutes(lesson: dict) -> int:
+    """ Return duration of lesson in minutes (0 if time is unknown) """
+    begin, end = lesson.get("beginLesson"), lesson.get("endLesson")
+    if not begin or not end:
+        return 0
+    return max(time_minutes(end) - time_minutes(begin), 0)
+
+
+def _field(name: str) -> Callable:
+    def get(lesson: dict) -> object:
+        return lesson.get(name)
+    return get
+
+
+# named keys: {name: function(lesson)}
+KEYS = {
+    'day': _field("date"),
+    'week': lambda lesson: iso_week(lesson.get("date")),
+    'weekday': _field("dayOfWeek"),
+    'lecturer': _field("lecturerOid"),
+    'auditorium': _field("auditoriumOid"),
+    'building': _field("building"),
+    'discipline': _field("discipline"),
+    'kind': _field("kindOfWork"),
+    'group': _field("groupOid"),
+    'stream': _field("streamOid")
+}
+
+
+def key_function(*keys) -> Callable:
+    """
+        Return function(lesson) -> key (tuple for several keys)
+
+        :param keys - names from KEYS, lesson fields or functions.
+    """
+    if not keys:
+        raise ValueError("At least one key is required")
+    funcs = [key if callable(key) else KEYS.get(key) or _field(key)
+             for key in keys]
+    if len(funcs) == 1:
+        return funcs[0]
+    return lambda lesson: tuple(func(lesson) for func in funcs)
+
+
+class LessonGroup:
+    """
+        Lessons with the same key
+
+        :param key - value of key (tuple for several keys).
+        :param count - number of lessons.
+        :param minutes - total duration of lessons.
+        :param lessons - list of lessons (None if they aren't kept).
+    """
+
+    __slots__ = ("key", "count", "minutes", "lessons")
+
+    def __init__(self, key: object, keep_lessons: bool=True):
+        self.key = key
+        self.count = 0
+        self.minutes = 0
+        self.lessons = [] if keep_lessons else None
+
+    def add(self, lesson: dict) -> None:
+        self.count += 1
+        self.minutes += lesson_minutes(lesson)
+        if self.lessons is not None:
+            self.lessons.append(lesson)
+
+    def __repr__(self) -> str:
+        return "LessonGroup({!r}, count={}, minutes={})".format(
+            self.key, self.count, self.minutes)
+
+
+def group_lessons(lessons: Iterable, *keys,
+                  presorted: bool=False,
+                  keep_lessons: bool=True) -> Iterator:
+    """
+        Yield LessonGroup for each key of lessons
+
+        :param lessons - lessons (dicts or records), e.g. person_lessons.
+        :param keys - names from KEYS, lesson fields or functions
+            ('day' by default).
+        :param presorted - lessons with equal keys are adjacent, groups
+            are yielded as soon as they are complete (ValueError is
+            raised if key appears again).
+        :param keep_lessons - store lessons in groups (only totals
+            otherwise).
+    """
+    key_of = key_function(*(keys or ("day",)))
+    if not presorted:
+        groups = OrderedDict()
+        for lesson in lessons:
+            key = key_of(lesson)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = LessonGroup(key, keep_lessons)
+            group.add(lesson)
+        yield from groups.values()
+        return
+
+    seen, group = set(), None
+    for lesson in lessons:
+        key = key_of(lesson)
+        if group is None or key != group.key:
+            if key in seen:
+                raise ValueError("Lessons aren't sorted by key: {!r} "
+                                 "appeared again".format(key))
+            seen.add(key)
+            if group is not None:
+                yield group
+            group = LessonGroup(key, keep_lessons)
+        group.add(lesson)
+    if group is not None:
+        yield group
+
+
+def totals(lessons: Iterable, *keys) -> dict:
+    """
+        Return {key: (count, minutes)} without keeping lessons
+
+        :param lessons - lessons (dicts or records).
+        :param keys - names from KEYS, lesson fields or functions.
+    """
+    return OrderedDict((group.key, (group.count, group.minutes))
+                       for group in group_lessons(lessons, *keys,
+                                                  keep_lessons=False))
@@ -0,0 +1,221 @@
+"""
+    O(1) lookups in reference collections by Oid/Gid fields.
+
+    Hash maps are built lazily on first use for each (collection, field)
+    and rebuilt when collection is refreshed (its cache TTL is over or
+    it is invalidated in ruz.cache). If collection can't be loaded,
+    previous records are kept and loading is retried after NEGATIVE_TTL.
+
+    Usage
+    -----
+    from ruz import index
+    lecturer = index.lecturer_by_id(lesson['lecturerOid'])
+    building = index.building_by_id(auditorium['buildingOid'])
+"""
+
+import threading
+import time
+from collections.abc import Callable
+
+from ruz.cache import CACHE_TTL, DEFAULT_TTL, NEGATIVE_TTL, add_listener
+from ruz.schema import API_ENDPOINTS, RESPONSE_SCHEMA
+from ruz.utils import fetch_request
+
+# primary key of each reference collection
+ID_FIELDS = {
+    'groups': "groupOid",
+    'streams': "streamOid",
+    'lecturers': "lecturerOid",
+    'auditoriums': "auditoriumOid",
+    'typeOfAuditoriums': "typeOfAuditoriumOid",
+    'kindOfWorks': "kindOfWorkOid",
+    'buildings': "buildingOid",
+    'faculties': "facultyOid",
+    'chairs': "chairOid",
+    'subGroups': "subGroupOid"
+}
+
+
+def id_fields(endpoint: str) -> list:
+    """ Return all *Oid and *Gid fields of collection from RESPONSE_SCHEMA """
+    return [key for key in RESPONSE_SCHEMA[endpoint][0]
+            if key.endswith(("Oid", "Gid"))]
+
+
+class CollectionIndex:
+    """
+        Hash maps over a reference collection
+
+        :param endpoint - collection endpoint (see ID_FIELDS).
+        :param loader - function returning (collection, failed) pair
+            (ruz.utils.fetch_request by default).
+        :param ttl - rebuild index after this number of seconds
+            (endpoint cache TTL by default).
+        :param retry_ttl - seconds to wait before loading collection
+            again if it failed.
+    """
+
+    def __init__(self, endpoint: str, loader: Callable=None,
+                 ttl: float=None, retry_ttl: float=NEGATIVE_TTL):
+        self.endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+        self.fields = id_fields(self.endpoint)
+        self.loader = loader or (lambda: fetch_request(self.endpoint))
+        self.ttl = CACHE_TTL.get(self.endpoint, DEFAULT_TTL) \
+            if ttl is None else ttl
+        self.retry_ttl = retry_ttl
+        self._records = None
+        self._expires = 0
+        self._retry = 0
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def records(self) -> list:
+        """
+            Return collection (reload it if index is expired)
+
+            Previous records (empty list if there are none) are returned
+            while loading fails, it's retried after retry_ttl.
+        """
+        if self._fresh():
+            return self._records
+        with self._lock:
+            if not self._fresh() and time.time() >= self._retry:
+                records, failed = self.loader()
+                if failed:
+                    self._retry = time.time() + self.retry_ttl
+                else:
+                    if records is not self._records:
+                        self._maps = {}
+                        self._records = records
+                    self._expires = time.time() + self.ttl
+            return self._records or []
+
+    def _fresh(self) -> bool:
+        return self._records is not None and time.time() < self._expires
+
+    def map(self, field: str) -> dict:
+        """
+            Return {field value: [records]} map
+
+            :param field - one of *Oid/*Gid fields of collection.
+        """
+        records = self.records()
+        mapping = self._maps.get(field)
+        if mapping is not None:
+            return mapping
+        if field not in self.fields:
+            raise KeyError("'{}' is not indexed for '{}'".format(
+                field, self.endpoint))
+        with self._lock:
+            if records is not self._records:
+                records = self._records or []
+            mapping = {}
+            for record in records:
+                mapping.setdefault(record.get(field), []).append(record)
+            self._maps[field] = mapping
+        return mapping
+
+    def find(self, field: str, value: int) -> list:
+        """ Return all records with field equal to value """
+        return self.map(field).get(value, [])
+
+    def lookup(self, value: int, field: str=None) -> dict or None:
+        """
+            Return first record with field equal to value (or None)
+
+            :param value - value to find.
+            :param field - field to search by (primary key by default).
+        """
+        records = self.map(field or ID_FIELDS[self.endpoint]).get(value)
+        return records[0] if records else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._records = None
+            self._retry = 0
+            self._maps = {}
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_index(endpoint: str) -> CollectionIndex:
+    """ Return shared index for collection """
+    endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+    index = _indexes.get(endpoint)
+    if index is None:
+        with _lock:
+            index = _indexes.setdefault(endpoint, CollectionIndex(endpoint))
+    return index
+
+
+def _on_invalidate(endpoint: str or None) -> None:
+    for name, index in list(_indexes.items()):
+        if endpoint is None or name == endpoint:
+            index.invalidate()
+
+
+add_listener(_on_invalidate)
+
+
+def find(endpoint: str, field: str, value: int) -> list:
+    """
+        Return all records of collection with field equal to value
+
+        :param endpoint - collection endpoint (e.g. 'lecturers').
+        :param field - *Oid or *Gid field (e.g. 'chairOid').
+        :param value - value to find.
+    """
+    return get_index(endpoint).find(field, value)
+
+
+def lookup(endpoint: str, value: int, field: str=None) -> dict or None:
+    """
+        Return record of collection by Oid (or by other *Oid/*Gid field)
+
+        :param endpoint - collection endpoint (e.g. 'lecturers').
+        :param value - value to find.
+        :param field - field to search by (primary key by default).
+    """
+    return get_index(endpoint).lookup(value, field)
+
+
+def group_by_id(oid: int) -> dict or None:
+    return lookup("groups", oid)
+
+
+def stream_by_id(oid: int) -> dict or None:
+    return lookup("streams", oid)
+
+
+def lecturer_by_id(oid: int) -> dict or None:
+    return lookup("lecturers", oid)
+
+
+def auditorium_by_id(oid: int) -> dict or None:
+    return lookup("auditoriums", oid)
+
+
+def type_of_auditorium_by_id(oid: int) -> dict or None:
+    return lookup("typeOfAuditoriums", oid)
+
+
+def kind_of_work_by_id(oid: int) -> dict or None:
+    return lookup("kindOfWorks", oid)
+
+
+def building_by_id(oid: int) -> dict or None:
+    return lookup("buildings", oid)
+
+
+def faculty_by_id(oid: int) -> dict or None:
+    return lookup("faculties", oid)
+
+
+def chair_by_id(oid: int) -> dict or None:
+    return lookup("chairs", oid)
+
+
+def sub_group_by_id(oid: int) -> dict or None:
+    return lookup("subGroups", oid)
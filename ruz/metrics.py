@@ -0,0 +1,362 @@
+"""
+    Request metrics: counters and histograms per endpoint.
+
+    Metrics are collected only when enabled (HSE_RUZ_METRICS=1 or
+    enable()), disabled instrumentation costs a single flag check.
+
+    Collected metrics (labeled by endpoint):
+    * ruz_requests_total - requests made to RUZ API;
+    * ruz_errors_total - failed requests (by error type);
+    * ruz_request_seconds - request latency (including decoding);
+    * ruz_response_bytes - size of responses (decompressed);
+    * ruz_wire_bytes_total, ruz_decoded_bytes_total - received and
+      decompressed bytes (by content encoding, shows savings of
+      compression);
+    * ruz_records_total - number of decoded elements;
+    * ruz_cache_hits_total, ruz_cache_misses_total - response cache lookups;
+    * ruz_retries_total, ruz_hedges_total - retried and hedged requests;
+    * ruz_coalesced_total - calls which joined identical in-flight request.
+
+    Usage
+    -----
+    from ruz import metrics
+    metrics.enable()
+    ruz.person_lessons(student_id=1)
+    print(metrics.render())  # Prometheus text format
+    metrics.add_sink(lambda name, labels, value: statsd.send(...))
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+
+ENABLED = os.environ.get("HSE_RUZ_METRICS", "").lower() in ("1", "true",
+                                                            "yes", "on")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = tuple(256 * 4 ** power for power in range(10))  # 256b-64Mb
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n") \
+        .replace('"', r'\"')
+
+
+def _format_labels(labels: tuple, extra: str=None) -> str:
+    parts = ['{}="{}"'.format(key, _escape(value)) for key, value in labels]
+    if extra is not None:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    """
+        Monotonic counter with labels
+
+        :param name - metric name.
+        :param help - metric description.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str=""):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple=(), value: float=1) -> None:
+        """
+            Increase counter
+
+            :param labels - sorted ((label, value), ...) pairs.
+            :param value - amount to add.
+        """
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self) -> list:
+        """ Return [(name, labels text, value)] """
+        with self._lock:
+            values = sorted(self.values.items())
+        return [(self.name, _format_labels(labels), value)
+                for labels, value in values]
+
+
+class Histogram:
+    """
+        Histogram with cumulative buckets (as in Prometheus)
+
+        :param name - metric name.
+        :param help - metric description.
+        :param buckets - sorted upper bounds of buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str="",
+                 buckets: tuple=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels: [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple=(), value: float=0) -> None:
+        """
+            Add observation
+
+            :param labels - sorted ((label, value), ...) pairs.
+            :param value - observed value.
+        """
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = \
+                    [[0] * (len(self.buckets) + 1), 0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        state = self.values.get(tuple(sorted(labels.items())))
+        return 0 if state is None else state[2]
+
+    def sum(self, **labels) -> float:
+        state = self.values.get(tuple(sorted(labels.items())))
+        return 0 if state is None else state[1]
+
+    def samples(self) -> list:
+        """ Return [(name, labels text, value)] """
+        with self._lock:
+            values = sorted((labels, (counts[:], total, count))
+                            for labels, (counts, total, count)
+                            in self.values.items())
+        samples = []
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                samples.append((
+                    self.name + "_bucket",
+                    _format_labels(labels, 'le="{}"'.format(
+                        _format_value(bound))),
+                    cumulative
+                ))
+            samples.append((self.name + "_sum", _format_labels(labels),
+                            total))
+            samples.append((self.name + "_count", _format_labels(labels),
+                            count))
+        return samples
+
+
+class Registry:
+    """
+        Collection of metrics and sinks
+
+        Sinks are called on each update with (name, labels, value),
+        where labels is a dict (e.g. to forward values to StatsD).
+        Errors of sinks are logged and don't affect requests.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.sinks = []
+
+    def register(self, metric: Counter or Histogram) -> Counter or Histogram:
+        if metric.name in self.metrics:
+            raise ValueError("Metric '{}' already registered".format(
+                metric.name))
+        self.metrics[metric.name] = metric
+        return metric
+
+    def __getitem__(self, name: str) -> Counter or Histogram:
+        return self.metrics[name]
+
+    def _notify(self, name: str, labels: tuple, value: float) -> None:
+        for sink in self.sinks:
+            try:
+                sink(name, dict(labels), value)
+            except Exception as err:
+                logging.warning("Metrics sink %r failed: %r", sink, err)
+
+    def inc(self, name: str, value: float=1, **labels) -> None:
+        """ Increase counter by value """
+        labels = tuple(sorted(labels.items()))
+        self.metrics[name].inc(labels, value)
+        if self.sinks:
+            self._notify(name, labels, value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """ Add observation to histogram """
+        labels = tuple(sorted(labels.items()))
+        self.metrics[name].observe(labels, value)
+        if self.sinks:
+            self._notify(name, labels, value)
+
+    def clear(self) -> None:
+        """ Drop collected values (metrics stay registered) """
+        for metric in self.metrics.values():
+            with metric._lock:
+                metric.values.clear()
+
+    def render(self) -> str:
+        """ Return metrics in Prometheus text exposition format """
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            samples = metric.samples()
+            if not samples:
+                continue
+            if metric.help:
+                lines.append("# HELP {} {}".format(name, _escape(
+                    metric.help)))
+            lines.append("# TYPE {} {}".format(name, metric.kind))
+            for sample_name, labels, value in samples:
+                lines.append("{}{} {}".format(sample_name, labels,
+                                              _format_value(value)))
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def default_registry() -> Registry:
+    """ Return registry with all metrics collected by ruz """
+    registry = Registry()
+    registry.register(Counter("ruz_requests_total",
+                              "Requests made to RUZ API"))
+    registry.register(Counter("ruz_errors_total",
+                              "Failed requests to RUZ API"))
+    registry.register(Histogram("ruz_request_seconds",
+                                "Latency of requests (including decoding)"))
+    registry.register(Histogram("ruz_response_bytes", "Size of responses",
+                                SIZE_BUCKETS))
+    registry.register(Counter("ruz_wire_bytes_total",
+                              "Bytes of response bodies received"))
+    registry.register(Counter("ruz_decoded_bytes_total",
+                              "Bytes of response bodies after decompression"))
+    registry.register(Counter("ruz_records_total",
+                              "Number of decoded response elements"))
+    registry.register(Counter("ruz_cache_hits_total",
+                              "Responses found in cache"))
+    registry.register(Counter("ruz_cache_misses_total",
+                              "Responses not found in cache"))
+    registry.register(Counter("ruz_retries_total",
+                              "Retries of failed requests"))
+    registry.register(Counter("ruz_hedges_total",
+                              "Hedged (duplicate) requests"))
+    registry.register(Counter(
+        "ruz_coalesced_total",
+        "Calls which joined identical in-flight request"))
+    return registry
+
+
+_registry = default_registry()
+
+
+def get_registry() -> Registry:
+    """ Return registry used by ruz """
+    return _registry
+
+
+def set_registry(registry: Registry) -> Registry:
+    """ Set registry used by ruz, return previous one """
+    global _registry
+    previous, _registry = _registry, registry
+    return previous
+
+
+def enable() -> None:
+    """ Start collecting metrics """
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    """ Stop collecting metrics (collected values are kept) """
+    global ENABLED
+    ENABLED = False
+
+
+def add_sink(sink: Callable) -> None:
+    """ Call sink(name, labels, value) on each update """
+    _registry.sinks.append(sink)
+
+
+def remove_sink(sink: Callable) -> None:
+    _registry.sinks.remove(sink)
+
+
+def render() -> str:
+    """ Return collected metrics in Prometheus text format """
+    return _registry.render()
+
+
+def inc(name: str, value: float=1, **labels) -> None:
+    _registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    _registry.observe(name, value, **labels)
+
+
+def count_records(data: object) -> int:
+    """ Return number of elements in decoded response """
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and isinstance(data.get("Lessons"), list):
+        return len(data['Lessons'])
+    return 1
+
+
+def record_request(endpoint: str, started: float, size: int=None,
+                   records: int=None, error: BaseException=None) -> None:
+    """
+        Record finished request
+
+        :param endpoint - endpoint of request.
+        :param started - time.perf_counter() value at start of request.
+        :param size - size of response in bytes.
+        :param records - number of decoded elements.
+        :param error - exception request failed with.
+    """
+    registry = _registry
+    registry.inc("ruz_requests_total", endpoint=endpoint)
+    registry.observe("ruz_request_seconds", time.perf_counter() - started,
+                     endpoint=endpoint)
+    if error is not None:
+        registry.inc("ruz_errors_total", endpoint=endpoint,
+                     type=type(error).__name__)
+    if size is not None:
+        registry.observe("ruz_response_bytes", size, endpoint=endpoint)
+    if records:
+        registry.inc("ruz_records_total", records, endpoint=endpoint)
+
+
+def record_cache(endpoint: str, hit: bool) -> None:
+    """ Record cache lookup """
+    _registry.inc("ruz_cache_hits_total" if hit else
+                  "ruz_cache_misses_total", endpoint=endpoint)
+
+
+def record_transfer(encoding: str or None, wire: int, decoded: int) -> None:
+    """
+        Record size of response body before and after decompression
+
+        :param encoding - content encoding of response (None for identity).
+        :param wire - number of received bytes.
+        :param decoded - number of decompressed bytes.
+    """
+    encoding = encoding or "identity"
+    _registry.inc("ruz_wire_bytes_total", wire, encoding=encoding)
+    _registry.inc("ruz_decoded_bytes_total", decoded, encoding=encoding)
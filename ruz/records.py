@@ -0,0 +1,182 @@
+"""
+    Compact record types for API responses.
+
+    Record classes are generated from RESPONSE_SCHEMA and use __slots__
+    instead of per-object dicts. String values are interned, so
+    repeated values (building, discipline, lecturer...) are stored once.
+    Records are read-only mappings, dict-style access keeps working:
+
+        lesson = ruz.utils.get("schedule", records=True, ...)[0]
+        lesson['discipline'] == lesson.discipline
+        lesson.day  # datetime.date, parsed on first access
+"""
+
+import sys
+from collections.abc import Mapping
+from datetime import datetime
+
+from ruz.schema import API_ENDPOINTS, RESPONSE_SCHEMA
+
+# record class names for RESPONSE_SCHEMA keys
+RECORD_NAMES = {
+    'schedule': "Lesson",
+    'groups': "Group",
+    'staffOfGroup': "Student",
+    'streams': "Stream",
+    'staffOfStreams': "StreamStaff",
+    'lecturers': "Lecturer",
+    'auditoriums': "Auditorium",
+    'typeOfAuditoriums': "TypeOfAuditorium",
+    'kindOfWorks': "KindOfWork",
+    'buildings': "Building",
+    'faculties': "Faculty",
+    'chairs': "Chair",
+    'subGroups': "SubGroup"
+}
+
+_MISSING = object()
+
+
+class Record(Mapping):
+    """
+        Base class of records: read-only mapping over slots
+
+        Keys which are not in schema are kept in `_extra` dict.
+
+        :param data - decoded JSON object.
+    """
+    __slots__ = ("_extra",)
+    _fields = ()
+    _field_set = frozenset()
+
+    def __init__(self, data: dict):
+        intern, extra = sys.intern, None
+        field_set = self._field_set
+        for key, value in data.items():
+            if type(value) is str:
+                value = intern(value)
+            if key in field_set:
+                object.__setattr__(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        object.__setattr__(self, "_extra", extra)
+
+    def __getitem__(self, key: str) -> object:
+        if key in self._field_set:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> iter:
+        for key in self._fields:
+            if hasattr(self, key):
+                yield key
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __setattr__(self, key: str, value: object) -> None:
+        raise AttributeError("Records are read-only")
+
+    def __reduce__(self) -> tuple:
+        return self.__class__, (self.to_dict(),)
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(self.__class__.__name__, self.to_dict())
+
+
+def _lazy(field: str, slot: str, parse: object) -> property:
+    def getter(self: Record) -> object:
+        value = getattr(self, slot, _MISSING)
+        if value is _MISSING:
+            raw = getattr(self, field, None)
+            value = parse(raw) if raw else None
+            object.__setattr__(self, slot, value)
+        return value
+    getter.__name__ = slot.lstrip("_")
+    getter.__doc__ = "'{}' parsed on first access".format(field)
+    return property(getter)
+
+
+def _parse_date(value: str) -> object:
+    return datetime.strptime(value, "%Y.%m.%d").date()
+
+
+def _parse_time(value: str) -> object:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+# lazily parsed attributes: {field: (attribute, parser)}
+LAZY_FIELDS = {
+    'date': ("day", _parse_date),
+    'beginLesson': ("begin", _parse_time),
+    'endLesson': ("end", _parse_time)
+}
+
+
+def make_record_type(name: str, schema: dict) -> type:
+    """
+        Create record class for schema of single element
+
+        :param name - class name.
+        :param schema - {field: type} from RESPONSE_SCHEMA.
+    """
+    fields = tuple(schema)
+    namespace = {
+        '__module__': __name__,
+        '__slots__': fields,
+        '_fields': fields,
+        '_field_set': frozenset(fields)
+    }
+    for field, (attr, parse) in LAZY_FIELDS.items():
+        if field in schema:
+            namespace['__slots__'] += ("_" + attr,)
+            namespace[attr] = _lazy(field, "_" + attr, parse)
+    return type(name, (Record,), namespace)
+
+
+RECORD_TYPES = {}
+for _key, _name in RECORD_NAMES.items():
+    RECORD_TYPES[_key] = make_record_type(_name, RESPONSE_SCHEMA[_key][0])
+    globals()[_name] = RECORD_TYPES[_key]
+del _key, _name
+
+
+def record_type(endpoint: str) -> type or None:
+    """ Return record class for endpoint (or its alias) """
+    endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+    if endpoint in ("personLessons", "timetable/lessons"):
+        endpoint = "schedule"
+    return RECORD_TYPES.get(endpoint)
+
+
+def to_records(endpoint: str, data: list or dict) -> list or dict:
+    """
+        Convert decoded response to records
+
+        Already converted data is returned as is. API v2 schedule
+        envelope ({'Lessons': [...], ...}) is converted in place.
+
+        :param endpoint - endpoint (or its alias) of response.
+        :param data - decoded response.
+    """
+    cls = record_type(endpoint)
+    if cls is None:
+        return data
+    if isinstance(data, dict) and isinstance(data.get("Lessons"), list):
+        data['Lessons'] = to_records(endpoint, data['Lessons'])
+        return data
+    if not isinstance(data, list) or not data or \
+            isinstance(data[0], Record):
+        return data
+    return [cls(el) if isinstance(el, dict) else el for el in data]
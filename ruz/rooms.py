@@ -0,0 +1,262 @@
+"""
+    Free auditorium finder.
+
+    Schedules of all auditoriums of building are requested concurrently,
+    busy time of each auditorium is kept per date as sorted list of
+    disjoint intervals (overlapping lessons are merged), so checking if
+    auditorium is free takes O(log n) with binary search.
+
+    Schedule of single auditorium can be refreshed (or replaced with
+    known lessons), intervals of other auditoriums are kept. If request
+    of schedule fails, previous intervals are kept; auditoriums whose
+    schedules were never received are not reported as free.
+
+    Usage
+    -----
+    from ruz.rooms import RoomIndex
+    rooms = RoomIndex(building_id, "2018.09.03", "2018.09.09").load()
+    rooms.free_rooms("2018.09.04", "10:30", "12:00", room_type="Лекционная")
+    rooms.refresh([auditorium_id])  # returns auditoriums that changed
+"""
+
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, time
+
+from ruz.api import auditoriums, lessons_params, type_of_auditoriums
+from ruz.grouping import time_minutes
+from ruz.utils import (MAX_WORKERS, fetch_request, get_formated_date,
+                       parallel_map)
+
+
+def _date(value: str or date) -> str:
+    if isinstance(value, date):
+        return value.strftime("%Y.%m.%d")
+    return value
+
+
+def _minutes(value: str or time) -> int:
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    return time_minutes(value)
+
+
+class Intervals:
+    """
+        Sorted disjoint intervals (overlapping ones are merged)
+
+        :param intervals - (begin, end) pairs in minutes.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable=()):
+        self.starts, self.ends = [], []
+        for begin, end in sorted(intervals):
+            if self.ends and begin <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(begin)
+                self.ends.append(end)
+
+    def is_free(self, begin: int, end: int) -> bool:
+        """ Return True if [begin, end) doesn't overlap any interval """
+        idx = bisect_right(self.ends, begin)  # first interval ending later
+        return idx == len(self.ends) or self.starts[idx] >= end
+
+    def free_slots(self, begin: int, end: int) -> list:
+        """ Return free (begin, end) intervals within [begin, end) """
+        slots, idx = [], bisect_right(self.ends, begin)
+        while begin < end:
+            if idx == len(self.starts) or self.starts[idx] >= end:
+                slots.append((begin, end))
+                break
+            if self.starts[idx] > begin:
+                slots.append((begin, self.starts[idx]))
+            begin = self.ends[idx]
+            idx += 1
+        return slots
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Intervals) and \
+            (self.starts, self.ends) == (other.starts, other.ends)
+
+
+def busy_intervals(lessons: Iterable) -> dict:
+    """ Return {date: Intervals} of lessons """
+    by_date = defaultdict(list)
+    for lesson in lessons:
+        begin, end = lesson.get("beginLesson"), lesson.get("endLesson")
+        if lesson.get("date") and begin and end:
+            by_date[lesson['date']].append((time_minutes(begin),
+                                            time_minutes(end)))
+    return {day: Intervals(intervals) for day, intervals in by_date.items()}
+
+
+class RoomIndex:
+    """
+        Busy time of auditoriums for period
+
+        :param building_id - ID of building (all auditoriums if None).
+        :param from_date - start of the period YYYY.MM.DD (today).
+        :param to_date - end of the period YYYY.MM.DD (in a week).
+        :param max_workers - number of threads to request schedules in.
+    """
+
+    def __init__(self, building_id: int=None, from_date: str=None,
+                 to_date: str=None, max_workers: int=MAX_WORKERS):
+        self.building_id = building_id
+        self.from_date = from_date or get_formated_date()
+        self.to_date = to_date or get_formated_date(6)
+        self.max_workers = max_workers
+        self.rooms = {}  # {auditoriumOid: auditorium}
+        self.failed = set()  # auditoriumOids of failed requests
+        self._busy = {}  # {auditoriumOid: {date: Intervals}}
+        self._lock = threading.Lock()
+
+    def load(self) -> 'RoomIndex':
+        """ Request auditoriums of building and their schedules """
+        self.rooms = {room['auditoriumOid']: room
+                      for room in auditoriums(self.building_id)
+                      if room.get('auditoriumOid') is not None}
+        self.refresh()
+        return self
+
+    def _fetch(self, auditorium_id: int) -> list or None:
+        lessons, failed = fetch_request("schedule", **lessons_params(
+            auditorium_id=auditorium_id, from_date=self.from_date,
+            to_date=self.to_date))
+        return None if failed else lessons
+
+    def update(self, auditorium_id: int, lessons: Iterable) -> bool:
+        """
+            Replace schedule of auditorium, return True if it changed
+
+            :param auditorium_id - ID of auditorium.
+            :param lessons - lessons of auditorium for the period.
+        """
+        busy = busy_intervals(lessons)
+        with self._lock:
+            changed = self._busy.get(auditorium_id) != busy
+            self._busy[auditorium_id] = busy
+            self.failed.discard(auditorium_id)
+        return changed
+
+    def refresh(self, auditorium_ids: Iterable=None) -> list:
+        """
+            Request schedules again, return IDs of changed auditoriums
+
+            Auditoriums whose requests failed keep previous intervals
+            and are added to `failed`.
+
+            :param auditorium_ids - auditoriums to refresh (all by default).
+        """
+        if auditorium_ids is None:
+            auditorium_ids = list(self.rooms)
+        changed = []
+        for auditorium_id, lessons in parallel_map(
+                self._fetch, auditorium_ids, self.max_workers,
+                ordered=False, default=None):
+            if lessons is None:
+                with self._lock:
+                    self.failed.add(auditorium_id)
+            elif self.update(auditorium_id, lessons):
+                changed.append(auditorium_id)
+        return changed
+
+    def _check_date(self, day: str) -> None:
+        if not self.from_date <= day <= self.to_date:
+            raise ValueError("Date {} is out of indexed period {}-{}".format(
+                day, self.from_date, self.to_date))
+
+    def type_ids(self, room_type: int or str) -> set:
+        """
+            Return typeOfAuditoriumOid of type given by ID, name or abbr
+
+            :param room_type - ID, name or abbreviation of type.
+        """
+        return {kind['typeOfAuditoriumOid'] for kind in type_of_auditoriums()
+                if room_type in (kind.get('typeOfAuditoriumOid'),
+                                 kind.get('name'), kind.get('abbr'))}
+
+    def is_free(self, auditorium_id: int, day: str or date,
+                begin: str or time, end: str or time) -> bool:
+        """
+            Return True if auditorium has no lessons in [begin, end)
+
+            False is returned if schedule of auditorium wasn't received.
+
+            :param auditorium_id - ID of auditorium.
+            :param day - date YYYY.MM.DD.
+            :param begin - start of period HH:MM.
+            :param end - end of period HH:MM.
+        """
+        day = _date(day)
+        self._check_date(day)
+        busy = self._busy.get(auditorium_id)
+        if busy is None:
+            return False
+        intervals = busy.get(day)
+        return intervals is None or intervals.is_free(_minutes(begin),
+                                                      _minutes(end))
+
+    def free_rooms(self, day: str or date, begin: str or time,
+                   end: str or time, room_type: int or str=None) -> list:
+        """
+            Return auditoriums which are free in [begin, end) on day
+
+            Auditoriums whose schedules weren't received are skipped.
+
+            :param day - date YYYY.MM.DD.
+            :param begin - start of period HH:MM.
+            :param end - end of period HH:MM.
+            :param room_type - ID, name or abbreviation of auditorium
+                type (see type_of_auditoriums), any type by default.
+        """
+        day = _date(day)
+        self._check_date(day)
+        begin, end = _minutes(begin), _minutes(end)
+        rooms = self.rooms.values()
+        if room_type is not None:
+            type_ids = self.type_ids(room_type)
+            rooms = [room for room in rooms
+                     if room.get('TypeOfAuditoriumOid') in type_ids]
+        result = []
+        for room in rooms:
+            busy = self._busy.get(room['auditoriumOid'])
+            if busy is None:
+                continue
+            intervals = busy.get(day)
+            if intervals is None or intervals.is_free(begin, end):
+                result.append(room)
+        return result
+
+    def free_slots(self, auditorium_id: int, day: str or date,
+                   begin: str or time="00:00",
+                   end: str or time="23:59") -> list:
+        """
+            Return free (begin, end) periods of auditorium as HH:MM pairs
+
+            Empty list is returned if schedule of auditorium wasn't
+            received.
+
+            :param auditorium_id - ID of auditorium.
+            :param day - date YYYY.MM.DD.
+            :param begin - start of period HH:MM.
+            :param end - end of period HH:MM.
+        """
+        day = _date(day)
+        self._check_date(day)
+        busy = self._busy.get(auditorium_id)
+        if busy is None:
+            return []
+        intervals = busy.get(day, Intervals())
+        return [tuple("{:02d}:{:02d}".format(*divmod(value, 60))
+                      for value in slot)
+                for slot in intervals.free_slots(_minutes(begin),
+                                                 _minutes(end))]
@@ -0,0 +1,180 @@
+"""
+    Schedule cache storing lessons by day.
+
+    Only days of requested period which are not cached yet (or expired)
+    are requested from API, so sliding windows (today, this week,
+    next week...) mostly hit the cache.
+
+    Usage
+    -----
+    from ruz.schedule_cache import ScheduleCache
+    schedule = ScheduleCache()
+    schedule.person_lessons(student_id=1, from_date="2018.06.04",
+                            to_date="2018.06.10")
+
+    failed = []             # (from_date, to_date) of failed requests
+    schedule.person_lessons(student_id=1, failed=failed)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+from ruz.api import lessons_params
+from ruz.cache import CACHE_SIZE, CACHE_TTL
+from ruz.utils import fetch, get_formated_date, is_valid_schema, make_url
+
+DATE_FORMAT = "%Y.%m.%d"
+
+
+def parse_date(value: str) -> date:
+    """ Convert RUZ API date (YYYY.MM.DD) to datetime.date """
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def format_date(value: date) -> str:
+    """ Convert datetime.date to RUZ API date (YYYY.MM.DD) """
+    return value.strftime(DATE_FORMAT)
+
+
+def missing_ranges(days: dict, from_date: date, to_date: date,
+                   expires: float=None) -> list:
+    """
+        Return list of (first, last) periods of days which aren't cached
+
+        :param days - {date: (fetched_at, lessons)}.
+        :param from_date - first day of period.
+        :param to_date - last day of period.
+        :param expires - days fetched before this timestamp are missing.
+    """
+    ranges = []
+    day, one = from_date, timedelta(days=1)
+    while day <= to_date:
+        cached = days.get(day)
+        if cached is None or expires is not None and cached[0] < expires:
+            if ranges and ranges[-1][1] == day - one:
+                ranges[-1][1] = day
+            else:
+                ranges.append([day, day])
+        day += one
+    return [tuple(period) for period in ranges]
+
+
+class ScheduleCache:
+    """
+        Per-receiver cache of lessons by day
+
+        :param ttl - time to live of cached days in seconds.
+        :param maxsize - max number of receivers to keep (LRU).
+    """
+
+    def __init__(self, ttl: float=CACHE_TTL['personLessons'],
+                 maxsize: int=CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.requests = 0
+        self._receivers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _days(self, receiver: tuple) -> dict:
+        with self._lock:
+            days = self._receivers.get(receiver)
+            if days is None:
+                days = self._receivers[receiver] = {}
+            self._receivers.move_to_end(receiver)
+            while len(self._receivers) > self.maxsize:
+                self._receivers.popitem(last=False)
+            return days
+
+    def _fetch(self, params: dict, first: date, last: date) -> list or None:
+        url = make_url("schedule", fromDate=format_date(first),
+                       toDate=format_date(last), **params)
+        with self._lock:
+            self.requests += 1
+        data, failed = fetch(url)
+        if failed:
+            return None
+        if isinstance(data, dict):  # api v2 envelope
+            return data.get("Lessons") or []
+        return data
+
+    def person_lessons(self, email: str=None,
+                       from_date: str=None,
+                       to_date: str=None,
+                       receiver_type: int=None,
+                       lecturer_id: int=None,
+                       auditorium_id: int=None,
+                       student_id: int=None,
+                       failed: list=None,
+                       **params) -> list:
+        """
+            Return classes schedule (for week by default)
+
+            See ruz.person_lessons for params. Only missing days are
+            requested, result is in date order. Days of failed requests
+            aren't cached and are missing in result.
+
+            :param failed - list to add (from_date, to_date) of failed
+                requests to.
+        """
+        from_date = parse_date(from_date or get_formated_date())
+        to_date = parse_date(to_date or get_formated_date(6))
+        params = {key: value for key, value in lessons_params(
+            email=email,
+            receiver_type=receiver_type,
+            lecturer_id=lecturer_id,
+            auditorium_id=auditorium_id,
+            student_id=student_id,
+            **params
+        ).items() if value is not None}
+        if not is_valid_schema("schedule", **params):
+            return []
+
+        days = self._days(tuple(sorted(params.items())))
+        now = time.time()
+        with self._lock:
+            missing = missing_ranges(days, from_date, to_date,
+                                     now - self.ttl)
+        for first, last in missing:
+            lessons = self._fetch(params, first, last)
+            if lessons is None:
+                if failed is not None:
+                    failed.append((format_date(first), format_date(last)))
+                continue
+            fetched = {}
+            for lesson in lessons:
+                fetched.setdefault(parse_date(lesson['date']), []) \
+                    .append(lesson)
+            entries = {}
+            day = first
+            while day <= last:
+                entries[day] = (now, fetched.get(day, []))
+                day += timedelta(days=1)
+            with self._lock:
+                days.update(entries)
+
+        lessons = []
+        with self._lock:
+            day = from_date
+            while day <= to_date:
+                cached = days.get(day)
+                if cached is not None:
+                    lessons.extend(cached[1])
+                day += timedelta(days=1)
+        return lessons
+
+    def invalidate(self, **receiver) -> None:
+        """
+            Drop cached days
+
+            :param receiver - person_lessons params of receiver to drop
+                (all receivers if not set).
+        """
+        with self._lock:
+            if not receiver:
+                self._receivers.clear()
+                return
+            params = {key: value for key, value in
+                      lessons_params(**receiver).items() if value is not None}
+            self._receivers.pop(tuple(sorted(params.items())), None)
@@ -0,0 +1,135 @@
+"""
+    Substring search over API collections with n-gram index.
+
+    Index is built once per collection (and field) and rebuilt when
+    values of the field change (e.g. collection is refreshed), equal
+    collection requested again (new list from cache backend) reuses it.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+NGRAM = 3
+INDEX_CACHE_SIZE = 64
+
+
+def normalize(value: str or None) -> str:
+    """ Prepare field value (or query) for search """
+    return value.lower().strip() if value else ""
+
+
+class NgramIndex:
+    """
+        Inverted index of n-grams for substring search
+
+        Find the same records as `query in normalize(el[by])` does.
+
+        :param records - collection of dicts.
+        :param by - field to search by.
+        :param n - length of n-gram.
+    """
+
+    def __init__(self, records: Iterable, by: str, n: int=NGRAM):
+        self.records = records
+        self.by = by
+        self.n = n
+        self.fields = tuple(el[by] for el in records)
+        self.values = [normalize(value) for value in self.fields]
+        self.postings = {}
+        for idx, value in enumerate(self.values):
+            for gram in {value[i:i + n]
+                         for i in range(len(value) - n + 1)}:
+                self.postings.setdefault(gram, []).append(idx)
+
+    def find(self, query: str, records: list=None) -> list:
+        """
+            Return records which field contains query (in given order)
+
+            :param query - text query to find.
+            :param records - collection equal to indexed one to take
+                found records from (indexed records by default).
+        """
+        query = normalize(query)
+        records = self.records if records is None else records
+        if len(query) < self.n:
+            return [records[idx]
+                    for idx, value in enumerate(self.values)
+                    if query in value]
+
+        postings = []
+        for gram in {query[i:i + self.n]
+                     for i in range(len(query) - self.n + 1)}:
+            ids = self.postings.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return []
+        return [records[idx] for idx in sorted(candidates)
+                if query in self.values[idx]]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_index(records: list, by: str, name: str=None,
+              params: dict=None) -> NgramIndex:
+    """
+        Return index for collection (build it if field values changed)
+
+        :param records - collection of dicts.
+        :param by - field to search by.
+        :param name - name of collection (subject).
+        :param params - params collection was requested with.
+    """
+    if not isinstance(records, list):
+        records = list(records)
+    key = (name, by, tuple(sorted((params or {}).items())))
+    with _lock:
+        index = _indexes.get(key)
+    # the same data may come as a new list (persistent cache backends,
+    # use_cache=False, records), so compare values instead of identity
+    if index is not None and (index.records is records or
+                              index.fields == tuple(el[by] for el in records)):
+        with _lock:
+            if _indexes.get(key) is index:
+                _indexes.move_to_end(key)
+        return index
+
+    index = NgramIndex(records, by)
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def search(records: list, query: str, by: str="name", name: str=None,
+           params: dict=None) -> list:
+    """
+        Return records which field contains query (case insensitive)
+
+        :param records - collection of dicts.
+        :param query - text query to find.
+        :param by - search field.
+        :param name - name of collection (subject).
+        :param params - params collection was requested with.
+    """
+    if not isinstance(records, list):
+        records = list(records)
+    return get_index(records, by, name, params).find(query, records)
+
+
+def clear() -> None:
+    """ Drop all built indexes """
+    with _lock:
+        _indexes.clear()
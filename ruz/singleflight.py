@@ -0,0 +1,167 @@
+"""
+    Coalescing of identical in-flight requests (single-flight).
+
+    Concurrent callers with the same key wait for the first call
+    (leader) and share its result (or exception). Works for threads
+    and coroutines: coroutines await calls started by threads and
+    vice versa. If leader is interrupted (cancelled, KeyboardInterrupt),
+    waiting callers start the call again instead of failing.
+
+    Usage
+    -----
+    from ruz.singleflight import get_group
+    get_group().stats()  # {'calls': ..., 'coalesced': ...}
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent import futures
+
+from ruz import metrics
+
+
+# CancelledError is an Exception before Python 3.8
+_CANCELLED = (asyncio.CancelledError, futures.CancelledError)
+
+
+def _interrupted(err: BaseException) -> bool:
+    """ Return True if error belongs to caller only (not to call) """
+    return not isinstance(err, Exception) or isinstance(err, _CANCELLED)
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "interrupted", "future", "loop")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop=None):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.interrupted = False
+        self.loop = loop
+        self.future = None if loop is None else loop.create_future()
+
+    def value(self) -> object:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class Group:
+    """
+        Registry of in-flight calls
+
+        :param calls - number of executed (leader) calls.
+        :param coalesced - number of calls which joined in-flight call.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _begin(self, key: str,
+               loop: asyncio.AbstractEventLoop=None) -> tuple:
+        """ Register call, return (call, True if caller is leader) """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call(loop)
+                self.calls += 1
+                leader = True
+        if not leader and metrics.ENABLED:
+            metrics.inc("ruz_coalesced_total")
+        return call, leader
+
+    def _finish(self, key: str, call: _Call) -> None:
+        with self._lock:
+            del self._calls[key]
+        call.event.set()
+        if call.future is not None and not call.future.done():
+            call.future.set_result(None)
+
+    def do(self, key: str, func: Callable, *args) -> object:
+        """
+            Call func(*args) or wait for in-flight call with the same key
+
+            :param key - key of call (equal keys mean equal calls).
+            :param func - function to call.
+        """
+        call, leader = self._begin(key)
+        while not leader:
+            call.event.wait()
+            if not call.interrupted:
+                return call.value()
+            call, leader = self._begin(key)
+        try:
+            call.result = func(*args)
+        except BaseException as err:
+            # interruption belongs to leader only, followers retry
+            if _interrupted(err):
+                call.interrupted = True
+            else:
+                call.error = err
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    async def do_async(self, key: str, func: Callable, *args) -> object:
+        """
+            Await func(*args) or wait for in-flight call with the same key
+
+            :param key - key of call (equal keys mean equal calls).
+            :param func - coroutine function to call.
+        """
+        loop = asyncio.get_event_loop()
+        call, leader = self._begin(key, loop)
+        while not leader:
+            if call.loop is loop:
+                await asyncio.shield(call.future)
+            else:
+                await loop.run_in_executor(None, call.event.wait)
+            if not call.interrupted:
+                return call.value()
+            call, leader = self._begin(key, loop)
+        try:
+            call.result = await func(*args)
+        except BaseException as err:
+            if _interrupted(err):
+                call.interrupted = True
+            else:
+                call.error = err
+            raise
+        finally:
+            self._finish(key, call)
+        return call.result
+
+    def __len__(self) -> int:
+        """ Number of in-flight calls """
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {'calls': self.calls, 'coalesced': self.coalesced,
+                'in_flight': len(self)}
+
+
+_group = Group()
+
+
+def get_group() -> Group or None:
+    """ Return group used by ruz.utils.get """
+    return _group
+
+
+def set_group(group: Group or None) -> Group or None:
+    """
+        Replace group used by ruz.utils.get, return the previous one
+
+        :param group - new group (None to disable coalescing).
+    """
+    global _group
+    previous, _group = _group, group
+    return previous
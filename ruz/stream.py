@@ -0,0 +1,94 @@
+"""
+    Incremental decoding of top-level JSON arrays.
+
+    Elements are yielded as soon as they are received, so memory usage
+    doesn't depend on size of response.
+"""
+
+import codecs
+import json
+from collections.abc import Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_array(fp: object, encoding: str="utf-8",
+               chunk_size: int=CHUNK_SIZE) -> Iterator:
+    """
+        Yield elements of JSON array read from file-like object
+
+        If top-level value is not an array, it is yielded as a whole.
+
+        :param fp - object with read(size) method returning bytes.
+        :param encoding - encoding of data.
+        :param chunk_size - number of bytes to read at once.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    buffer, pos, eof = "", 0, False
+
+    def read() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        data = fp.read(chunk_size)
+        eof = not data
+        buffer = buffer[pos:] + decoder.decode(data, final=eof)
+        pos = 0
+        return not eof or bool(buffer)
+
+    def skip(chars: str) -> str or None:
+        """ Skip chars and return next char (None at end of data) """
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read():
+                return None
+
+    first = skip(_WHITESPACE)
+    if first is None:
+        raise ValueError("Empty JSON document")
+    if first != "[":
+        while read():
+            pass
+        yield json.loads(buffer[pos:])
+        return
+
+    pos += 1
+    expect_value, comma = True, False
+    while True:
+        char = skip(_WHITESPACE)
+        if char is None:
+            raise ValueError("Unterminated JSON array")
+        if char == "]":
+            if comma:
+                raise ValueError("Trailing ',' in JSON array")
+            return
+        if char == ",":
+            if expect_value:
+                raise ValueError("Unexpected ',' in JSON array")
+            pos += 1
+            expect_value, comma = True, True
+            continue
+        if not expect_value:
+            raise ValueError("Expected ',' in JSON array")
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if not read():
+                    raise
+                continue
+            # number at the end of buffer may be not complete
+            if end == len(buffer) and not eof:
+                read()
+                continue
+            break
+        pos = end
+        expect_value, comma = False, False
+        yield value
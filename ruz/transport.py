@@ -0,0 +1,526 @@
+"""
+    HTTP transport with persistent (keep-alive) connections.
+
+    Requests have connect and read timeouts. Failed requests (connection
+    errors, timeouts, 5xx) are retried with jittered exponential backoff
+    while retry budget allows it. With hedging enabled a duplicate
+    request is sent if the first one isn't answered within given
+    percentile of recent latencies, the first answer is used.
+
+    Responses are requested compressed (gzip or deflate) and are
+    decompressed chunk by chunk as they are read.
+
+    Usage
+    -----
+    from ruz.transport import Transport, set_transport
+    set_transport(Transport(pool_size=16, read_timeout=10, hedge=0.95))
+"""
+
+import http.client
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from bisect import insort
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib import error, parse
+
+from ruz import metrics
+
+POOL_SIZE = int(os.environ.get("HSE_RUZ_POOL_SIZE", 10))
+CONNECT_TIMEOUT = float(os.environ.get("HSE_RUZ_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("HSE_RUZ_READ_TIMEOUT", 30))
+RETRIES = int(os.environ.get("HSE_RUZ_RETRIES", 2))
+BACKOFF = float(os.environ.get("HSE_RUZ_BACKOFF", 0.05))
+RETRY_BUDGET = float(os.environ.get("HSE_RUZ_RETRY_BUDGET", 0.2))
+# percentile of latency to send hedged request after (0 - disabled)
+HEDGE = float(os.environ.get("HSE_RUZ_HEDGE", 0))
+# value of Accept-Encoding header (empty - no compression)
+COMPRESSION = os.environ.get("HSE_RUZ_COMPRESSION", "gzip, deflate")
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+# errors of reused connection closed by server
+_STALE_ERRORS = (ConnectionError, http.client.BadStatusLine)
+
+_CONNECTIONS = {
+    'http': http.client.HTTPConnection,
+    'https': http.client.HTTPSConnection
+}
+
+
+class ConnectionPool:
+    """
+        Pool of persistent HTTP/1.1 connections to a single host
+
+        Idle connections are reused in LIFO order (most recently used
+        socket is the most likely to be alive). At most `size` idle
+        connections are kept, extra ones are closed on release.
+
+        :param scheme - 'http' or 'https'.
+        :param host - host (with optional port) to connect to.
+        :param size - max number of idle connections to keep.
+        :param timeout - timeout of connection in seconds.
+    """
+
+    def __init__(self, scheme: str, host: str, size: int=POOL_SIZE,
+                 timeout: float=CONNECT_TIMEOUT):
+        if scheme not in _CONNECTIONS:
+            raise ValueError("Unsupported scheme: '{}'".format(scheme))
+        self.scheme = scheme
+        self.host = host
+        self.size = size
+        self.timeout = timeout
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> http.client.HTTPConnection:
+        """ Return idle connection or create new one """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return _CONNECTIONS[self.scheme](self.host, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        """ Return connection to the pool (close it if pool is full) """
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self) -> None:
+        """ Close all idle connections """
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for conn in idle:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+
+class _DeflateDecoder:
+    """
+        Decoder of 'deflate' content encoding
+
+        Some servers send raw deflate stream instead of zlib one,
+        so the format is detected by the first chunk.
+    """
+
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._decoder is None:
+            self._decoder = zlib.decompressobj()
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self) -> bytes:
+        return b"" if self._decoder is None else self._decoder.flush()
+
+
+def make_decoder(encoding: str or None) -> object or None:
+    """
+        Return incremental decoder for Content-Encoding (None for identity)
+
+        Raise ValueError for unsupported encodings.
+
+        :param encoding - value of Content-Encoding header.
+    """
+    encoding = (encoding or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    raise ValueError("Unsupported content encoding: '{}'".format(encoding))
+
+
+def decompress(data: bytes, encoding: str or None) -> bytes:
+    """
+        Decode response body compressed with Content-Encoding
+
+        :param data - response body.
+        :param encoding - value of Content-Encoding header.
+    """
+    decoder = make_decoder(encoding)
+    if decoder is None:
+        return data
+    return decoder.decompress(data) + decoder.flush()
+
+
+class PooledResponse:
+    """
+        File-like response which returns connection to the pool when done
+
+        Connection is released only if response was read till the end,
+        otherwise it is closed (it can't be reused for the next request).
+        Compressed body is decoded on read, `bytes_read` is the number of
+        received (compressed) bytes, `bytes_decoded` - of returned ones.
+    """
+
+    def __init__(self, response: http.client.HTTPResponse,
+                 conn: http.client.HTTPConnection,
+                 pool: ConnectionPool):
+        self._response = response
+        self._conn = conn
+        self._pool = pool
+        self.status = response.status
+        self.headers = response.headers
+        self.encoding = response.getheader("Content-Encoding")
+        self.bytes_read = 0
+        self.bytes_decoded = 0
+        try:
+            self._decoder = make_decoder(self.encoding)
+        except ValueError as err:
+            self.close()
+            raise http.client.HTTPException(err)
+
+    def _read(self, amt: int=None) -> bytes:
+        try:
+            data = self._response.read(amt)
+        except Exception:
+            self.close()
+            raise
+        self.bytes_read += len(data)
+        return data
+
+    def read(self, amt: int=None) -> bytes:
+        """
+            Read and decode up to amt bytes of body (all if amt is None)
+
+            Decoded chunk may be larger than amt, empty result means
+            end of body.
+        """
+        if self._decoder is None:
+            data = self._read(amt)
+        else:
+            try:
+                while True:
+                    chunk = self._read(amt)
+                    if not chunk:
+                        data = self._decoder.flush()
+                        break
+                    data = self._decoder.decompress(chunk)
+                    if data:
+                        break
+            except zlib.error as err:
+                self.close()
+                raise http.client.HTTPException(
+                    "Can't decode '{}' body: {}".format(self.encoding, err))
+        self.bytes_decoded += len(data)
+        if not data or self._response.isclosed():
+            self.close()
+        return data
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if metrics.ENABLED:
+            metrics.record_transfer(self.encoding, self.bytes_read,
+                                    self.bytes_decoded)
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(conn)
+        else:
+            self._response.close()
+            conn.close()
+
+    def __enter__(self) -> 'PooledResponse':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class RetryBudget:
+    """
+        Limit retries to a share of requests
+
+        Each request deposits `ratio` tokens, each retry (or hedged
+        request) withdraws one, so retries can't multiply load on
+        failing server. `reserve` tokens are available from the start.
+
+        :param ratio - tokens added per request.
+        :param reserve - initial and max number of spare tokens.
+    """
+
+    def __init__(self, ratio: float=RETRY_BUDGET, reserve: float=10):
+        self.ratio = ratio
+        self.reserve = reserve
+        self.tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.tokens + self.ratio,
+                              self.reserve + self.ratio)
+
+    def withdraw(self) -> bool:
+        """ Take token for retry, return False if budget is exhausted """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class LatencyTracker:
+    """
+        Keep last latencies to estimate percentiles
+
+        :param size - number of latencies to keep.
+        :param min_samples - number of latencies required for estimate.
+    """
+
+    def __init__(self, size: int=1000, min_samples: int=20):
+        self.min_samples = min_samples
+        self._recent = deque(maxlen=size)
+        self._sorted = []
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                oldest = self._recent[0]
+                del self._sorted[self._sorted.index(oldest)]
+            self._recent.append(seconds)
+            insort(self._sorted, seconds)
+
+    def percentile(self, share: float) -> float or None:
+        """ Return latency percentile (None if there are few samples) """
+        with self._lock:
+            if len(self._sorted) < self.min_samples:
+                return None
+            idx = min(len(self._sorted) - 1, int(share * len(self._sorted)))
+            return self._sorted[idx]
+
+
+def _retryable(err: Exception) -> bool:
+    if isinstance(err, error.HTTPError):
+        return err.code in RETRY_STATUSES
+    return isinstance(err, error.URLError)
+
+
+class Transport:
+    """
+        Thread-safe HTTP client reusing connections per host
+
+        :param pool_size - max number of idle connections per host.
+        :param timeout - connect and read timeout in seconds (shortcut).
+        :param headers - extra headers to send with each request.
+        :param connect_timeout - timeout of connection in seconds.
+        :param read_timeout - timeout of waiting for data in seconds.
+        :param retries - max number of retries of failed request.
+        :param backoff - base delay before retry in seconds (doubled
+            with each attempt, full jitter is applied).
+        :param retry_budget - RetryBudget shared by requests (or share
+            of requests which may be retried).
+        :param hedge - latency percentile (e.g. 0.95) to send duplicate
+            request after, 0 to disable hedging.
+        :param compression - value of Accept-Encoding header, empty to
+            request uncompressed responses.
+    """
+
+    def __init__(self, pool_size: int=POOL_SIZE, timeout: float=None,
+                 headers: dict=None,
+                 connect_timeout: float=CONNECT_TIMEOUT,
+                 read_timeout: float=READ_TIMEOUT,
+                 retries: int=RETRIES,
+                 backoff: float=BACKOFF,
+                 retry_budget: RetryBudget or float=RETRY_BUDGET,
+                 hedge: float=HEDGE,
+                 compression: str=COMPRESSION):
+        if timeout is not None:
+            connect_timeout = read_timeout = timeout
+        self.pool_size = pool_size
+        self.headers = dict(headers or {})
+        if compression:
+            self.headers.setdefault("Accept-Encoding", compression)
+        self.compression = compression
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        if not isinstance(retry_budget, RetryBudget):
+            retry_budget = RetryBudget(retry_budget)
+        self.retry_budget = retry_budget
+        self.hedge = hedge
+        self.latency = LatencyTracker()
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def pool(self, scheme: str, host: str) -> ConnectionPool:
+        """ Return connection pool for the host (create if not exists) """
+        key = (scheme, host)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = ConnectionPool(scheme, host, self.pool_size,
+                                          self.connect_timeout)
+                    self._pools[key] = pool
+        return pool
+
+    def _open(self, url: str) -> PooledResponse:
+        """ Make single request attempt (see open) """
+        parts = parse.urlsplit(url)
+        pool = self.pool(parts.scheme, parts.netloc)
+        path = parts.path or "/"
+        if parts.query:
+            path = "?".join((path, parts.query))
+
+        # stale keep-alive connection may be closed by server at any time,
+        # so retry once with fresh connection if reused one is reset
+        # (other errors, e.g. timeouts, are retried within retry budget)
+        for attempt in range(2):
+            conn = pool.acquire()
+            reused = conn.sock is not None
+            try:
+                if not reused:
+                    conn.connect()
+                conn.sock.settimeout(self.read_timeout)
+                conn.request("GET", path, headers=self.headers)
+                response = conn.getresponse()
+            except (http.client.HTTPException, OSError) as err:
+                conn.close()
+                if reused and attempt == 0 and \
+                        isinstance(err, _STALE_ERRORS):
+                    logging.debug("Reconnect to '%s': %s", parts.netloc, err)
+                    continue
+                raise error.URLError(err)
+            break
+
+        try:
+            response = PooledResponse(response, conn, pool)
+            if response.status >= 400:
+                body = response.read()
+                response.close()
+        except (http.client.HTTPException, OSError) as err:
+            raise error.URLError(err)
+        if response.status >= 400:
+            raise error.HTTPError(url, response.status, body.decode(
+                "utf-8", "replace"), response.headers, None)
+        return response
+
+    def _read(self, url: str) -> bytes:
+        """ Make single request attempt and read response body """
+        with self._open(url) as response:
+            try:
+                return response.read()
+            except (http.client.HTTPException, OSError) as err:
+                raise error.URLError(err)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """ Return delay before retry (exponential with full jitter) """
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _retrying(self, func: object, url: str) -> object:
+        """ Call func(url), retry on retryable errors """
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                return func(url)
+            except error.URLError as err:
+                if attempt >= self.retries or not _retryable(err) or \
+                        not self.retry_budget.withdraw():
+                    raise
+                logging.debug("Retry '%s' (%d): %s", url, attempt + 1, err)
+                if metrics.ENABLED:
+                    metrics.inc("ruz_retries_total")
+            time.sleep(self.backoff_delay(attempt))
+            attempt += 1
+
+    def open(self, url: str) -> PooledResponse:
+        """
+            Make GET request and return not read response
+
+            Raise urllib.error.HTTPError for error status codes and
+            urllib.error.URLError for connection problems (same as urlopen).
+            Failed requests are retried, reading of returned response
+            is not (and it's not hedged).
+
+            :param url - full URL to request.
+        """
+        return self._retrying(self._open, url)
+
+    def _timed(self, url: str) -> bytes:
+        started = time.perf_counter()
+        data = self._retrying(self._read, url)
+        self.latency.add(time.perf_counter() - started)
+        return data
+
+    def request(self, url: str) -> bytes:
+        """
+            Make GET request and return response body
+
+            :param url - full URL to request.
+        """
+        delay = self.latency.percentile(self.hedge) if self.hedge else None
+        if delay is None:
+            return self._timed(url)
+        return self._hedged(url, delay)
+
+    def _hedged(self, url: str, delay: float) -> bytes:
+        """ Send duplicate request if first isn't answered after delay """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(2 * self.pool_size, 8))
+        pending = {self._executor.submit(self._timed, url)}
+        done, _ = wait(pending, timeout=delay)
+        if not done and self.retry_budget.withdraw():
+            logging.debug("Hedge '%s' after %.3fs", url, delay)
+            if metrics.ENABLED:
+                metrics.inc("ruz_hedges_total")
+            pending.add(self._executor.submit(self._timed, url))
+        failure = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except error.URLError as err:
+                    failure = err
+        raise failure
+
+    def close(self) -> None:
+        """ Close all idle connections """
+        with self._lock:
+            pools = list(self._pools.values())
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for pool in pools:
+            pool.clear()
+
+
+_transport = Transport()
+
+
+def get_transport() -> Transport:
+    """ Return transport used by ruz.utils.get """
+    return _transport
+
+
+def set_transport(transport: Transport) -> Transport:
+    """
+        Replace transport used by ruz.utils.get, return the previous one
+
+        :param transport - object with `open(url)` and `request(url)`.
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
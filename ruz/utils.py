@@ -1,19 +1,36 @@
-import json
+import http.client
 import logging
 import os
 import re
-from collections import Callable, Iterable
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from functools import wraps
-from urllib import error, parse, request
-
+from functools import partial, wraps
+from urllib import error, parse
+
+from ruz import decoders, metrics
+from ruz.cache import (Cache, get_cache, key_endpoint, make_key,
+                       variant_key)
+from ruz.records import to_records
+from ruz.singleflight import get_group
 from ruz.schema import API_ENDPOINTS, API_URL, REQUEST_SCHEMA
+from ruz.stream import iter_array
+from ruz.transport import get_transport
+from ruz.validators import VALIDATION, item_validator
+from ruz.validators import validate as check_schema
 
 CHECK_EMAIL_ONLINE = bool(os.environ.get("CHECK_EMAIL_ONLINE", False))
 ENABLE_LOGGING = os.environ.get("HSE_RUZ_ENABLE_VERBOSE_LOGGING", True)
+MAX_WORKERS = int(os.environ.get("HSE_RUZ_MAX_WORKERS", 8))
 
 HSE_EMAIL_REGEX = re.compile(r"^[a-z0-9\._-]{3,}@(edu\.)?hse\.ru$")
 
+_EXHAUSTED = object()
+_EMPTY = object()
+
 
 def log(func: Callable) -> Callable:
     if not ENABLE_LOGGING:
@@ -21,6 +38,8 @@ def log(func: Callable) -> Callable:
 
     @wraps(func)
     def wrapper(*args, **kwargs) -> object:
+        if not logging.root.isEnabledFor(logging.DEBUG):
+            return func(*args, **kwargs)
         func_name = func.__name__
         logging.debug("[%s]\tENTER", func_name)
         for arg in args:
@@ -89,11 +108,14 @@ def is_valid_hse_email(email: str) -> bool:
     """
         Check email is valid via API endpoint call (schedule)
 
+        Request is made through ruz.transport (timeouts and retries
+        apply), email is treated as invalid if request fails.
+
         :param email - email address to check (for schedules only).
     """
     @none_safe
-    def request_schedule_api(**params) -> list or dict:
-        return request.urlopen(make_url(
+    def request_schedule_api(**params) -> bytes:
+        return get_transport().request(make_url(
             "schedule",
             email=email,
             fromDate=get_formated_date(),
@@ -182,32 +204,421 @@ def make_url(endpoint: str, **params) -> str:
 @log
 def get(endpoint: str,
         encoding: str="utf-8",
-        **params) -> (list, dict, None):
+        use_cache: bool=True,
+        stream: bool=False,
+        records: bool=False,
+        validate: str=VALIDATION,
+        **params) -> (list, dict, Iterator, None):
     """
         Return requested data in JSON (empty list on fallback)
 
         Check request has correct schema.
+        Responses are cached (see ruz.cache), cached values are shared,
+        so don't modify them in place.
+
+        :param endpoint - endpoint for request.
+        :param encoding - encoding for received data.
+        :param use_cache - look up response in cache first.
+        :param stream - return iterator over elements of response
+            (JSON array), which are decoded while response is received.
+            Streamed responses are not cached.
+        :param records - return compact records instead of dicts
+            (see ruz.records).
+        :param validate - check responses against RESPONSE_SCHEMA:
+            'off', 'sampled' or 'full' (see ruz.validators), raise
+            ValidationError on mismatch.
+        :param params - requested params
+    """
+    if not is_valid_schema(endpoint, **params):
+        return iter([]) if stream else []
+    if stream:
+        return iter_fetch(make_url(endpoint, **params), encoding,
+                          partial(to_records, endpoint) if records else None,
+                          item_validator(endpoint, validate))
+    convert = make_converter(endpoint, validate, records)
+    key = variant_key(make_key(endpoint, **params), records, validate)
+    return fetch_cached(endpoint, key, make_url(endpoint, **params),
+                        encoding, convert, records, use_cache)
+
+
+@none_safe
+def fetch_request(endpoint: str,
+                  encoding: str="utf-8",
+                  records: bool=False,
+                  validate: str=VALIDATION,
+                  **params) -> tuple:
+    """
+        Request data bypassing cache, return (data, failed) pair
+
+        Unlike get(), failed request can be told apart from empty
+        response (to retry it or to keep previously received data).
+        Raise ValueError if params don't fit schema.
 
         :param endpoint - endpoint for request.
         :param encoding - encoding for received data.
+        :param records - return compact records instead of dicts.
+        :param validate - validation mode (see ruz.validators).
         :param params - requested params
     """
     if not is_valid_schema(endpoint, **params):
-        return []
+        raise ValueError("Params don't fit '{}' schema: {}".format(
+            endpoint, params))
+    return fetch(make_url(endpoint, **params), encoding,
+                 make_converter(endpoint, validate, records))
+
+
+def fetch_cached(endpoint: str, key: str, url: str, encoding: str="utf-8",
+                 convert: Callable=None, records: bool=False,
+                 use_cache: bool=True) -> object:
+    """
+        Return cached response for key, fetch and cache it on miss
+
+        Stale entries are returned and refreshed in background.
+        Concurrent fetches with the same key are coalesced: callers
+        wait for the first one and share its result (ruz.singleflight).
+
+        :param endpoint - endpoint of request.
+        :param key - cache key (see ruz.cache.make_key).
+        :param url - full URL to request.
+        :param encoding - encoding for received data.
+        :param convert - function to apply to decoded data.
+        :param records - convert cached data to records.
+        :param use_cache - look up response in cache first.
+    """
+    response_cache = get_cache() if use_cache else None
+    if response_cache is not None:
+        entry = response_cache.get(key)
+        if metrics.ENABLED:
+            metrics.record_cache(key_endpoint(key), entry is not None)
+        if entry is not None:
+            if entry.expired() and response_cache.begin_refresh(key):
+                threading.Thread(target=revalidate, daemon=True,
+                                 args=(response_cache, key, url, encoding,
+                                       convert)).start()
+            return to_records(endpoint, entry.value) if records \
+                else entry.value
+
+    group = get_group()
+    if group is None:
+        return fetch_and_store(response_cache, key, url, encoding, convert)
+    return group.do(key, fetch_and_store, response_cache, key, url,
+                    encoding, convert)
+
+
+def fetch_and_store(response_cache: Cache or None, key: str, url: str,
+                    encoding: str="utf-8", convert: Callable=None) -> object:
+    """ Fetch URL and store response in cache (if given), return data """
+    data, failed = fetch(url, encoding, convert)
+    if response_cache is not None:
+        response_cache.set(key, data, failed)
+    return data
+
+
+def make_converter(endpoint: str, validate: str="off",
+                   records: bool=False) -> Callable or None:
+    """
+        Return function to apply to decoded response (None if not needed)
+
+        :param endpoint - endpoint of response.
+        :param validate - validation mode (see ruz.validators).
+        :param records - convert response to records.
+    """
+    if validate == "off":
+        return partial(to_records, endpoint) if records else None
+
+    def convert(data: object) -> object:
+        check_schema(endpoint, data, validate)
+        return to_records(endpoint, data) if records else data
+    return convert
+
+
+def _encode_param(key: str, value: object) -> str:
+    """ Encode param like urllib.parse.urlencode does """
+    return "=".join((parse.quote_plus(str(key)),
+                     parse.quote_plus(str(value))))
+
+
+class PreparedRequest:
+    """
+        Request with resolved endpoint and pre-encoded static params
+
+        Created by prepare(). Calling it costs only encoding and type
+        checks of varying params. Responses are shared with get()
+        (same cache keys).
 
-    url = make_url(endpoint, **params)
+        :param endpoint - endpoint (or its alias) for request.
+        :param encoding - encoding for received data.
+        :param use_cache - look up response in cache first.
+        :param stream - return iterator over elements of response.
+        :param records - return compact records instead of dicts.
+        :param validate - validation mode (see ruz.validators).
+        :param static_params - params shared by all calls.
+    """
+
+    RECEIVERS = ("lecturerOid", "studentOid", "email", "auditoriumOid")
+
+    def __init__(self, endpoint: str, encoding: str="utf-8",
+                 use_cache: bool=True, stream: bool=False,
+                 records: bool=False, validate: str=VALIDATION,
+                 **static_params):
+        path = API_ENDPOINTS.get(endpoint)
+        if path is None:
+            raise ValueError("Can't find endpoint: '{}'".format(endpoint))
+        static_params = {key: value for key, value in static_params.items()
+                         if value is not None}
+        self.endpoint = endpoint
+        self.schema = REQUEST_SCHEMA[path]
+        self.static_params = static_params
+        for key, value in static_params.items():
+            self._check_param(key, value)
+        # schedule requires receiver, it may be given on call
+        self.needs_receiver = path == API_ENDPOINTS['schedule'] and not \
+            any(key in static_params for key in self.RECEIVERS)
+
+        self.encoding = encoding
+        self.use_cache = use_cache
+        self.records = records
+        if stream:
+            self.item_validator = item_validator(endpoint, validate)
+            self.convert = partial(to_records, endpoint) if records else None
+        else:
+            self.item_validator = None
+            self.convert = make_converter(endpoint, validate, records)
+        self.stream = stream
+
+        self.url = "".join((API_URL, path))
+        self.key_prefix = path
+        self.key_suffix = variant_key("", records and not stream, validate)
+        # (key, "key=value") pairs, sorted by key as in make_key
+        self.static_parts = sorted((key, _encode_param(key, value))
+                                   for key, value in static_params.items())
+
+    def _check_param(self, key: str, value: object) -> None:
+        kind = self.schema.get(key)
+        if kind is None:
+            raise ValueError("Can't find '{}' schema param: '{}'".format(
+                self.endpoint, key))
+        if not isinstance(value, kind):
+            raise TypeError("Expected {} for '{}'::'{}' got: {}".format(
+                kind, self.endpoint, key, type(value)))
+        if key == "email" and not is_hse_email(value):
+            raise ValueError("Incorrect HSE email '{}'".format(value))
+
+    def __call__(self, **params) -> (list, dict, Iterator):
+        """
+            Make request with static and given params
+
+            Raise ValueError/TypeError if params don't fit schema.
+        """
+        parts, has_receiver = self.static_parts, not self.needs_receiver
+        if params:
+            # params given on call replace static ones
+            parts = [part for part in parts if params.get(part[0]) is None]
+            for key, value in params.items():
+                if value is None:
+                    continue
+                self._check_param(key, value)
+                parts.append((key, _encode_param(key, value)))
+                has_receiver = has_receiver or key in self.RECEIVERS
+            if len(parts) > 1:
+                parts.sort()
+        if not has_receiver:
+            raise ValueError("One of the followed required: lecturerOid, "
+                             "auditoriumOid, studentOid, email")
+
+        query = "&".join(part for _, part in parts)
+        url = "?".join((self.url, query)) if query else self.url
+        if self.stream:
+            return iter_fetch(url, self.encoding, self.convert,
+                              self.item_validator)
+        key = "?".join((self.key_prefix, query)) if query else \
+            self.key_prefix
+        return fetch_cached(self.endpoint, key + self.key_suffix, url,
+                            self.encoding, self.convert, self.records,
+                            self.use_cache)
+
+
+def prepare(endpoint: str, **static_params) -> PreparedRequest:
+    """
+        Prepare request to call it many times with varying params
+
+        Endpoint alias, static params and response validator are
+        resolved once, e.g.:
+            lessons = prepare("schedule", fromDate=..., toDate=...)
+            for student_id in student_ids:
+                lessons(studentOid=student_id)
+
+        :param endpoint - endpoint (or its alias) for request.
+        :param static_params - params shared by all calls and options
+            of get() (encoding, use_cache, stream, records, validate).
+    """
+    return PreparedRequest(endpoint, **static_params)
+
+
+def fetch(url: str, encoding: str="utf-8",
+          convert: Callable=None) -> tuple:
+    """
+        Request URL and decode JSON response
+
+        Return (data, failed) pair, data is empty list on fallback.
+
+        :param url - full URL to request.
+        :param encoding - encoding for received data.
+        :param convert - function to apply to decoded data.
+    """
+    started = time.perf_counter() if metrics.ENABLED else None
+    try:
+        response = get_transport().request(url)
+        data = decoders.loads(response, encoding)
+        if convert is not None:
+            data = convert(data)
+    except (error.HTTPError, error.URLError) as err:
+        logging.debug("Can't get '%s'.\n%s", url, err)
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started, error=err)
+        return [], True
+    except Exception as err:
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started, error=err)
+        raise
+    if started is not None:
+        metrics.record_request(url_endpoint(url), started, len(response),
+                               metrics.count_records(data))
+    return data, False
+
+
+def url_endpoint(url: str) -> str:
+    """ Return endpoint of request URL (for metrics) """
+    if url.startswith(API_URL):
+        return url[len(API_URL):].split("?", 1)[0]
+    return parse.urlsplit(url).path.rsplit("/", 1)[-1]
+
+
+def iter_fetch(url: str, encoding: str="utf-8",
+               convert: Callable=None,
+               validate_item: Callable=None) -> Iterator:
+    """
+        Request URL and yield elements of JSON array as they are received
+
+        Nothing is yielded if request fails. Raise URLError if
+        connection is broken while response is read.
+
+        :param url - full URL to request.
+        :param encoding - encoding for received data.
+        :param convert - function to apply to list of decoded elements.
+        :param validate_item - function to check element (and its index),
+            see ruz.validators.item_validator.
+    """
+    started = time.perf_counter() if metrics.ENABLED else None
     try:
-        response = request.urlopen(url)
-        return json.loads(response.read().decode(encoding))
+        response = get_transport().open(url)
     except (error.HTTPError, error.URLError) as err:
         logging.debug("Can't get '%s'.\n%s", url, err)
-    return []
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started, error=err)
+        return
+    count, failure = 0, None
+    try:
+        with response:
+            for idx, element in enumerate(iter_array(response, encoding)):
+                if validate_item is not None:
+                    validate_item(element, idx)
+                count += 1
+                yield element if convert is None else convert([element])[0]
+    except (http.client.HTTPException, OSError) as err:
+        failure = error.URLError(err)
+        raise failure
+    except Exception as err:
+        failure = err
+        raise
+    finally:
+        if started is not None:
+            metrics.record_request(url_endpoint(url), started,
+                                   getattr(response, "bytes_decoded", None),
+                                   count, failure)
+
+
+def revalidate(response_cache: Cache, key: str, url: str,
+               encoding: str="utf-8", convert: Callable=None) -> None:
+    """
+        Refresh stale cache entry (stale value is kept on failure)
+
+        Key should be marked with response_cache.begin_refresh(key).
+    """
+    try:
+        data, failed = fetch(url, encoding, convert)
+        if not failed:
+            response_cache.set(key, data)
+    finally:
+        response_cache.end_refresh(key)
+
+
+def parallel_map(func: Callable,
+                 keys: Iterable,
+                 max_workers: int=MAX_WORKERS,
+                 ordered: bool=True,
+                 default: object=_EMPTY) -> Iterator:
+    """
+        Lazily apply func to keys in thread pool
+
+        At most 2 * max_workers calls are scheduled at once, so results
+        are produced only as fast as they are consumed (memory stays
+        bounded for huge inputs). Failed calls are logged and give
+        default (empty list), the rest of the batch is not interrupted.
+
+        :param func - function to call for each key.
+        :param keys - keys to pass to func.
+        :param max_workers - number of threads.
+        :param ordered - yield results in keys order, otherwise yield
+            (key, result) pairs as soon as calls are finished.
+        :param default - result of failed call (e.g. None to tell it
+            from empty response).
+    """
+    def result_of(future: object, key: object) -> object:
+        try:
+            return future.result()
+        except Exception as err:
+            logging.warning("Call for '%s' failed: %r", key, err)
+            return [] if default is _EMPTY else default
+
+    max_workers = max_workers or MAX_WORKERS
+    window = 2 * max_workers
+    keys = iter(keys)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque() if ordered else {}
+        try:
+            while True:
+                while len(pending) < window:
+                    key = next(keys, _EXHAUSTED)
+                    if key is _EXHAUSTED:
+                        break
+                    future = executor.submit(func, key)
+                    if ordered:
+                        pending.append((future, key))
+                    else:
+                        pending[future] = key
+                if not pending:
+                    return
+                if ordered:
+                    future, key = pending.popleft()
+                    yield result_of(future, key)
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    yield key, result_of(future, key)
+        finally:
+            for future in pending:
+                (future[0] if ordered else future).cancel()
 
 
 def split_schedule_by_days(schedule: Iterable) -> list:
     """
         Split schedule lessons to days by date.
 
+        Lessons of the same date are merged even if schedule isn't
+        sorted, see ruz.grouping for lazy and multi-key grouping.
+
         :param schedule - response from person_lessons endpoint.
 
         Response schema: {
@@ -217,20 +628,19 @@ def split_schedule_by_days(schedule: Iterable) -> list:
             'lessons': list
         }
     """
-    last_date = None
-    days_split = []
+    # the same as group_lessons(schedule, "day") without computing
+    # durations of lessons, which are not needed here
+    days, days_split = {}, []
     for lesson in schedule:
-        if lesson['date'] != last_date:
-            if last_date is not None and days_split:
-                days_split[-1]['count'] = len(days_split[-1]['lessons'])
-            days_split.append({
+        day = days.get(lesson['date'])
+        if day is None:
+            day = days[lesson['date']] = {
                 'dayOfWeek': lesson['dayOfWeek'],
                 'date': lesson['date'],
                 'lessons': []
-            })
-            last_date = lesson['date']
-        days_split[-1]['lessons'].append(lesson)
-    # [minor] TODO: remove code duplication
-    if last_date is not None and days_split:
-        days_split[-1]['count'] = len(days_split[-1]['lessons'])
+            }
+            days_split.append(day)
+        day['lessons'].append(lesson)
+    for day in days_split:
+        day['count'] = len(day['lessons'])
     return days_split
@@ -0,0 +1,207 @@
+"""
+    Response validators compiled from RESPONSE_SCHEMA.
+
+    For each schema a specialized function is generated (Python source
+    is built once and compiled), so validation is a flat sequence of
+    type checks without walking schema at runtime.
+
+    Validation modes (HSE_RUZ_VALIDATION or `validate` param of get):
+    * off - no validation (default);
+    * sampled - validate every N-th element of list (HSE_RUZ_SAMPLE_RATE);
+    * full - validate every element.
+
+    Usage
+    -----
+    from ruz.validators import validate
+    validate("lecturers", ruz.lecturers(), mode="full")
+"""
+
+import os
+
+from ruz.schema import API_ENDPOINTS, RESPONSE_SCHEMA
+
+MODES = ("off", "sampled", "full")
+VALIDATION = os.environ.get("HSE_RUZ_VALIDATION", "off")
+SAMPLE_RATE = int(os.environ.get("HSE_RUZ_SAMPLE_RATE", 100))
+
+_MISSING = object()
+_TYPE_NAMES = {str: "str", int: "int", bool: "bool", float: "float",
+               type(None): "None", list: "list", dict: "dict"}
+
+
+class ValidationError(ValueError):
+    """ Response doesn't match RESPONSE_SCHEMA """
+
+
+def _path(path: str or tuple) -> str:
+    """ Format path (built lazily as nested (parent, key) tuples) """
+    if isinstance(path, tuple):
+        return "{}[{!r}]".format(_path(path[0]), path[1])
+    return path
+
+
+def _fail(path: str or tuple, key: object, expected: str,
+          value: object) -> None:
+    raise ValidationError("{}[{!r}]: expected {}, got {} ({!r:.80})".format(
+        _path(path), key, expected, type(value).__name__, value))
+
+
+def _fail_type(path: str or tuple, expected: str, value: object) -> None:
+    raise ValidationError("{}: expected {}, got {}".format(
+        _path(path), expected, type(value).__name__))
+
+
+class _Compiler:
+    """ Generate source of check functions for schema """
+
+    def __init__(self):
+        self.lines = []
+        self.namespace = {'_MISSING': _MISSING, '_fail': _fail,
+                          '_fail_type': _fail_type}
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return "{}_{}".format(prefix, self.counter)
+
+    @staticmethod
+    def type_check(var: str, kind: type or tuple) -> tuple:
+        """ Return (condition of wrong type, description of type) """
+        kinds = kind if isinstance(kind, tuple) else (kind,)
+        conditions = []
+        for item in kinds:
+            if item is type(None):
+                conditions.append("{} is not None".format(var))
+            else:
+                conditions.append("type({}) is not {}".format(
+                    var, _TYPE_NAMES[item]))
+        return " and ".join(conditions), \
+            " or ".join(_TYPE_NAMES[item] for item in kinds)
+
+    def compile_object(self, schema: dict) -> str:
+        """ Emit function checking single object, return its name """
+        nested = {}
+        for key, kind in schema.items():
+            if isinstance(kind, list):
+                nested[key] = self.compile_list(kind[0])
+            elif isinstance(kind, dict):
+                nested[key] = self.compile_object(kind)
+
+        name = self.name("check_object")
+        lines = [
+            "def {}(el, path, step):".format(name),
+            "    if type(el) is not dict:",
+            "        _fail_type(path, 'object', el)",
+            "    get = el.get"
+        ]
+        for key, kind in schema.items():
+            lines.append("    value = get({!r}, _MISSING)".format(key))
+            if key in nested:
+                lines.append("    if value is not _MISSING:")
+                lines.append("        {}(value, (path, {!r}), step)".format(
+                    nested[key], key))
+                continue
+            condition, expected = self.type_check("value", kind)
+            lines.append("    if value is not _MISSING and {}:".format(
+                condition))
+            lines.append("        _fail(path, {!r}, {!r}, value)".format(
+                key, expected))
+        self.lines.extend(lines)
+        return name
+
+    def compile_list(self, schema: dict) -> str:
+        """ Emit function checking list of objects, return its name """
+        check = self.compile_object(schema)
+        name = self.name("check_list")
+        self.lines.extend([
+            "def {}(data, path, step):".format(name),
+            "    if type(data) is not list:",
+            "        _fail_type(path, 'list', data)",
+            "    for idx in range(0, len(data), step):",
+            "        {}(data[idx], (path, idx), step)".format(check)
+        ])
+        return name
+
+    def build(self, schema: list or dict) -> object:
+        if isinstance(schema, list):
+            name = self.compile_list(schema[0])
+        else:
+            name = self.compile_object(schema)
+        exec(compile("\n".join(self.lines), "<ruz.validators>", "exec"),
+             self.namespace)
+        return self.namespace[name]
+
+
+def compile_validator(schema: list or dict) -> object:
+    """
+        Compile check function for RESPONSE_SCHEMA entry
+
+        Returned function has signature (data, path, step), where step
+        is a distance between checked list elements (1 to check all).
+    """
+    return _Compiler().build(schema)
+
+
+VALIDATORS = {key: compile_validator(schema)
+              for key, schema in RESPONSE_SCHEMA.items()}
+# validators of single list element (used for streamed responses)
+ITEM_VALIDATORS = {key: compile_validator(schema[0])
+                   for key, schema in RESPONSE_SCHEMA.items()
+                   if isinstance(schema, list)}
+
+
+def schema_key(endpoint: str, data: object=None) -> str or None:
+    """ Return RESPONSE_SCHEMA key for endpoint (and response) """
+    endpoint = API_ENDPOINTS.get(endpoint, endpoint)
+    if endpoint in ("personLessons", "timetable/lessons"):
+        return "schedule2" if isinstance(data, dict) else "schedule"
+    return endpoint if endpoint in RESPONSE_SCHEMA else None
+
+
+def _step(mode: str, sample_rate: int) -> int or None:
+    if mode not in MODES:
+        raise ValueError("Unknown validation mode: '{}'".format(mode))
+    if mode == "off":
+        return None
+    return max(1, sample_rate) if mode == "sampled" else 1
+
+
+def validate(endpoint: str, data: object, mode: str="full",
+             sample_rate: int=SAMPLE_RATE) -> object:
+    """
+        Check response matches RESPONSE_SCHEMA, return data
+
+        Raise ValidationError if it doesn't. Keys which are missed in
+        response or in schema are not treated as errors.
+
+        :param endpoint - endpoint (or its alias) of response.
+        :param data - decoded response.
+        :param mode - 'off', 'sampled' or 'full'.
+        :param sample_rate - check every N-th element in sampled mode.
+    """
+    step = _step(mode, sample_rate)
+    key = schema_key(endpoint, data)
+    if step is not None and key is not None:
+        VALIDATORS[key](data, key, step)
+    return data
+
+
+def item_validator(endpoint: str, mode: str="full",
+                   sample_rate: int=SAMPLE_RATE) -> object or None:
+    """
+        Return function validating elements of streamed response
+
+        Function takes element and its index and returns element.
+        None is returned if there is nothing to validate.
+    """
+    step = _step(mode, sample_rate)
+    key = schema_key(endpoint)
+    if step is None or key not in ITEM_VALIDATORS:
+        return None
+    check = ITEM_VALIDATORS[key]
+
+    def validate_item(item: object, idx: int) -> object:
+        if not idx % step:
+            check(item, (key, idx), step)
+        return item
+    return validate_item
@@ -3,7 +3,7 @@ import os
 
 try:
     from setuptools import setup, find_packages
-    packages = find_packages(exclude=['tests'])
+    packages = find_packages(exclude=['tests', 'benchmarks'])
 except ImportError:
     from distutils.core import setup
     packages = ["hse_ruz"]
@@ -63,5 +63,12 @@ setup(
     ],
     license="MIT License",
     platforms=["All"],
-    python_requires=">=3.5"
+    python_requires=">=3.5",
+    entry_points={
+        'console_scripts': ["ruz = ruz.cli:main"]
+    },
+    extras_require={
+        'frame': ["numpy"],
+        'json': ["orjson"]
+    }
 )
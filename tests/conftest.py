@@ -0,0 +1,21 @@
+import pytest
+
+import ruz
+from ruz.cache import Cache, set_cache
+from ruz.singleflight import Group, set_group
+from ruz.transport import Transport, set_transport
+from tests.server import RUZServer
+
+
+@pytest.fixture
+def ruz_server(monkeypatch):
+    """ Point ruz.utils.get to local RUZ stand-in with fresh transport """
+    with RUZServer() as server:
+        monkeypatch.setattr(ruz.utils, "API_URL", server.url)
+        previous = set_transport(Transport())
+        previous_cache = set_cache(Cache())
+        previous_group = set_group(Group())
+        yield server
+        set_group(previous_group)
+        set_cache(previous_cache)
+        set_transport(previous).close()
@@ -0,0 +1,268 @@
+""" Local stand-ins for RUZ API and Redis servers (for offline tests) """
+
+import fnmatch
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import StreamRequestHandler, TCPServer, ThreadingMixIn
+from urllib import parse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        parts = parse.urlsplit(self.path)
+        endpoint = parts.path.rstrip("/").rsplit("/", 1)[-1]
+        params = dict(parse.parse_qsl(parts.query))
+        server = self.server
+        with server.lock:
+            server.requests.append((endpoint, params))
+            delay = server.latency
+            if server.jitter:
+                delay += server.random.uniform(-server.jitter, server.jitter)
+            failed = server.error_rate and \
+                server.random.random() < server.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            self._send(503, b"Service Unavailable")
+            return
+
+        route = self.server.routes.get(endpoint)
+        if route is None:
+            self._send(404, b"Not Found")
+            return
+        payload = route(params) if callable(route) else route
+        if payload is None:
+            self._send(503, b"Service Unavailable")
+            return
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode("utf-8")
+        encoding = None
+        if server.compress:
+            accepted = {value.split(";")[0].strip().lower() for value in
+                        self.headers.get("Accept-Encoding", "").split(",")}
+            if "gzip" in accepted:
+                encoding, payload = "gzip", gzip.compress(payload)
+            elif "deflate" in accepted:
+                encoding, payload = "deflate", zlib.compress(payload)
+        self._send(200, payload, "application/json; charset=utf-8",
+                   encoding)
+
+    def _send(self, status: int, body: bytes,
+              content_type: str="text/plain", encoding: str=None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class RUZServer:
+    """
+        Serve JSON payloads for RUZ endpoints on localhost
+
+        :param routes - {endpoint: payload or callable(params) -> payload},
+            callable may return None to answer with 503,
+            payload is encoded to JSON unless it is bytes.
+        :param latency - seconds to wait before response.
+        :param jitter - max random deviation of latency in seconds.
+        :param error_rate - share of requests answered with 503.
+        :param seed - seed for latency/errors random generator.
+        :param compress - compress responses with gzip or deflate
+            (if client accepts it).
+    """
+
+    def __init__(self, routes: dict=None, latency: float=0,
+                 jitter: float=0, error_rate: float=0, seed: int=None,
+                 compress: bool=False):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.routes = dict(routes or {})
+        self._server.requests = []
+        self._server.connections = 0
+        self._server.lock = threading.Lock()
+        self._server.random = random.Random(seed)
+        self._thread = None
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.compress = compress
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:{}/".format(self._server.server_port)
+
+    @property
+    def routes(self) -> dict:
+        return self._server.routes
+
+    @property
+    def requests(self) -> list:
+        return self._server.requests
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def latency(self) -> float:
+        return self._server.latency
+
+    @latency.setter
+    def latency(self, value: float) -> None:
+        self._server.latency = value
+
+    @property
+    def jitter(self) -> float:
+        return self._server.jitter
+
+    @jitter.setter
+    def jitter(self, value: float) -> None:
+        self._server.jitter = value
+
+    @property
+    def error_rate(self) -> float:
+        return self._server.error_rate
+
+    @error_rate.setter
+    def error_rate(self, value: float) -> None:
+        self._server.error_rate = value
+
+    @property
+    def compress(self) -> bool:
+        return self._server.compress
+
+    @compress.setter
+    def compress(self, value: bool) -> None:
+        self._server.compress = value
+
+    def start(self) -> 'RUZServer':
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'RUZServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class _RedisHandler(StreamRequestHandler):
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class _RedisServer(ThreadingMixIn, TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def execute(self, args: list) -> bytes:
+        command = args[0].upper()
+        with self.lock:
+            self.commands.append(command)
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command == b"SELECT":
+                return b"+OK\r\n"
+            if command == b"SET":
+                expire = None
+                if len(args) > 4 and args[3].upper() == b"PX":
+                    expire = time.time() + int(args[4]) / 1000
+                self.data[args[1]] = (args[2], expire)
+                return b"+OK\r\n"
+            if command == b"GET":
+                value, expire = self.data.get(args[1], (None, None))
+                if value is None or expire is not None and \
+                        expire < time.time():
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == b"DEL":
+                return b":%d\r\n" % int(
+                    self.data.pop(args[1], None) is not None
+                )
+            if command == b"SCAN":
+                # cursor is offset in sorted keys, pages of COUNT keys
+                options = {args[idx].upper(): args[idx + 1]
+                           for idx in range(2, len(args) - 1, 2)}
+                start, count = int(args[1]), int(options.get(b"COUNT", 10))
+                page = sorted(self.data)[start:start + count]
+                cursor = start + count if len(page) == count else 0
+                keys = [key for key in page if fnmatch.fnmatchcase(
+                    key, options.get(b"MATCH", b"*"))]
+                cursor = str(cursor).encode()
+                return b"*2\r\n$%d\r\n%s\r\n*%d\r\n" % (
+                    len(cursor), cursor, len(keys)) + b"".join(
+                    b"$%d\r\n%s\r\n" % (len(key), key) for key in keys)
+            if command == b"KEYS":
+                keys = [key for key in self.data
+                        if fnmatch.fnmatchcase(key, args[1])]
+                return b"*%d\r\n" % len(keys) + b"".join(
+                    b"$%d\r\n%s\r\n" % (len(key), key) for key in keys
+                )
+        return b"-ERR unknown command\r\n"
+
+
+class RedisServer:
+    """ In-memory server speaking minimal subset of Redis protocol """
+
+    def __init__(self):
+        self._server = _RedisServer(("127.0.0.1", 0), _RedisHandler)
+        self._server.data = {}
+        self._server.commands = []
+        self._server.lock = threading.Lock()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def data(self) -> dict:
+        return self._server.data
+
+    @property
+    def commands(self) -> list:
+        return self._server.commands
+
+    def __enter__(self) -> 'RedisServer':
+        threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                         daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,89 @@
+""" Tests for asyncio API (against local RUZ stand-in) """
+
+import asyncio
+import os
+import socket
+
+import pytest
+
+import ruz
+import ruz.aio
+from ruz.aio.transport import AsyncTransport, set_transport
+from tests.fixtures import SAMPLE_SCHEDULE
+
+
+@pytest.fixture
+def aio_transport():
+    previous = set_transport(AsyncTransport(limit=4))
+    yield
+    set_transport(previous).close()
+
+
+def run(coro: object) -> object:
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def test_get(ruz_server, aio_transport):
+    ruz_server.routes['buildings'] = [{'buildingOid': 1, 'name': "A"}]
+
+    async def main():
+        return [await ruz.aio.buildings() for _ in range(3)]
+
+    assert run(main()) == [[{'buildingOid': 1, 'name': "A"}]] * 3
+    assert ruz_server.connections == 1
+    assert run(ruz.aio.get("groups")) == []  # 404
+    assert run(ruz.aio.get("groups", tmp=1)) == []  # wrong schema
+
+
+def test_person_lessons(ruz_server, aio_transport):
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE
+    assert run(ruz.aio.person_lessons(lecturer_id=1)) == SAMPLE_SCHEDULE
+    endpoint, params = ruz_server.requests[-1]
+    assert params['lecturerOid'] == "1" and params['receiverType'] == "1"
+
+
+def test_schedules(ruz_server, aio_transport):
+    ruz_server.routes['personLessons'] = lambda params: [params]
+
+    async def main():
+        results = []  # no async comprehensions in Python 3.5
+        async for pair in ruz.aio.schedules(student_ids=range(50),
+                                            from_date="2018.06.07",
+                                            to_date="2018.06.08"):
+            results.append(pair)
+        return results
+
+    results = run(main())
+    assert sorted(key for key, _ in results) == list(range(50))
+    for key, lessons in results:
+        assert lessons[0]['studentOid'] == str(key)
+    assert ruz_server.connections <= 4
+
+    with pytest.raises(ValueError):
+        ruz.aio.schedules()
+
+
+def test_find_by_str(ruz_server, aio_transport):
+    ruz_server.routes['buildings'] = [{'name': "Main"}, {'name': None}]
+    assert run(ruz.aio.find_by_str("buildings", "MAI")) == [{'name': "Main"}]
+    with pytest.raises(NotImplementedError):
+        run(ruz.aio.find_by_str(ruz.buildings, "x"))
+
+
+def test_connections_closed_on_loop_change(ruz_server):
+    ruz_server.routes['buildings'] = []
+    transport = AsyncTransport()
+    url = ruz_server.url + "buildings"
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(transport.request(url))
+    writer = transport.pool("http", url.split("/")[2])._idle[0][1]
+    sock = socket.socket(fileno=os.dup(writer.get_extra_info(
+        "socket").fileno()))
+    loop.close()
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    run(transport.request(url))
+    sock.settimeout(1)
+    assert sock.recv(1) == b""  # connection of closed loop is shut down
+    sock.close()
+    transport.close()
@@ -0,0 +1,103 @@
+""" Tests for persistent cache backends """
+
+import os
+import time
+
+import pytest
+
+import ruz
+from ruz.backends import (FileBackend, RedisBackend, SQLiteBackend,
+                          backend_from_url)
+from ruz.cache import Cache, Entry, MemoryBackend, set_cache
+from tests.server import RedisServer
+
+VALUE = [{'name': "Корпус", 'buildingOid': 1}]
+
+
+def check_backend(backend):
+    assert backend.get("buildings") is None
+    backend.set("buildings", Entry(VALUE, 1.5, 60))
+    backend.set("groups?facultyOid=1", Entry([], 2, 30))
+    entry = backend.get("buildings")
+    assert (entry.value, entry.fetched_at, entry.ttl) == (VALUE, 1.5, 60)
+    assert sorted(backend.keys()) == ["buildings", "groups?facultyOid=1"]
+    backend.delete("buildings")
+    assert backend.get("buildings") is None
+    backend.clear()
+    assert backend.keys() == []
+
+
+def test_sqlite_backend(tmpdir):
+    path = str(tmpdir.join("ruz.db"))
+    check_backend(SQLiteBackend(path))
+    SQLiteBackend(path).set("buildings", Entry(VALUE, 1, 60))
+    assert SQLiteBackend(path).get("buildings").value == VALUE
+
+
+def test_file_backend(tmpdir):
+    check_backend(FileBackend(str(tmpdir)))
+    FileBackend(str(tmpdir)).set("buildings", Entry(VALUE, 1, 60))
+    assert FileBackend(str(tmpdir)).get("buildings").value == VALUE
+    assert [name for name in os.listdir(str(tmpdir))
+            if name.endswith(".json.gz")]
+
+
+def test_redis_backend():
+    with RedisServer() as server:
+        backend = RedisBackend(port=server.port, prefix="test:")
+        check_backend(backend)
+        backend.set("buildings", Entry(VALUE, time.time(), 60))
+        assert list(server.data) == [b"test:buildings"]
+        backend.close()
+        assert backend.get("buildings").value == VALUE  # reconnect
+
+        # keys are listed with SCAN in pages, other prefixes are skipped
+        for idx in range(2500):
+            server.data[b"test:key%d" % idx] = (b"", None)
+            server.data[b"other:key%d" % idx] = (b"", None)
+        keys = backend.keys()
+        assert len(keys) == 2501 and "key2499" in keys
+        assert b"SCAN" in server.commands and b"KEYS" not in server.commands
+
+
+def test_backend_from_url(tmpdir):
+    assert isinstance(backend_from_url("file://" + str(tmpdir)),
+                      FileBackend)
+    assert isinstance(backend_from_url("redis://127.0.0.1:1/2"),
+                      RedisBackend)
+    with pytest.raises(ValueError):
+        backend_from_url("memcached://localhost")
+
+
+def test_stale_while_revalidate(ruz_server, tmpdir):
+    set_cache(Cache(backend=SQLiteBackend(str(tmpdir.join("ruz.db"))),
+                    ttl={'buildings': 0.05}, stale_ttl=60))
+    ruz_server.routes['buildings'] = [{'name': "A"}]
+    assert ruz.buildings() == [{'name': "A"}]
+    time.sleep(0.06)
+
+    ruz_server.routes['buildings'] = [{'name': "B"}]
+    assert ruz.buildings() == [{'name': "A"}]  # stale, refresh started
+    for _ in range(100):
+        if ruz.buildings() == [{'name': "B"}]:
+            break
+        time.sleep(0.01)
+    assert ruz.buildings() == [{'name': "B"}]
+    assert len(ruz_server.requests) == 2
+
+
+class BrokenBackend(MemoryBackend):
+    def get(self, key):
+        raise OSError("database is locked")
+
+    def set(self, key, entry):
+        raise OSError("database is locked")
+
+
+def test_broken_backend(ruz_server):
+    ruz_server.routes['buildings'] = VALUE
+    for backend in (BrokenBackend(), RedisBackend(port=1)):
+        set_cache(Cache(backend=backend))
+        assert ruz.buildings() == VALUE
+        assert ruz.buildings() == VALUE
+    assert len(ruz_server.requests) == 4
@@ -0,0 +1,48 @@
+""" Smoke tests for benchmark suite and stand-in server options """
+
+import time
+from urllib import error
+
+import pytest
+
+import ruz
+from benchmarks import bench_decoders, suite
+from benchmarks.data import make_routes, make_schedule
+from ruz.decoders import DECODERS
+from ruz.validators import validate
+
+
+def test_synthetic_data():
+    lessons = make_schedule(1, "2018.06.04", "2018.06.10", scale=2)
+    assert len(lessons) == 10  # 2 * lessons of fixtures week
+    validate("schedule", lessons)
+    routes = make_routes(scale=1, size=10)
+    assert set(routes) >= {"personLessons", "lecturers", "auditoriums"}
+
+
+def test_server_options(ruz_server):
+    ruz_server.routes['lecturers'] = []
+    ruz_server.latency = 0.05
+    start = time.perf_counter()
+    assert ruz.utils.fetch(ruz.utils.make_url("lecturers")) == ([], False)
+    assert time.perf_counter() - start >= 0.05
+    ruz_server.latency, ruz_server.error_rate = 0, 1
+    with pytest.raises(error.HTTPError):
+        ruz.utils.get_transport().request(ruz.utils.make_url("lecturers"))
+
+
+def test_suite(tmpdir):
+    baseline = str(tmpdir.join("baseline.json"))
+    args = ["get", "validation", "--duration", "0.05", "--size", "10",
+            "--scale", "1", "--baseline", baseline]
+    assert suite.main(args + ["--save"]) == 0
+    assert suite.main(args + ["--tolerance", "1000"]) == 0
+    results = {'get': {'p50': 2.0}}
+    assert suite.compare(results, {'get': {'p50': 1.0}}) == ["get"]
+    assert suite.compare(results, {'get': {'p50': 1.9}}) == []
+
+
+def test_bench_decoders():
+    results = bench_decoders.main(lecturers=10, scale=1, repeat=1)
+    assert set(results['lecturers']) == {"str+json"} | set(DECODERS)
+    assert set(results['person_lessons get()']) == set(DECODERS)
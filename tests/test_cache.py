@@ -0,0 +1,67 @@
+""" Tests for response cache """
+
+import time
+
+import ruz
+from ruz.cache import Cache, Entry, MemoryBackend, get_cache, make_key
+
+
+def test_make_key():
+    assert make_key("lessons", b=1, a="x") == \
+        make_key("personLessons", a="x", b=1) == "personLessons?a=x&b=1"
+    assert make_key("sub_groups") == "subGroups"
+
+
+def test_memory_backend_lru():
+    backend = MemoryBackend(maxsize=2)
+    for key in "abc":
+        backend.set(key, Entry(key, 0, 1))
+    assert backend.get("a") is None
+    backend.get("b")
+    backend.set("d", Entry("d", 0, 1))
+    assert sorted(backend.keys()) == ["b", "d"]
+
+
+def test_cache_ttl():
+    cache = Cache(ttl={'buildings': 0.05}, negative_ttl=0)
+    cache.set("buildings", [1])
+    cache.set("groups", [])  # negative ttl is 0: not stored
+    assert cache.get("buildings").value == [1]
+    assert cache.get("groups") is None
+    time.sleep(0.06)
+    assert cache.get("buildings") is None
+    assert not len(cache.backend)
+
+
+def test_get_cached(ruz_server):
+    ruz_server.routes['lecturers'] = [{'fio': "A"}]
+    for _ in range(3):
+        assert ruz.lecturers() == [{'fio': "A"}]
+        assert ruz.lecturers(chair_id=1) == [{'fio': "A"}]
+    assert len(ruz_server.requests) == 2
+
+    ruz.utils.get("lecturers", use_cache=False)
+    assert len(ruz_server.requests) == 3
+
+    get_cache().invalidate("lecturers", chairOid=1)
+    ruz.lecturers()
+    ruz.lecturers(chair_id=1)
+    assert len(ruz_server.requests) == 4
+
+
+def test_invalidate_records(ruz_server):
+    ruz_server.routes['lecturers'] = [{'fio': "A"}]
+    ruz.utils.get("lecturers", chairOid=1)
+    ruz.utils.get("lecturers", records=True, chairOid=1)
+    ruz.utils.get("lecturers", validate="full", chairOid=1)
+    assert len(get_cache().backend) == 3
+    get_cache().invalidate("lecturers", chairOid=1)
+    assert not len(get_cache().backend)
+
+
+def test_get_negative_cache(ruz_server):
+    assert ruz.buildings() == []  # 404
+    ruz_server.routes['buildings'] = [{'name': "A"}]
+    assert ruz.buildings() == []
+    assert ruz.buildings(reset_cache=True) == [{'name': "A"}]
+    assert len(ruz_server.requests) == 2
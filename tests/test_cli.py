@@ -0,0 +1,112 @@
+""" Tests for `ruz` command line tool (against local RUZ stand-in) """
+
+import csv
+import io
+import json
+
+import pytest
+
+from ruz import cli
+from tests.fixtures import SAMPLE_SCHEDULE
+from tests.test_crawl import GROUPS, lessons_of
+
+LECTURERS = [{'lecturerOid': oid, 'fio': "Лектор {}".format(oid),
+              'chairOid': oid % 2} for oid in range(5)]
+
+
+def run(capsys: object, *args, status: int=0) -> tuple:
+    assert cli.main(list(args)) == status
+    captured = capsys.readouterr()
+    return captured.out, captured.err
+
+
+def test_collection(ruz_server, capsys):
+    ruz_server.routes['lecturers'] = LECTURERS
+    out, err = run(capsys, "lecturers")
+    assert [json.loads(line) for line in out.splitlines()] == LECTURERS
+    assert "1/1 requests, 5 rows" in err
+
+    ruz_server.routes['auditoriums'] = lambda params: [
+        {'auditoriumOid': int(params['buildingOid']) * 10, 'number': "1"}]
+    out, _ = run(capsys, "auditoriums", "--building", "1", "2", "3",
+                 "--workers", "3", "--format", "csv", "-q")
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert sorted((row['auditoriumOid'], row['buildingOid'])
+                  for row in rows) == [("10", "1"), ("20", "2"), ("30", "3")]
+    assert len(ruz_server.requests) == 1 + 3
+
+
+def test_schedules(ruz_server, capsys, tmpdir):
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE
+    output = str(tmpdir.join("lessons.csv"))
+    _, err = run(capsys, "schedules", "--lecturers", "1", "2",
+                 "--from", "2018.06.07", "--to", "2018.06.11", "-o", output)
+    assert "2/2 requests, 10 rows" in err
+    with open(output, encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert sorted({row['receiver'] for row in rows}) == ["1", "2"]
+    assert rows[0]['date'] == SAMPLE_SCHEDULE[0]['date']
+    endpoint, params = ruz_server.requests[-1]
+    assert params['receiverType'] == "1" and params['toDate'] == "2018.06.11"
+
+    ruz_server.routes['auditoriums'] = [{'auditoriumOid': 5},
+                                        {'auditoriumOid': 6}]
+    out, _ = run(capsys, "schedules", "--building", "1", "-q")
+    assert {json.loads(line)['receiver'] for line in out.splitlines()} == \
+        {5, 6}
+
+
+def test_faculty_schedules(ruz_server, capsys):
+    ruz_server.routes.update({
+        'groups': [{'groupOid': oid} for oid in GROUPS],
+        'staffOfGroup': lambda params: [
+            {'studentOid': oid} for oid in GROUPS[int(params['groupOid'])]],
+        'subGroups': [],
+        'personLessons': lessons_of
+    })
+    out, err = run(capsys, "schedules", "--faculty", "7")
+    rows = [json.loads(line) for line in out.splitlines()]
+    assert sorted({row['receiver'] for row in rows}) == \
+        [10, 11, 12, 20, 21, 30, 31]
+    assert "\r3 requests, 16 rows" in err  # one request per group
+
+
+def test_failed_requests(ruz_server, capsys):
+    ruz_server.routes['personLessons'] = lambda params: \
+        None if params['lecturerOid'] == "2" else SAMPLE_SCHEDULE
+    out, err = run(capsys, "schedules", "--lecturers", "1", "2", "3",
+                   status=1)
+    assert {json.loads(line)['receiver'] for line in out.splitlines()} == \
+        {1, 3}
+    assert "3/3 (1 failed) requests" in err
+    assert err.endswith("1 of 3 requests failed\n")
+
+    _, err = run(capsys, "lecturers", "-q", status=1)  # 404
+    assert err == "1 of 1 requests failed\n"
+
+    ruz_server.routes.update({
+        'groups': [{'groupOid': oid} for oid in GROUPS],
+        'staffOfGroup': lambda params: [
+            {'studentOid': oid} for oid in GROUPS[int(params['groupOid'])]],
+        'subGroups': [],
+        'personLessons': lambda params: None
+    })
+    _, err = run(capsys, "schedules", "--faculty", "7", "-q", status=1)
+    assert err == "3 of 3 requests failed\n"
+
+    ruz_server.routes['staffOfGroup'] = lambda params: None
+    _, err = run(capsys, "schedules", "--faculty", "7", "-q", status=1)
+    assert err == "4 of 4 requests failed\n"  # staff of each group
+    del ruz_server.routes['groups']
+    _, err = run(capsys, "schedules", "--faculty", "7", "-q", status=1)
+    assert err == "1 of 1 requests failed\n"
+
+
+def test_parse_args():
+    options = cli.parse_args(["schedules", "--emails", "a@hse.ru", "-o",
+                              "out.csv"])
+    assert options.emails == ["a@hse.ru"] and options.format == "csv"
+    with pytest.raises(SystemExit):
+        cli.parse_args(["schedules", "--students", "1", "--building", "1"])
+    with pytest.raises(SystemExit):
+        cli.parse_args(["staff-of-group"])
@@ -0,0 +1,92 @@
+""" Tests for sweep-line conflict detection """
+
+import random
+
+import pytest
+
+import ruz
+from ruz.conflicts import find_conflicts, schedule_conflicts, sweep
+
+
+def lesson(day: str, begin: str, end: str, auditorium: int=1,
+           lecturer: int=1, discipline: str="Math", group: int=1) -> dict:
+    return {'date': day, 'beginLesson': begin, 'endLesson': end,
+            'auditoriumOid': auditorium, 'lecturerOid': lecturer,
+            'discipline': discipline, 'groupOid': group}
+
+
+LESSONS = [
+    lesson("2018.09.03", "09:00", "10:20", auditorium=1, lecturer=1),
+    # the same lecture for other group is not a conflict
+    lesson("2018.09.03", "09:00", "10:20", auditorium=1, lecturer=1,
+           group=2),
+    # double-booked auditorium
+    lesson("2018.09.03", "10:00", "11:20", auditorium=1, lecturer=2,
+           discipline="Physics"),
+    # lecturer in two auditoriums at once
+    lesson("2018.09.03", "11:00", "12:20", auditorium=2, lecturer=2,
+           discipline="Physics"),
+    # adjacent lessons don't overlap
+    lesson("2018.09.03", "12:20", "13:40", auditorium=2, lecturer=3),
+    # the same time on other day
+    lesson("2018.09.04", "10:00", "11:20", auditorium=1, lecturer=3),
+]
+
+
+def pairs(conflicts: object) -> set:
+    return {(conflict.field, conflict.value, conflict.first['beginLesson'],
+             conflict.second['beginLesson']) for conflict in conflicts}
+
+
+def test_sweep():
+    conflicts = list(sweep([item for item in LESSONS
+                            if item['auditoriumOid'] == 1],
+                           "auditoriumOid", 1))
+    assert pairs(conflicts) == {("auditoriumOid", 1, "09:00", "10:00")}
+    assert conflicts[0].date == "2018.09.03"
+    assert conflicts[0].second['discipline'] == "Physics"
+    # all pairs of overlapping lessons are reported
+    same = [lesson("2018.09.03", "09:00", "10:20", discipline=str(idx))
+            for idx in range(4)]
+    assert len(list(sweep(same, "auditoriumOid"))) == 6
+
+
+def test_find_conflicts():
+    expected = {("auditoriumOid", 1, "09:00", "10:00"),
+                ("lecturerOid", 2, "10:00", "11:00")}
+    assert pairs(find_conflicts(LESSONS)) == expected
+    shuffled = LESSONS[:]
+    random.Random(1).shuffle(shuffled)
+    assert pairs(find_conflicts(shuffled)) == expected
+    assert pairs(find_conflicts(LESSONS, presorted=True)) == expected
+    assert pairs(find_conflicts(LESSONS, fields=("lecturerOid",))) == \
+        {("lecturerOid", 2, "10:00", "11:00")}
+    with pytest.raises(ValueError):
+        list(find_conflicts(LESSONS[::-1], presorted=True))
+
+
+def test_presorted_is_streaming():
+    consumed = []
+
+    def lessons():
+        for item in LESSONS:
+            consumed.append(item)
+            yield item
+
+    conflicts = find_conflicts(lessons(), presorted=True)
+    next(conflicts)
+    assert len(consumed) == len(LESSONS)  # the first lesson of next day
+
+
+def test_schedule_conflicts(ruz_server):
+    by_auditorium = {}
+    for item in LESSONS:
+        by_auditorium.setdefault(str(item['auditoriumOid']), []).append(item)
+    ruz_server.routes['personLessons'] = \
+        lambda params: by_auditorium[params['auditoriumOid']]
+    schedules = ruz.schedules(auditorium_ids=[1, 2], max_workers=2,
+                              ordered=False)
+    assert pairs(schedule_conflicts(schedules, "auditoriumOid")) == \
+        {("auditoriumOid", 1, "09:00", "10:00")}
+    assert pairs(schedule_conflicts([LESSONS[:3]], "auditoriumOid")) == \
+        {("auditoriumOid", 1, "09:00", "10:00")}
@@ -0,0 +1,104 @@
+""" Tests for faculty-wide schedule crawl """
+
+from urllib.error import URLError
+
+import pytest
+
+from ruz.crawl import (LessonPool, faculty_schedules, group_plan,
+                       iter_faculty_schedules)
+
+GROUPS = {1: [10, 11, 12], 2: [20, 21], 3: [30, 31], 4: []}
+
+
+def lessons_of(params):
+    student_id = int(params['studentOid'])
+    group_id = student_id // 10
+    lessons = [{'groupOid': group_id, 'discipline': "Общая"},
+               {'groupOid': 0, 'discipline': "Поток"}]
+    if group_id == 3:  # subgroups
+        lessons.append({'groupOid': group_id, 'subGroup': student_id % 2})
+    return lessons
+
+
+def test_group_plan():
+    staff = {group_id: [{'studentOid': oid} for oid in members]
+             for group_id, members in GROUPS.items()}
+    assert group_plan(GROUPS, staff, {3}) == [
+        (10, [10, 11, 12]), (20, [20, 21]), (30, [30]), (31, [31])
+    ]
+
+
+def faculty_routes(ruz_server):
+    ruz_server.routes.update({
+        'groups': [{'groupOid': oid} for oid in GROUPS],
+        'staffOfGroup': lambda params: [
+            {'studentOid': oid, 'fio': str(oid)}
+            for oid in GROUPS[int(params['groupOid'])]
+        ],
+        'subGroups': [{'groupOid': 3, 'name': "3-1"},
+                      {'groupOid': 3, 'name': "3-2"}],
+        'personLessons': lessons_of
+    })
+
+
+def test_faculty_schedules(ruz_server):
+    faculty_routes(ruz_server)
+    schedules = faculty_schedules(7, "2018.09.01", "2018.09.07",
+                                  max_workers=4)
+    assert sorted(schedules) == [10, 11, 12, 20, 21, 30, 31]
+    assert schedules.requests == 4 and schedules.groups == 4
+    requested = [params for endpoint, params in ruz_server.requests
+                 if endpoint == "personLessons"]
+    assert len(requested) == 4
+    assert requested[0]['fromDate'] == "2018.09.01"
+
+    for student_id, lessons in schedules.items():
+        assert lessons == lessons_of({'studentOid': student_id})
+    assert schedules[10] is schedules[12]
+    # lessons shared by groups are the same objects
+    assert schedules[10][1] is schedules[20][1] is schedules[31][1]
+    assert schedules[30][0] is schedules[31][0]
+    assert schedules.failed == []
+
+
+def test_failed_group(ruz_server):
+    faculty_routes(ruz_server)
+    ruz_server.routes['personLessons'] = lambda params: \
+        None if params['studentOid'] in ("10", "31") else lessons_of(params)
+    schedules = faculty_schedules(7, "2018.09.01", "2018.09.07",
+                                  max_workers=4)
+    assert sorted(schedules) == [20, 21, 30]
+    assert sorted(schedules.failed) == [10, 11, 12, 31]
+    assert schedules.requests == 4
+
+    result = dict((tuple(members), lessons) for members, lessons in
+                  iter_faculty_schedules(7, "2018.09.01", "2018.09.07"))
+    assert result[(10, 11, 12)] is None and result[(31,)] is None
+    assert result[(20, 21)] == lessons_of({'studentOid': 20})
+
+
+def test_lesson_pool():
+    pool = LessonPool()
+    first = pool.intern([{'a': 1}, {'b': [1]}])
+    second = pool.intern([{'a': 1}, {'b': [1]}])
+    assert first[0] is second[0] and first[1] is not second[1]
+    assert len(pool) == 1
+
+
+def test_failed_staff(ruz_server):
+    faculty_routes(ruz_server)
+    staff = ruz_server.routes['staffOfGroup']
+    ruz_server.routes['staffOfGroup'] = lambda params: \
+        None if params['groupOid'] == "2" else staff(params)
+    schedules = faculty_schedules(7, "2018.09.01", "2018.09.07")
+    assert sorted(schedules) == [10, 11, 12, 30, 31]
+    assert schedules.failed_groups == [2] and schedules.failed == []
+
+    failed_groups = []
+    result = list(iter_faculty_schedules(7, "2018.09.01", "2018.09.07",
+                                         failed_groups=failed_groups))
+    assert failed_groups == [2] and len(result) == 3
+
+    del ruz_server.routes['groups']
+    with pytest.raises(URLError):
+        faculty_schedules(7, "2018.09.01", "2018.09.07")
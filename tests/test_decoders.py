@@ -0,0 +1,44 @@
+""" Tests for JSON decoder registry """
+
+import pytest
+
+import ruz
+from ruz import decoders
+from tests.fixtures import SAMPLE_SCHEDULE
+
+
+@pytest.fixture(params=list(decoders.DECODERS))
+def decoder(request):
+    previous = decoders.set_decoder(request.param)
+    yield request.param
+    decoders.set_decoder(previous)
+
+
+def test_loads(decoder):
+    data = '[{"auditorium": "Ауд. 501", "lecturerOid": 1}]'
+    expected = [{'auditorium': "Ауд. 501", 'lecturerOid': 1}]
+    assert decoders.loads(data.encode("utf-8")) == expected
+    assert decoders.loads(data.encode("cp1251"), "cp1251") == expected
+    assert decoders.loads(data.encode("utf-8"), "UTF8") == expected
+    with pytest.raises(ValueError):
+        decoders.loads(b"[{")
+
+
+def test_get(ruz_server, decoder):
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE
+    assert ruz.utils.get("schedule", studentOid=1) == SAMPLE_SCHEDULE
+
+
+def test_set_decoder():
+    calls = []
+    previous = decoders.set_decoder(
+        lambda data, encoding: calls.append(data) or [])
+    try:
+        assert decoders.loads(b"[1]") == [] and calls == [b"[1]"]
+        with pytest.raises(ValueError):
+            decoders.set_decoder("simplejson")
+        decoders.set_decoder("auto")
+        assert decoders.get_decoder() is next(iter(
+            decoders.DECODERS.values()))
+    finally:
+        decoders.set_decoder(previous)
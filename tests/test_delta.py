@@ -0,0 +1,67 @@
+""" Tests for schedule diffs """
+
+import json
+
+from ruz.delta import Snapshot, Tracker, content_hash, diff
+from tests.test_records import make_lesson
+
+
+def lesson(n, **fields):
+    data = make_lesson(n)
+    data.update(discipline="Дисциплина {}".format(n), **fields)
+    return data
+
+
+def test_content_hash():
+    first, second = lesson(1), lesson(1)
+    second['newField'] = None
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash(lesson(2))
+
+
+def test_diff():
+    old = [lesson(1), lesson(2), lesson(3), lesson(4)]
+    snapshot = Snapshot(old)
+    assert not diff(snapshot, [dict(item) for item in old])
+
+    new = [lesson(1, auditorium="501"),                  # room changed
+           lesson(2, beginLesson="12:10", endLesson="13:30"),  # moved
+           lesson(4), lesson(5)]                         # 3 removed
+    delta = diff(snapshot, new)
+    assert delta.added == [new[3]]
+    assert [item['discipline'] for item in delta.removed] == \
+        ["Дисциплина 3"]
+    assert delta.removed[0] == {key: value for key, value in
+                                lesson(3).items() if value is not None}
+    changes = {change.new['discipline']: change.fields
+               for change in delta.changed}
+    assert changes == {
+        "Дисциплина 1": {'auditorium': (old[0]['auditorium'], "501")},
+        "Дисциплина 2": {'beginLesson': ("09:00", "12:10"),
+                         'endLesson': ("10:20", "13:30")}
+    }
+    assert not diff(delta.snapshot, new)
+
+
+def test_duplicates_and_serialization():
+    snapshot = Snapshot([lesson(1), lesson(1)])
+    assert len(snapshot) == 2
+    restored = Snapshot.from_dict(json.loads(json.dumps(
+        snapshot.to_dict())))
+    assert restored.rows == snapshot.rows
+    delta = diff(restored, [lesson(1)])
+    assert len(delta.removed) == 1 and not delta.added
+
+
+def test_tracker():
+    tracker = Tracker()
+    assert len(tracker.update(1, [lesson(1)]).added) == 1
+    assert not tracker.update(1, [lesson(1)])
+    changed = lesson(1, building="Новое здание", extra="x")
+    delta = tracker.update(1, [changed])
+    assert delta.changed[0].fields == {
+        'building': (lesson(1)['building'], "Новое здание"),
+        'extra': (None, "x")
+    }
+    assert tracker.snapshots[1].lesson(next(iter(
+        tracker.snapshots[1].rows)))['extra'] == "x"
@@ -0,0 +1,58 @@
+""" Tests for columnar schedule frame """
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ruz.frame import ScheduleFrame  # noqa: E402
+
+LESSONS = [
+    {'date': "2018.06.07", 'beginLesson': "09:00", 'endLesson': "10:20",
+     'kindOfWork': "Лекция", 'lecturerOid': 1, 'building': "A",
+     'auditoriumOid': 10, 'subGroup': None},
+    {'date': "2018.06.07", 'beginLesson': "10:30", 'endLesson': "11:50",
+     'kindOfWork': "Семинар", 'lecturerOid': 2, 'building': "A",
+     'auditoriumOid': 11},
+    {'date': "2018.06.08", 'beginLesson': "09:00", 'endLesson': "10:20",
+     'kindOfWork': "Лекция", 'lecturerOid': 1, 'building': "B",
+     'auditoriumOid': 20},
+    {'date': "2018.06.09", 'beginLesson': "13:00", 'endLesson': "14:20",
+     'kindOfWork': "Семинар", 'lecturerOid': 1, 'building': None,
+     'auditoriumOid': None}
+]
+
+
+@pytest.fixture
+def frame():
+    return ScheduleFrame.from_schedules([("a", LESSONS[:2]),
+                                         ("b", LESSONS[2:])])
+
+
+def test_columns(frame):
+    assert len(frame) == 4
+    assert list(frame.column("building")) == ["A", "A", "B", None]
+    assert list(frame.column("key")) == ["a", "a", "b", "b"]
+    assert list(frame.column("duration")) == [80] * 4
+    assert list(frame.column("auditoriumOid")) == [10, 11, 20, -1]
+    assert frame.column("date")[2] == np.datetime64("2018-06-08")
+
+
+def test_filter(frame):
+    assert len(frame.where(kindOfWork="Лекция")) == 2
+    assert len(frame.where(kindOfWork="Экзамен")) == 0
+    assert len(frame.where(lecturerOid=[1, 3], building="A")) == 1
+    assert len(frame.where(building=None)) == 1
+    assert len(frame.between("2018.06.08", "2018.06.30")) == 2
+    assert len(frame.where(date="2018.06.07")) == 2
+
+
+def test_group(frame):
+    assert frame.count("building") == {("A",): 2, ("B",): 1, (None,): 1}
+    assert frame.where(kindOfWork="Лекция").count("date") == \
+        {("2018.06.07",): 1, ("2018.06.08",): 1}
+    assert frame.sum_duration("lecturerOid", "kindOfWork") == {
+        (1, "Лекция"): 160, (1, "Семинар"): 80, (2, "Семинар"): 80
+    }
+    assert ScheduleFrame.from_lessons([]).count("building") == {}
+    with pytest.raises(ValueError):
+        frame.count()
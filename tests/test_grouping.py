@@ -0,0 +1,89 @@
+""" Tests for streaming lesson grouping """
+
+import random
+
+import pytest
+
+import ruz
+from ruz.grouping import (group_lessons, iso_week, key_function,
+                          lesson_minutes, totals)
+from ruz.records import to_records
+from tests.fixtures import SAMPLE_SCHEDULE
+
+
+def lesson(date: str, begin: str="09:00", end: str="10:20",
+           lecturer: int=1, discipline: str="Math") -> dict:
+    return {'date': date, 'beginLesson': begin, 'endLesson': end,
+            'lecturerOid': lecturer, 'discipline': discipline}
+
+
+LESSONS = [
+    lesson("2018.06.01"),
+    lesson("2018.06.01", "10:30", "11:50", lecturer=2),
+    lesson("2018.06.04", discipline="Physics"),
+    lesson("2018.06.05", "13:40", "15:00", lecturer=2),
+]
+
+
+def test_helpers():
+    assert iso_week("2018.06.03") == "2018-W22"
+    assert iso_week("2018.06.04") == "2018-W23"
+    assert iso_week("2018.12.31") == "2019-W01"
+    assert lesson_minutes(LESSONS[0]) == 80
+    assert lesson_minutes({'date': "2018.06.01"}) == 0
+    assert key_function("lecturer", "date")(LESSONS[1]) == (2, "2018.06.01")
+    with pytest.raises(ValueError):
+        key_function()
+
+
+def test_group_lessons():
+    groups = list(group_lessons(LESSONS, "week"))
+    assert [(group.key, group.count, group.minutes) for group in groups] \
+        == [("2018-W22", 2, 160), ("2018-W23", 2, 160)]
+    assert groups[0].lessons == LESSONS[:2]
+
+    by_lecturer = totals(LESSONS, "week", "lecturer")
+    assert by_lecturer == {("2018-W22", 1): (1, 80),
+                           ("2018-W22", 2): (1, 80),
+                           ("2018-W23", 1): (1, 80),
+                           ("2018-W23", 2): (1, 80)}
+    assert totals(LESSONS, lambda item: item['discipline'][0]) == \
+        {"M": (3, 240), "P": (1, 80)}
+    assert next(group_lessons(LESSONS, keep_lessons=False)).lessons is None
+    # records are grouped as dicts
+    assert totals(to_records("schedule", LESSONS), "day") == \
+        totals(LESSONS, "day")
+
+
+def test_unsorted_input():
+    shuffled = LESSONS[:]
+    random.Random(0).shuffle(shuffled)
+    assert totals(shuffled, "day") == dict(totals(LESSONS, "day"))
+    assert len(list(group_lessons(shuffled, "day"))) == 3
+    with pytest.raises(ValueError):
+        list(group_lessons(LESSONS + LESSONS[:1], "day", presorted=True))
+
+
+def test_presorted_is_lazy():
+    consumed = []
+
+    def lessons():
+        for item in LESSONS:
+            consumed.append(item)
+            yield item
+
+    groups = group_lessons(lessons(), "day", presorted=True)
+    first = next(groups)
+    assert first.key == "2018.06.01" and first.count == 2
+    assert len(consumed) == 3  # the first lesson of the next day
+    assert [group.key for group in groups] == ["2018.06.04", "2018.06.05"]
+
+
+def test_split_schedule_unsorted():
+    schedule = SAMPLE_SCHEDULE[::-1] + SAMPLE_SCHEDULE[:1]
+    days = ruz.utils.split_schedule_by_days(schedule)
+    assert [day['date'] for day in days] == \
+        ["2018.06.11", "2018.06.08", "2018.06.07"]
+    assert [(day['date'], day['count'], day['lessons']) for day in days] == \
+        [(group.key, group.count, group.lessons)
+         for group in group_lessons(schedule, "day")]
@@ -0,0 +1,80 @@
+""" Tests for lookups by Oid """
+
+import time
+
+import pytest
+
+from ruz import cache, index
+
+LECTURERS = [
+    {'lecturerOid': 1, 'lecturerGid': 11, 'chairOid': 5, 'fio': "A"},
+    {'lecturerOid': 2, 'lecturerGid': 12, 'chairOid': 5, 'fio': "B"},
+    {'lecturerOid': 3, 'lecturerGid': 13, 'chairOid': 6, 'fio': "C"}
+]
+
+
+@pytest.fixture
+def indexes(ruz_server, monkeypatch):
+    monkeypatch.setattr(index, "_indexes", {})
+    ruz_server.routes['lecturers'] = LECTURERS
+    ruz_server.routes['buildings'] = [{'buildingOid': 7, 'name': "Main"}]
+    return ruz_server
+
+
+def test_id_fields():
+    assert index.id_fields("lecturers") == \
+        ["chairOid", "chairGid", "lecturerOid", "lecturerGid"]
+    assert "TypeOfAuditoriumOid" in index.id_fields("auditoriums")
+
+
+def test_lookup(indexes):
+    assert index.lecturer_by_id(2) == LECTURERS[1]
+    assert index.lecturer_by_id(4) is None
+    assert index.lookup("lecturers", 13, field="lecturerGid") == LECTURERS[2]
+    assert index.find("lecturers", "chairOid", 5) == LECTURERS[:2]
+    assert index.building_by_id(7)['name'] == "Main"
+    assert len(indexes.requests) == 2
+    with pytest.raises(KeyError):
+        index.find("lecturers", "fio", "A")
+
+
+def test_refresh_with_cache(indexes):
+    assert index.lecturer_by_id(1)['fio'] == "A"
+    indexes.routes['lecturers'] = [{'lecturerOid': 1, 'fio': "D"}]
+    assert index.lecturer_by_id(1)['fio'] == "A"
+    cache.invalidate("lecturers")
+    assert index.lecturer_by_id(1)['fio'] == "D"
+    assert len(indexes.requests) == 2
+
+
+def test_ttl():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return LECTURERS, False
+
+    idx = index.CollectionIndex("lecturers", loader, ttl=0)
+    assert idx.lookup(3) == LECTURERS[2]
+    mapping = idx.map("lecturerOid")
+    idx.lookup(3)
+    assert len(loads) == 3
+    assert idx.map("lecturerOid") is mapping  # same data: not rebuilt
+
+
+def test_failed_load(indexes):
+    del indexes.routes['lecturers']  # 404
+    assert index.lecturer_by_id(1) is None
+    assert index.lecturer_by_id(2) is None  # not requested until retry
+    assert len(indexes.requests) == 1
+
+    indexes.routes['lecturers'] = LECTURERS
+    idx = index.get_index("lecturers")
+    idx._retry = 0  # retry_ttl is over
+    assert index.lecturer_by_id(1) == LECTURERS[0]
+    assert len(indexes.requests) == 2
+
+    del indexes.routes['lecturers']  # previous records are kept
+    idx._expires = 0
+    assert index.lecturer_by_id(2) == LECTURERS[1]
+    assert idx._retry > time.time() and len(indexes.requests) == 3
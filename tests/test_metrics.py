@@ -0,0 +1,84 @@
+""" Tests for request metrics """
+
+import pytest
+
+import ruz
+from ruz import metrics
+from ruz.metrics import Counter, Histogram, Registry
+
+
+@pytest.fixture
+def registry():
+    previous = metrics.set_registry(metrics.default_registry())
+    metrics.enable()
+    yield metrics.get_registry()
+    metrics.disable()
+    metrics.set_registry(previous)
+
+
+def test_render():
+    registry = Registry()
+    registry.register(Counter("calls_total", "Calls"))
+    registry.register(Histogram("latency_seconds", "Latency", (0.1, 1)))
+    registry.inc("calls_total", endpoint='a"b')
+    registry.inc("calls_total", 2, endpoint="c")
+    for value in (0.05, 0.5, 5):
+        registry.observe("latency_seconds", value, endpoint="c")
+    assert registry.render() == "\n".join((
+        "# HELP calls_total Calls",
+        "# TYPE calls_total counter",
+        'calls_total{endpoint="a\\"b"} 1',
+        'calls_total{endpoint="c"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{endpoint="c",le="0.1"} 1',
+        'latency_seconds_bucket{endpoint="c",le="1"} 2',
+        'latency_seconds_bucket{endpoint="c",le="+Inf"} 3',
+        'latency_seconds_sum{endpoint="c"} 5.55',
+        'latency_seconds_count{endpoint="c"} 3',
+    )) + "\n"
+    with pytest.raises(ValueError):
+        registry.register(Counter("calls_total"))
+
+
+def test_failed_sink(ruz_server, registry):
+    def sink(name: str, labels: dict, value: float) -> None:
+        raise ConnectionError("StatsD is down")
+    events = []
+    metrics.add_sink(sink)
+    metrics.add_sink(lambda *args: events.append(args))
+    ruz_server.routes['lecturers'] = [{'fio': "A"}]
+    assert ruz.lecturers() == [{'fio': "A"}]
+    assert registry["ruz_requests_total"].value(endpoint="lecturers") == 1
+    assert events
+
+
+def test_get_metrics(ruz_server, registry):
+    events = []
+    metrics.add_sink(lambda *args: events.append(args))
+    ruz_server.routes['lecturers'] = [{'fio': "A"}, {'fio': "B"}]
+    ruz.lecturers()
+    ruz.lecturers()
+    assert list(ruz.iter_lecturers()) == [{'fio': "A"}, {'fio': "B"}]
+    ruz.auditoriums()
+
+    assert registry["ruz_requests_total"].value(endpoint="lecturers") == 2
+    assert registry["ruz_records_total"].value(endpoint="lecturers") == 4
+    assert registry["ruz_cache_hits_total"].value(endpoint="lecturers") == 1
+    assert registry["ruz_cache_misses_total"].value(
+        endpoint="lecturers") == 1
+    assert registry["ruz_errors_total"].value(
+        endpoint="auditoriums", type="HTTPError") == 1
+    assert registry["ruz_request_seconds"].count(endpoint="lecturers") == 2
+    size = len(b'[{"fio": "A"}, {"fio": "B"}]')
+    assert registry["ruz_response_bytes"].sum(endpoint="lecturers") == \
+        2 * size
+    assert ("ruz_requests_total", {'endpoint': "lecturers"}, 1) in events
+    assert 'ruz_requests_total{endpoint="lecturers"} 2' in metrics.render()
+
+
+def test_disabled(ruz_server, registry):
+    metrics.disable()
+    ruz_server.routes['lecturers'] = []
+    ruz.lecturers()
+    assert metrics.render() == ""
@@ -0,0 +1,66 @@
+""" Tests for prepared requests """
+
+import pytest
+
+import ruz
+from ruz.cache import make_key, set_cache
+from ruz.utils import get
+
+
+def test_prepare(ruz_server):
+    ruz_server.routes['personLessons'] = lambda params: [params]
+    lessons = ruz.prepare("schedule", fromDate="2018.06.01",
+                          toDate="2018.06.07", receiverType=None)
+    first = lessons(studentOid=1)
+    assert first == [{'fromDate': "2018.06.01", 'toDate': "2018.06.07",
+                      'studentOid': "1"}]
+    # same cache keys as get()
+    assert get("schedule", fromDate="2018.06.01", toDate="2018.06.07",
+               studentOid=1) is first
+    assert lessons(studentOid=1) is first
+    assert make_key("schedule", fromDate="2018.06.01", toDate="2018.06.07",
+                    studentOid=1) in ruz.utils.get_cache().backend.keys()
+    # params given on call override static ones
+    other = lessons(fromDate="2018.06.03", studentOid=1)
+    assert other[0]['fromDate'] == "2018.06.03"
+    assert get("schedule", fromDate="2018.06.03", toDate="2018.06.07",
+               studentOid=1) is other
+    assert lessons(fromDate=None, studentOid=1) is first
+    email = "name@edu.hse.ru"
+    assert lessons(email=email)[0]['email'] == email
+    assert len(ruz_server.requests) == 3
+
+    streamed = ruz.prepare("schedule", stream=True, records=True,
+                           lecturerOid=5)
+    assert list(streamed())[0]['lecturerOid'] == "5"
+    ruz_server.routes['typeOfAuditoriums'] = [{'name': "Лекционная"}]
+    assert ruz.prepare("type_of_auditoriums")() == [{'name': "Лекционная"}]
+
+
+def test_prepare_without_cache(ruz_server):
+    ruz_server.routes['lecturers'] = [{'fio': "A"}]
+    previous = set_cache(None)
+    try:
+        assert ruz.prepare("lecturers")(chairOid=1) == [{'fio': "A"}]
+        assert ruz.prepare("lecturers", use_cache=False)() == [{'fio': "A"}]
+    finally:
+        set_cache(previous)
+    assert len(ruz_server.requests) == 2
+
+
+def test_prepare_errors():
+    with pytest.raises(ValueError):
+        ruz.prepare("unknown")
+    with pytest.raises(ValueError):
+        ruz.prepare("groups", lecturerOid=1)
+    with pytest.raises(TypeError):
+        ruz.prepare("groups", facultyOid="1")
+    lessons = ruz.prepare("schedule", fromDate="2018.06.01")
+    with pytest.raises(ValueError):
+        lessons()
+    with pytest.raises(ValueError):
+        lessons(studentOid=None)
+    with pytest.raises(TypeError):
+        lessons(studentOid="1")
+    with pytest.raises(ValueError):
+        lessons(email="name@gmail.com")
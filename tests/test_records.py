@@ -0,0 +1,91 @@
+""" Tests for compact records """
+
+import json
+import pickle
+import tracemalloc
+from datetime import date, time
+
+import pytest
+
+import ruz
+from ruz.records import Lecturer, Lesson, Record, to_records
+from ruz.schema import RESPONSE_SCHEMA
+
+
+def make_lesson(n):
+    lesson = {}
+    for key, kind in RESPONSE_SCHEMA['schedule'][0].items():
+        if kind is int:
+            lesson[key] = n
+        elif kind is bool:
+            lesson[key] = False
+        else:
+            lesson[key] = "Покровский бульвар, д.11 ({})".format(key)
+    lesson.update(date="2018.06.07", beginLesson="09:00",
+                  endLesson="10:20", subGroup=None)
+    return lesson
+
+
+def test_dict_compatible():
+    data = make_lesson(1)
+    data['newField'] = "x"
+    lesson = Lesson(data)
+    assert lesson == data and data == lesson
+    assert dict(lesson) == data and len(lesson) == len(data)
+    assert lesson['discipline'] == lesson.discipline
+    assert lesson['newField'] == "x"
+    assert lesson.get('missing') is None and 'missing' not in lesson
+    with pytest.raises(KeyError):
+        lesson['missing']
+    with pytest.raises(AttributeError):
+        lesson.discipline = "x"
+    assert pickle.loads(pickle.dumps(lesson)) == lesson
+    assert json.loads(json.dumps(lesson, default=dict)) == data
+
+
+def test_lazy_fields():
+    lesson = Lesson(make_lesson(1))
+    assert lesson.day == date(2018, 6, 7)
+    assert (lesson.begin, lesson.end) == (time(9, 0), time(10, 20))
+    assert lesson.day is lesson.day
+    assert Lecturer({'fio': "A"}).get('chairOid') is None
+
+
+def test_interned_strings():
+    first, second = (Lesson(json.loads(json.dumps(make_lesson(n))))
+                     for n in range(2))
+    assert first.building is second.building
+
+
+def test_memory():
+    raw = json.dumps([make_lesson(n) for n in range(2000)])
+    tracemalloc.start()
+    dicts = json.loads(raw)
+    dicts_size = tracemalloc.get_traced_memory()[0]
+    del dicts
+    tracemalloc.stop()
+    tracemalloc.start()
+    records = to_records("schedule", json.loads(raw))
+    records_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert isinstance(records[0], Lesson)
+    assert records_size < dicts_size / 2
+
+
+def test_to_records():
+    lessons = to_records("lessons", [make_lesson(1)])
+    assert isinstance(lessons[0], Lesson)
+    assert to_records("schedule", lessons) is lessons
+    envelope = to_records("schedule", {'Count': 1,
+                                       'Lessons': [make_lesson(1)]})
+    assert isinstance(envelope['Lessons'][0], Record)
+
+
+def test_get_records(ruz_server):
+    ruz_server.routes['personLessons'] = [make_lesson(1), make_lesson(2)]
+    lessons = ruz.person_lessons(student_id=1, records=True)
+    assert all(isinstance(lesson, Lesson) for lesson in lessons)
+    assert ruz.person_lessons(student_id=1) == lessons
+    assert isinstance(ruz.person_lessons(student_id=1)[0], dict)
+    streamed = list(ruz.iter_person_lessons(student_id=1, records=True))
+    assert isinstance(streamed[1], Lesson) and streamed == lessons
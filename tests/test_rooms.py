@@ -0,0 +1,98 @@
+""" Tests for free auditorium finder (against local RUZ stand-in) """
+
+import pytest
+
+from ruz.rooms import Intervals, RoomIndex, busy_intervals
+
+DAY = "2018.09.04"
+AUDITORIUMS = [
+    {'auditoriumOid': 1, 'number': "101", 'typeOfAuditorium': "Лекционная",
+     'TypeOfAuditoriumOid': 10},
+    {'auditoriumOid': 2, 'number': "102", 'typeOfAuditorium': "Компьютерный",
+     'TypeOfAuditoriumOid': 20},
+    {'auditoriumOid': 3, 'number': "103", 'typeOfAuditorium': "Лекционная",
+     'TypeOfAuditoriumOid': 10},
+]
+TYPES = [
+    {'typeOfAuditoriumOid': 10, 'name': "Лекционная", 'abbr': "Лек"},
+    {'typeOfAuditoriumOid': 20, 'name': "Компьютерный", 'abbr': "Комп"},
+]
+
+
+def lesson(begin: str, end: str, day: str=DAY) -> dict:
+    return {'date': day, 'beginLesson': begin, 'endLesson': end}
+
+
+@pytest.fixture
+def schedules(ruz_server):
+    lessons = {
+        "1": [lesson("09:00", "10:20"), lesson("10:30", "11:50")],
+        "2": [lesson("13:40", "15:00")],
+        "3": [lesson("09:00", "10:20"), lesson("09:30", "12:00")],
+    }
+    ruz_server.routes['auditoriums'] = AUDITORIUMS
+    ruz_server.routes['typeOfAuditoriums'] = TYPES
+    ruz_server.routes['personLessons'] = \
+        lambda params: lessons.get(params['auditoriumOid'])
+    return lessons
+
+
+def test_intervals():
+    intervals = Intervals([(600, 700), (540, 620), (800, 900)])
+    assert (intervals.starts, intervals.ends) == ([540, 800], [700, 900])
+    assert intervals.is_free(700, 800) and intervals.is_free(0, 540)
+    assert not intervals.is_free(650, 750) and not intervals.is_free(0, 1000)
+    assert intervals.free_slots(500, 1000) == [(500, 540), (700, 800),
+                                               (900, 1000)]
+    assert Intervals().free_slots(0, 10) == [(0, 10)]
+    assert busy_intervals([lesson("09:00", "10:00"), {'date': DAY}]) == \
+        {DAY: Intervals([(540, 600)])}
+
+
+def test_free_rooms(ruz_server, schedules):
+    rooms = RoomIndex(1, "2018.09.03", "2018.09.09", max_workers=3).load()
+    assert len(ruz_server.requests) == 1 + 3
+
+    def numbers(*args, **kwargs) -> list:
+        return sorted(room['number'] for room in
+                      rooms.free_rooms(DAY, *args, **kwargs))
+
+    assert numbers("09:00", "10:00") == ["102"]
+    assert numbers("12:00", "13:40") == ["101", "102", "103"]
+    assert numbers("12:00", "14:00", room_type="Лекционная") == \
+        ["101", "103"]
+    assert numbers("11:00", "12:30", room_type=20) == ["102"]
+    assert numbers("08:00", "09:00", room_type="Лек") == ["101", "103"]
+    assert numbers("09:00", "10:00", room_type="Нет такого") == []
+    assert rooms.is_free(1, "2018.09.05", "09:00", "10:00")
+    assert rooms.free_slots(1, DAY, "08:00", "13:00") == [
+        ("08:00", "09:00"), ("10:20", "10:30"), ("11:50", "13:00")]
+    with pytest.raises(ValueError):
+        rooms.free_rooms("2018.09.10", "09:00", "10:00")
+
+
+def test_refresh(ruz_server, schedules):
+    rooms = RoomIndex(1, "2018.09.03", "2018.09.09").load()
+    assert rooms.refresh() == []
+    schedules["2"].append(lesson("09:00", "10:00"))
+    assert rooms.refresh([2]) == [2]
+    assert not rooms.is_free(2, DAY, "09:30", "09:45")
+    assert rooms.update(3, []) and rooms.is_free(3, DAY, "09:00", "12:00")
+
+
+def test_failed_requests(ruz_server, schedules):
+    failed = schedules.pop("3")
+    rooms = RoomIndex(1, "2018.09.03", "2018.09.09").load()
+    assert rooms.failed == {3}
+    assert [room['number'] for room in
+            rooms.free_rooms(DAY, "12:00", "13:00")] == ["101", "102"]
+    assert not rooms.is_free(3, DAY, "12:00", "13:00")
+    assert rooms.free_slots(3, DAY) == []
+
+    schedules["3"] = failed
+    del schedules["1"]  # previous intervals are kept on failure
+    assert rooms.refresh() == [3]
+    assert rooms.failed == {1}
+    assert not rooms.is_free(1, DAY, "09:00", "10:00")
+    assert [room['number'] for room in
+            rooms.free_rooms(DAY, "12:00", "13:00")] == ["101", "102", "103"]
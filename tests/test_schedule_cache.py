@@ -0,0 +1,98 @@
+""" Tests for schedule cache by days """
+
+from datetime import date
+
+from ruz.schedule_cache import (ScheduleCache, format_date, missing_ranges,
+                                parse_date)
+
+
+def lessons_for(params):
+    first, last = parse_date(params['fromDate']), parse_date(params['toDate'])
+    return [{'date': format_date(date.fromordinal(day)), 'n': n}
+            for day in range(first.toordinal(), last.toordinal() + 1)
+            if day % 7 not in (0, 6)  # no lessons on weekends
+            for n in range(2)]
+
+
+def test_missing_ranges():
+    days = {date(2018, 6, day): (10, []) for day in (5, 6, 9)}
+    days[date(2018, 6, 7)] = (0, [])
+    assert missing_ranges(days, date(2018, 6, 4), date(2018, 6, 10)) == [
+        (date(2018, 6, 4), date(2018, 6, 4)),
+        (date(2018, 6, 8), date(2018, 6, 8)),
+        (date(2018, 6, 10), date(2018, 6, 10))
+    ]
+    assert missing_ranges(days, date(2018, 6, 5), date(2018, 6, 9), 5) == [
+        (date(2018, 6, 7), date(2018, 6, 8))
+    ]
+
+
+def test_person_lessons(ruz_server):
+    ruz_server.routes['personLessons'] = lessons_for
+    cache = ScheduleCache()
+
+    week = cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                to_date="2018.06.10")
+    assert week == lessons_for({'fromDate': "2018.06.04",
+                                'toDate': "2018.06.10"})
+    today = cache.person_lessons(student_id=1, from_date="2018.06.05",
+                                 to_date="2018.06.05")
+    assert [lesson['date'] for lesson in today] == ["2018.06.05"] * 2
+    assert cache.requests == 1
+
+    month = cache.person_lessons(student_id=1, from_date="2018.06.01",
+                                 to_date="2018.06.30")
+    assert month == lessons_for({'fromDate': "2018.06.01",
+                                 'toDate': "2018.06.30"})
+    assert cache.requests == 3
+    assert [params['fromDate'] for _, params in ruz_server.requests] == \
+        ["2018.06.04", "2018.06.01", "2018.06.11"]
+
+    cache.person_lessons(student_id=2, from_date="2018.06.05",
+                         to_date="2018.06.05")
+    assert cache.requests == 4
+    cache.invalidate(student_id=1)
+    cache.person_lessons(student_id=1, from_date="2018.06.05",
+                         to_date="2018.06.05")
+    assert cache.requests == 5
+
+
+def test_failed_days_not_cached(ruz_server):
+    cache = ScheduleCache()
+    assert cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                to_date="2018.06.05") == []
+    ruz_server.routes['personLessons'] = lessons_for
+    assert len(cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                    to_date="2018.06.05")) == 4
+    assert cache.requests == 2
+
+
+def test_failed_ranges(ruz_server):
+    ruz_server.routes['personLessons'] = lessons_for
+    cache = ScheduleCache()
+    cache.person_lessons(student_id=1, from_date="2018.06.05",
+                         to_date="2018.06.05")
+    ruz_server.routes['personLessons'] = lambda params: None  # 503
+    failed = []
+    week = cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                to_date="2018.06.07", failed=failed)
+    assert [lesson['date'] for lesson in week] == ["2018.06.05"] * 2
+    assert failed == [("2018.06.04", "2018.06.04"),
+                      ("2018.06.06", "2018.06.07")]
+
+    ruz_server.routes['personLessons'] = lessons_for
+    failed = []
+    week = cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                to_date="2018.06.07", failed=failed)
+    assert len(week) == 8 and failed == []
+
+
+def test_api_v2_envelope(ruz_server):
+    ruz_server.routes['personLessons'] = lambda params: {
+        'Count': 2, 'Lessons': lessons_for(params),
+        'StatusCode': {'Code': 200, 'Description': ""}}
+    cache = ScheduleCache()
+    week = cache.person_lessons(student_id=1, from_date="2018.06.04",
+                                to_date="2018.06.10")
+    assert week == lessons_for({'fromDate': "2018.06.04",
+                                'toDate': "2018.06.10"})
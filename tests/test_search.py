@@ -0,0 +1,63 @@
+""" Tests for n-gram substring search """
+
+import random
+
+import ruz
+from ruz.search import NgramIndex, get_index, normalize, search
+
+LECTURERS = [
+    {'fio': "Иванов Иван Иванович"},
+    {'fio': "Петров Пётр Петрович"},
+    {'fio': " ИВАНОВА Анна "},
+    {'fio': None},
+    {'fio': "Сидоров Иван"}
+]
+
+
+def linear(records, query, by):
+    query = normalize(query)
+    return [el for el in records if query in normalize(el[by])]
+
+
+def test_find_same_as_linear():
+    index = NgramIndex(LECTURERS, "fio")
+    for query in ("иван", "ИВАНОВ", " ова ", "ов", "", "x", "иванович",
+                  "ван ив", "Анна", "вано"):
+        assert index.find(query) == linear(LECTURERS, query, "fio"), query
+
+
+def test_find_random():
+    rnd = random.Random(0)
+    alphabet = "абвгд "
+    records = [{'name': "".join(rnd.choice(alphabet) for _ in range(12))}
+               for _ in range(300)]
+    index = NgramIndex(records, "name")
+    for _ in range(300):
+        query = "".join(rnd.choice(alphabet)
+                        for _ in range(rnd.randint(1, 5)))
+        assert index.find(query) == linear(records, query, "name")
+
+
+def test_index_rebuilt_on_refresh():
+    index = get_index(LECTURERS, "fio", "lecturers")
+    assert get_index(LECTURERS, "fio", "lecturers") is index
+    assert get_index(list(LECTURERS), "fio", "lecturers") is index
+    changed = LECTURERS[:-1] + [{'fio': "Сидорова Анна"}]
+    assert get_index(changed, "fio", "lecturers") is not index
+
+
+def test_reused_index_returns_given_records():
+    copy = [dict(el) for el in LECTURERS]
+    assert search(LECTURERS, "иван", "fio", "lecturers") == \
+        [LECTURERS[0], LECTURERS[2], LECTURERS[4]]
+    found = search(copy, "иван", "fio", "lecturers")
+    assert found[0] is copy[0] and found[0] is not LECTURERS[0]
+
+
+def test_find_by_str(ruz_server):
+    ruz_server.routes['lecturers'] = LECTURERS
+    assert ruz.find_by_str("lecturers", "иван", by="fio") == \
+        [LECTURERS[0], LECTURERS[2], LECTURERS[4]]
+    assert ruz.find_by_str(ruz.lecturers, "петр", by="fio") == \
+        [LECTURERS[1]]
+    assert len(ruz_server.requests) == 1
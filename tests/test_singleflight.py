@@ -0,0 +1,165 @@
+""" Tests for coalescing of identical in-flight requests """
+
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+import ruz
+import ruz.aio
+from ruz.aio.transport import AsyncTransport, set_transport
+from ruz.cache import set_cache
+from ruz.singleflight import Group, get_group
+
+
+def slow(payload, delay=0.2):
+    return lambda params: time.sleep(delay) or payload
+
+
+def test_group():
+    group, calls = Group(), []
+
+    def func(value):
+        calls.append(value)
+        time.sleep(0.1)
+        if value == "error":
+            raise RuntimeError(value)
+        return [value]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: group.do("a", func, "a"),
+                                    range(8)))
+    assert calls == ["a"] and all(res is results[0] for res in results)
+    assert group.stats() == {'calls': 1, 'coalesced': 7, 'in_flight': 0}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(group.do, "b", func, "error")
+                   for _ in range(4)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result()
+    assert calls == ["a", "error"]
+    assert group.do("a", func, "c") == ["c"]  # not in flight anymore
+
+
+def test_group_interrupted():
+    group, calls = Group(), []
+
+    class Interrupt(BaseException):
+        pass
+
+    def func(value):
+        calls.append(value)
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise Interrupt()
+        return [value]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(group.do, "a", func, "a")]
+        time.sleep(0.05)
+        futures += [executor.submit(group.do, "a", func, "a")
+                    for _ in range(3)]
+        with pytest.raises(Interrupt):
+            futures[0].result()
+        assert [future.result() for future in futures[1:]] == [["a"]] * 3
+    assert calls == ["a", "a"]
+
+    # CancelledError is an Exception before Python 3.8 and for futures
+    calls.clear()
+
+    def cancelled(value):
+        calls.append(value)
+        time.sleep(0.1)
+        if len(calls) == 1:
+            raise CancelledError()
+        return [value]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(group.do, "c", cancelled, "c")
+        time.sleep(0.05)
+        follower = executor.submit(group.do, "c", cancelled, "c")
+        with pytest.raises(CancelledError):
+            leader.result()
+        assert follower.result() == ["c"]
+    assert calls == ["c", "c"]
+    calls[:] = ["a", "a"]
+
+    async def slow_call():
+        calls.append("b")
+        await asyncio.sleep(0.1)
+        return ["b"]
+
+    async def main():
+        leader = asyncio.ensure_future(group.do_async("b", slow_call))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.ensure_future(group.do_async("b", slow_call))
+                     for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(main()) == [["b"]] * 3
+    finally:
+        loop.close()
+    assert calls == ["a", "a", "b", "b"]
+    assert not len(group)
+
+
+def test_get_threads(ruz_server):
+    ruz_server.routes['lecturers'] = slow([{'fio': "A"}])
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(
+            lambda _: ruz.utils.get("lecturers", use_cache=False),
+            range(16)))
+    assert results == [[{'fio': "A"}]] * 16
+    assert len(ruz_server.requests) == 1
+    assert get_group().coalesced == 15
+
+    # different params are not coalesced, disabled cache is supported
+    previous = set_cache(None)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda oid: ruz.utils.get(
+            "lecturers", chairOid=oid), range(4)))
+    set_cache(previous)
+    assert len(ruz_server.requests) == 5
+
+
+def test_get_asyncio(ruz_server):
+    ruz_server.routes['lecturers'] = slow([{'fio': "A"}])
+    previous = set_transport(AsyncTransport())
+
+    async def main():
+        return await asyncio.gather(*[ruz.aio.lecturers()
+                                      for _ in range(10)])
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(main()) == [[{'fio': "A"}]] * 10
+        assert len(ruz_server.requests) == 1
+
+        # thread joins request made by coroutine
+        ruz.cache.invalidate()
+        thread_result = []
+
+        async def mixed():
+            task = asyncio.ensure_future(ruz.aio.lecturers())
+            await asyncio.sleep(0.05)
+            thread = threading.Thread(target=lambda: thread_result.append(
+                ruz.lecturers()))
+            thread.start()
+            result = await task
+            await loop.run_in_executor(None, thread.join)
+            return result
+
+        assert loop.run_until_complete(mixed()) == thread_result[0]
+        assert len(ruz_server.requests) == 2
+    finally:
+        set_transport(previous).close()
+        loop.close()
@@ -0,0 +1,66 @@
+""" Tests for streaming JSON decoding """
+
+import io
+import json
+
+import pytest
+
+import ruz
+from ruz.stream import iter_array
+
+RECORDS = [
+    {'fio': "Иванов И.И.", 'lecturerOid': 1, 'chair': None},
+    {'fio': "Ы ] [ , \" }", 'lecturerOid': 22, 'isBan': False},
+    [1, 2.5, -3e2, "x"],
+    12345,
+    "строка",
+    None,
+    {}
+]
+
+
+class Reader(io.BytesIO):
+    """ BytesIO which counts read calls """
+    reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_iter_array(chunk_size):
+    for indent in (None, 2):
+        data = json.dumps(RECORDS, ensure_ascii=False, indent=indent)
+        assert list(iter_array(io.BytesIO(data.encode("utf-8")),
+                               chunk_size=chunk_size)) == RECORDS
+    assert list(iter_array(io.BytesIO(b" [ ] "), chunk_size=chunk_size)) \
+        == []
+    assert list(iter_array(io.BytesIO(b'{"Count": 1}'),
+                           chunk_size=chunk_size)) == [{'Count': 1}]
+
+
+def test_iter_array_lazy():
+    data = json.dumps([{'n': n} for n in range(10000)]).encode("utf-8")
+    reader = Reader(data)
+    records = iter_array(reader, chunk_size=1024)
+    assert next(records) == {'n': 0}
+    assert reader.reads == 1
+    assert sum(1 for _ in records) == 9999
+
+
+@pytest.mark.parametrize("data", [b"", b"[1, 2", b"[1,, 2]", b"[1 2]",
+                                  b"[{]", b"[1,]", b"[1, 2 , ]", b"[,]"])
+def test_iter_array_invalid(data):
+    with pytest.raises(ValueError):
+        list(iter_array(io.BytesIO(data), chunk_size=2))
+
+
+def test_get_stream(ruz_server):
+    lecturers = [{'lecturerOid': n, 'fio': str(n)} for n in range(5000)]
+    ruz_server.routes['lecturers'] = lecturers
+    assert list(ruz.iter_lecturers()) == lecturers
+    assert list(ruz.iter_lecturers()) == lecturers
+    assert ruz_server.connections == 1  # connection is reused
+    assert list(ruz.iter_auditoriums()) == []  # 404
+    assert list(ruz.utils.get("lecturers", stream=True, tmp=1)) == []
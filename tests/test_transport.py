@@ -0,0 +1,286 @@
+""" Tests for pooled HTTP transport (against local RUZ stand-in) """
+
+import asyncio
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib import error
+
+import pytest
+
+import ruz
+import ruz.aio
+from ruz import metrics
+from ruz.aio.transport import AsyncConnectionPool, AsyncTransport
+from ruz.aio.transport import set_transport as set_aio_transport
+from ruz.transport import (CONNECT_TIMEOUT, RetryBudget, Transport,
+                           decompress, get_transport, make_decoder)
+from tests.fixtures import SAMPLE_SCHEDULE
+
+
+def test_get_reuses_connection(ruz_server):
+    ruz_server.routes['buildings'] = [{'buildingOid': 1, 'name': "A"}]
+    for _ in range(5):
+        assert ruz.utils.get("buildings", use_cache=False) == \
+            [{'buildingOid': 1, 'name': "A"}]
+    assert len(ruz_server.requests) == 5
+    assert ruz_server.connections == 1
+
+
+def test_get_params(ruz_server):
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE
+    assert ruz.utils.get("schedule", studentOid=1,
+                         fromDate="2018.06.07") == SAMPLE_SCHEDULE
+    assert ruz_server.requests[-1] == (
+        "personLessons", {'studentOid': "1", 'fromDate': "2018.06.07"}
+    )
+
+
+def test_get_fallback(ruz_server):
+    assert ruz.utils.get("buildings") == []
+    assert ruz_server.connections == 1  # 404 doesn't break connection
+
+
+def test_http_error(ruz_server):
+    with pytest.raises(error.HTTPError):
+        get_transport().request(ruz_server.url + "missing")
+
+
+def test_pool_size_threads(ruz_server):
+    ruz_server.routes['streams'] = []
+    transport = Transport(pool_size=2)
+    url = ruz_server.url + "streams"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: transport.request(url),
+                                    range(64)))
+    assert results == [b"[]"] * 64
+    assert len(transport.pool("http", url.split("/")[2])) <= 2
+    transport.close()
+
+
+def test_connection_error():
+    with pytest.raises(error.URLError):
+        Transport().request("http://127.0.0.1:1/")
+
+
+def test_schedules_parallel(ruz_server):
+    ruz_server.routes['personLessons'] = lambda params: [params]
+    results = list(ruz.schedules(student_ids=range(40), max_workers=4,
+                                 from_date="2018.06.07"))
+    assert [res[0]['studentOid'] for res in results] == \
+        [str(key) for key in range(40)]
+
+    pairs = list(ruz.schedules(student_ids=range(40), max_workers=4,
+                               ordered=False, from_date="2018.06.07"))
+    assert sorted(key for key, _ in pairs) == list(range(40))
+    for key, lessons in pairs:
+        assert lessons[0]['studentOid'] == str(key)
+
+
+def test_parallel_map_failure():
+    def func(key):
+        if key == 3:
+            raise RuntimeError(key)
+        return [key]
+
+    assert list(ruz.utils.parallel_map(func, range(6), 2)) == \
+        [[0], [1], [2], [], [4], [5]]
+    assert dict(ruz.utils.parallel_map(func, range(6), 2, False)) == \
+        {0: [0], 1: [1], 2: [2], 3: [], 4: [4], 5: [5]}
+
+
+def test_parallel_map_backpressure():
+    consumed = []
+
+    def keys():
+        for key in range(1000):
+            consumed.append(key)
+            yield key
+
+    results = ruz.utils.parallel_map(lambda key: key, keys(), 3)
+    assert next(results) == 0
+    assert len(consumed) <= 6
+    results.close()
+
+
+def test_read_timeout(ruz_server):
+    ruz_server.routes['streams'] = lambda params: time.sleep(0.5) or []
+    transport = Transport(read_timeout=0.1, retries=0)
+    start = time.perf_counter()
+    with pytest.raises(error.URLError):
+        transport.request(ruz_server.url + "streams")
+    assert time.perf_counter() - start < 0.4
+    transport.close()
+
+
+def test_retries(ruz_server):
+    url = ruz_server.url + "streams"
+    ruz_server.error_rate = 1
+    transport = Transport(retries=2, backoff=0.01)
+    with pytest.raises(error.HTTPError):
+        transport.request(url)
+    assert len(ruz_server.requests) == 3
+
+    # retries are limited by budget
+    transport = Transport(retries=2, backoff=0.01,
+                          retry_budget=RetryBudget(ratio=0, reserve=1))
+    for _ in range(2):
+        with pytest.raises(error.HTTPError):
+            transport.request(url)
+    assert len(ruz_server.requests) == 3 + 3
+
+    # 404 is not retried
+    ruz_server.error_rate = 0
+    with pytest.raises(error.HTTPError):
+        Transport(retries=2).request(ruz_server.url + "missing")
+    assert len(ruz_server.requests) == 7
+
+
+def test_hedged_request(ruz_server):
+    hang = threading.Event()
+
+    def streams(params):
+        if params.get("hang"):
+            hang.set()
+            time.sleep(1)
+        return [params]
+
+    ruz_server.routes['streams'] = streams
+    transport = Transport(hedge=0.9, retry_budget=RetryBudget(reserve=5))
+    url = ruz_server.url + "streams"
+    for _ in range(20):
+        transport.request(url)
+    assert transport.latency.percentile(0.9) < 0.1
+
+    # the second request doesn't hang (route checks only first one)
+    calls = []
+    ruz_server.routes['streams'] = lambda params: streams(
+        {'hang': not calls and not calls.append(1)})
+    start = time.perf_counter()
+    assert transport.request(url) == b'[{"hang": false}]'
+    assert hang.is_set() and time.perf_counter() - start < 0.5
+    transport.close()
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, reserve=1)
+    assert budget.withdraw() and not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw() and not budget.withdraw()
+
+
+def test_compressed_response(ruz_server):
+    ruz_server.compress = True
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE * 20
+    previous = metrics.set_registry(metrics.default_registry())
+    metrics.enable()
+    try:
+        assert ruz.utils.get("schedule", studentOid=1) == SAMPLE_SCHEDULE * 20
+        assert list(ruz.utils.get("schedule", stream=True, studentOid=2)) \
+            == SAMPLE_SCHEDULE * 20
+        registry = metrics.get_registry()
+    finally:
+        metrics.disable()
+        metrics.set_registry(previous)
+    wire = registry["ruz_wire_bytes_total"].value(encoding="gzip")
+    decoded = registry["ruz_decoded_bytes_total"].value(encoding="gzip")
+    assert 0 < wire * 5 < decoded
+    # response sizes are decompressed ones
+    assert registry["ruz_response_bytes"].sum(endpoint="personLessons") == \
+        decoded
+    assert ruz_server.connections == 1
+
+
+def test_compression_negotiation(ruz_server):
+    ruz_server.compress = True
+    ruz_server.routes['streams'] = [{'name': "A" * 100}]
+    url = ruz_server.url + "streams"
+    for compression in ("deflate", ""):
+        transport = Transport(compression=compression)
+        with transport.open(url) as response:
+            assert response.encoding == (compression or None)
+            assert response.read(16) + response.read() == \
+                b'[{"name": "' + b"A" * 100 + b'"}]'
+            assert (response.bytes_read < response.bytes_decoded) == \
+                bool(compression)
+        transport.close()
+
+
+def test_decoders():
+    data = b'{"a": 1}' * 10
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw = compressor.compress(data) + compressor.flush()
+    assert decompress(raw, "deflate") == data
+    assert decompress(zlib.compress(data), "Deflate") == data
+    assert decompress(data, None) == data
+    decoder = make_decoder("deflate")
+    assert b"".join(decoder.decompress(raw[idx:idx + 3])
+                    for idx in range(0, len(raw), 3)) + decoder.flush() == data
+    with pytest.raises(ValueError):
+        make_decoder("br")
+
+
+def test_aio_compressed_response(ruz_server):
+    ruz_server.compress = True
+    ruz_server.routes['personLessons'] = SAMPLE_SCHEDULE
+    previous = set_aio_transport(AsyncTransport())
+    try:
+        assert asyncio.new_event_loop().run_until_complete(
+            ruz.aio.person_lessons(student_id=1)) == SAMPLE_SCHEDULE
+    finally:
+        set_aio_transport(previous).close()
+
+
+def test_timeout_of_reused_connection(ruz_server):
+    ruz_server.routes['streams'] = []
+    transport = Transport(read_timeout=0.1, retries=0)
+    transport.request(ruz_server.url + "streams")
+    ruz_server.latency = 0.3
+    with pytest.raises(error.URLError):  # not retried with new connection
+        transport.request(ruz_server.url + "streams")
+    assert len(ruz_server.requests) == 2
+    transport.close()
+
+
+def test_aio_timeouts_and_retries(ruz_server, monkeypatch):
+    writers = []
+    acquire = AsyncConnectionPool.acquire
+
+    async def tracked(pool, timeout=None):
+        reader, writer, reused = await acquire(pool, timeout)
+        writers.append(writer)
+        return reader, writer, reused
+    monkeypatch.setattr(AsyncConnectionPool, "acquire", tracked)
+
+    loop = asyncio.new_event_loop()
+    url = ruz_server.url + "streams"
+    ruz_server.routes['streams'] = lambda params: time.sleep(0.3) or []
+    transport = AsyncTransport(read_timeout=0.1, retries=0)
+    assert transport.connect_timeout == CONNECT_TIMEOUT
+    start = time.perf_counter()
+    with pytest.raises(error.URLError):
+        loop.run_until_complete(transport.request(url))
+    assert time.perf_counter() - start < 0.25
+    assert writers[-1].transport.is_closing()
+
+    # cancelled request closes its connection
+    async def cancelled():
+        task = asyncio.ensure_future(transport.request(url))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    transport.read_timeout = None
+    loop.run_until_complete(cancelled())
+    assert writers[-1].transport.is_closing()
+
+    ruz_server.error_rate = 1
+    requests = len(ruz_server.requests)
+    transport = AsyncTransport(retries=2, backoff=0.01)
+    with pytest.raises(error.HTTPError):
+        loop.run_until_complete(transport.request(url))
+    assert len(ruz_server.requests) == requests + 3
+    transport.close()
+    loop.close()
@@ -0,0 +1,99 @@
+""" Tests for compiled response validators """
+
+import sys
+
+import pytest
+
+import ruz
+from ruz.records import Lesson
+from ruz.validators import ValidationError, item_validator, validate
+from tests.test_records import make_lesson
+
+
+def test_full():
+    lessons = [make_lesson(n) for n in range(10)]
+    assert validate("lessons", lessons) is lessons
+    lessons[7]['lecturerOid'] = "7"
+    with pytest.raises(ValidationError) as err:
+        validate("schedule", lessons)
+    assert "schedule[7]['lecturerOid']: expected int" in str(err.value)
+    with pytest.raises(ValidationError):
+        validate("lecturers", {'fio': "A"})
+    # missing and unknown keys are allowed, None only where declared
+    validate("lecturers", [{'fio': "A", 'newField': 1}])
+    validate("schedule", [{'subGroup': None}])
+    with pytest.raises(ValidationError):
+        validate("schedule", [{'building': None}])
+
+
+def test_schedule2_envelope():
+    envelope = {'Count': 2, 'Lessons': [make_lesson(1), make_lesson(2)],
+                'StatusCode': {'Code': 200, 'Description': "OK"}}
+    validate("personLessons", envelope)
+    envelope['Lessons'][1]['date'] = 20180607
+    with pytest.raises(ValidationError) as err:
+        validate("personLessons", envelope)
+    assert "schedule2['Lessons'][1]['date']" in str(err.value)
+    envelope['Lessons'] = None
+    with pytest.raises(ValidationError):
+        validate("personLessons", envelope)
+
+
+def test_sampled():
+    lessons = [make_lesson(n) for n in range(10)]
+    lessons[3]['date'] = 1
+    validate("schedule", lessons, "sampled", sample_rate=5)
+    with pytest.raises(ValidationError):
+        validate("schedule", lessons, "sampled", sample_rate=3)
+    validate("schedule", lessons, "off")
+    with pytest.raises(ValueError):
+        validate("schedule", lessons, "strict")
+    assert item_validator("schedule", "off") is None
+    check = item_validator("schedule", "sampled", sample_rate=2)
+    check(lessons[3], 3)
+    with pytest.raises(ValidationError):
+        check(lessons[3], 4)
+
+
+def test_cost():
+    # checks are inlined: one call per element, none per field
+    lessons = [make_lesson(n) for n in range(1000)]
+    calls = []
+
+    def profile(frame: object, event: str, arg: object) -> None:
+        if event == "call":
+            calls.append(frame.f_code.co_name)
+    sys.setprofile(profile)
+    try:
+        validate("schedule", lessons)
+    finally:
+        sys.setprofile(None)
+    assert sum(name.startswith("check_object") for name in calls) == 1000
+    assert len(calls) < 1010
+    assert not any(name.startswith("_fail") for name in calls)
+
+
+def test_get(ruz_server):
+    lessons = [make_lesson(1), make_lesson(2)]
+    ruz_server.routes['personLessons'] = lessons
+    assert ruz.person_lessons(student_id=1, validate="full") == lessons
+    lessons[1]['building'] = 1
+    with pytest.raises(ValidationError):
+        ruz.person_lessons(student_id=2, validate="full")
+    with pytest.raises(ValidationError):
+        ruz.person_lessons(student_id=2, validate="full", records=True)
+    # invalid response is not cached
+    assert len(ruz.utils.get_cache().backend.keys()) == 1
+    assert ruz.person_lessons(student_id=2)[1]['building'] == 1
+    # response cached without validation is not returned for "full"
+    assert ruz.person_lessons(student_id=2, validate="off")
+    with pytest.raises(ValidationError):
+        ruz.person_lessons(student_id=2, validate="full")
+    with pytest.raises(ValidationError):
+        ruz.utils.prepare("personLessons", validate="full")(
+            studentOid=2)
+    streamed = ruz.iter_person_lessons(student_id=3, validate="full",
+                                       records=True)
+    assert isinstance(next(streamed), Lesson)
+    with pytest.raises(ValidationError):
+        next(streamed)